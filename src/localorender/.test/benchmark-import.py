@@ -0,0 +1,66 @@
+"""
+Compare the time spent at Nuke startup to install LocaloRender from a menu.py,
+between importing the GUI module and the install module which registers the
+panel without Qt.
+
+Only the imports are timed: the panel itself is not registered in terminal
+sessions, so this also runs with ``nuke -t``.
+
+Each case runs in a new process so modules are not already imported.
+
+Usage::
+
+    nuke -t benchmark-import.py
+"""
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+THISDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THISDIR))
+
+HEAVY_MODULES = ["pyui", "PySide2", "localorender.gui"]
+CASES = ["localorender.install", "localorender.gui"]
+REPEAT = 5
+
+
+def run_case(module_name):
+    # nuke itself is already imported at startup
+    import nuke  # noqa: F401
+
+    start = time.perf_counter()
+    importlib.import_module(module_name)
+    duration = time.perf_counter() - start
+    loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+    print("{:.3f} {}".format(duration * 1000, ",".join(loaded)))
+
+
+def time_case(module_name):
+    command = [sys.executable]
+    if not os.path.basename(sys.executable).lower().startswith("python"):
+        command.append("-t")
+    command += [os.path.abspath(__file__), module_name]
+    output = subprocess.check_output(command, universal_newlines=True)
+    duration, _, loaded = output.strip().splitlines()[-1].partition(" ")
+    return float(duration), loaded
+
+
+def main():
+    for module_name in CASES:
+        results = [time_case(module_name) for _ in range(REPEAT)]
+        duration = min(result[0] for result in results)
+        loaded = results[0][1] or "-"
+        print(
+            "    import {:<24} {:>8.1f}ms    imported: {}".format(
+                module_name, duration, loaded
+            )
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_case(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,86 @@
+"""
+Compare the expansion of Write node paths between the original per-frame
+implementation and the compiled template.
+
+Usage::
+
+    nuke -t benchmark-paths.py
+"""
+import os
+import sys
+import timeit
+
+THISDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THISDIR))
+
+from localorender import template
+
+try:
+    from nukescripts import replaceHashes
+except ImportError:
+    replaceHashes = template.replace_hashes
+
+TEMPLATE = "/mnt/shows/demo/shots/sh010/comp/render/v001/%V/sh010_comp_v001.%V.####.exr"
+VIEWS = ["left", "right"]
+
+
+def expand_original(src_path, frames, views):
+    """
+    Copy of ``get_write_node_paths_by_frame`` before the compiled templates.
+    """
+    paths = {}
+    for view in views:
+        for frame in frames:
+            iteration_path = src_path
+            if "%V" in iteration_path:
+                iteration_path = iteration_path.replace("%V", view)
+            if "%v" in iteration_path:
+                iteration_path = iteration_path.replace("%v", view[0])
+
+            try:
+                iteration_path = replaceHashes(iteration_path) % frame
+            except TypeError:
+                pass
+
+            path = os.path.normpath(os.path.abspath(iteration_path))
+            if path not in paths:
+                paths[path] = (frame, view)
+
+    return paths
+
+
+def expand_compiled_dict(src_path, frames, views):
+    path_template = template.PathTemplate(src_path)
+    return {
+        path: (frame, view) for path, frame, view in path_template.expand(frames, views)
+    }
+
+
+def expand_compiled_generator(src_path, frames, views):
+    path_template = template.PathTemplate(src_path)
+    for _ in path_template.expand(frames, views):
+        pass
+
+
+def main():
+    for frame_count in (10000, 100000):
+        frames = range(1001, 1001 + frame_count)
+        assert expand_original(TEMPLATE, frames, VIEWS) == expand_compiled_dict(
+            TEMPLATE, frames, VIEWS
+        )
+        print("{} frames x {} views:".format(frame_count, len(VIEWS)))
+        for function in (
+            expand_original,
+            expand_compiled_dict,
+            expand_compiled_generator,
+        ):
+            timings = timeit.repeat(
+                lambda: function(TEMPLATE, frames, VIEWS), number=1, repeat=5
+            )
+            print(
+                "    {:<28} {:>8.1f}ms".format(function.__name__, min(timings) * 1000)
+            )
+
+
+if __name__ == "__main__":
+    main()
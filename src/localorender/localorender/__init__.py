@@ -0,0 +1,70 @@
+"""
+author: liam collod
+requirement: nuke,python-3.7+
+
+The GUI (:mod:`localorender.gui`) and the nuke helpers (:mod:`localorender.render`)
+are only imported when one of their attributes is first accessed from this
+package, so importing ``localorender`` doesn't import nuke or Qt. The install
+functions (:mod:`localorender.install`) only import the GUI once the panel opens.
+"""
+import importlib
+import logging
+import sys
+
+APPNAME = "LocaloRender"
+LOGGER = logging.getLogger(APPNAME)
+
+__version__ = "2.0.0"
+
+_LAZY_ATTRIBUTES = {
+    "get_write_node_template": "render",
+    "iter_write_node_paths": "render",
+    "get_write_node_paths_by_frame": "render",
+    "save_script_copy": "render",
+    "SvgIcons": "gui",
+    "WriteNodesView": "gui",
+    "FrameRangeFieldWidget": "gui",
+    "ViewSelectWidget": "gui",
+    "WriteNodeSelectorWidget": "gui",
+    "LocaloRenderDialog": "gui",
+    "UiBuilder": "install",
+    "LocaloRenderPanel": "gui",
+    "open_as_panel": "install",
+    "register_as_panel": "install",
+    "nukescript_showRenderDialog": "install",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    module = importlib.import_module("." + module_name, __name__)
+    return getattr(module, name)
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_ATTRIBUTES.keys()))
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Configure this script logger, if root logger is not.
+    """
+    if not len(logging.root.handlers) == 1 or LOGGER.handlers:
+        return
+    # try to check if nuke default handler that have never been set
+    handler = logging.root.handlers[0]
+    if handler.level != logging.NOTSET:
+        return
+
+    print("[{}] configuring python logger '{}'".format(APPNAME, LOGGER.name))
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter(
+        "%(levelname)-7s | %(asctime)s [%(name)s][%(funcName)s] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
@@ -0,0 +1,20 @@
+"""
+Entry point of the command line interface, see :mod:`localorender.cli`.
+
+Usage::
+
+    python -m localorender script.nk --frames 1-100
+    nuke -t path/to/localorender/__main__.py script.nk --frames 1-100
+"""
+import os
+import sys
+
+if not __package__:
+    # executed as a script by ``nuke -t``: make the package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from localorender import cli
+else:
+    from . import cli
+
+if __name__ == "__main__":
+    sys.exit(cli.main())
@@ -0,0 +1,326 @@
+"""
+Choose how many worker processes render in parallel, and how many threads each
+of them uses, from the memory the renders actually need.
+
+Workers report the peak resident memory of their process after each frame: the
+first frames of each Write node give how much a process needs, and the number of
+processes is adjusted during the render so they fit in the available memory,
+without exceeding the number of CPUs.
+
+This module doesn't depend on nuke or Qt, and only uses the standard library.
+"""
+import collections
+import ctypes
+import logging
+import os
+import subprocess
+import sys
+import time
+
+LOGGER = logging.getLogger("LocaloRender.autoscale")
+
+MB = 1024.0**2
+GB = 1024.0**3
+
+DEFAULT_MEMORY_RESERVE = 0.1
+"""
+Fraction of the total memory kept free for the system and the other applications.
+"""
+
+MIN_MEMORY_RESERVE = 2 * 1024**3
+"""
+Minimum memory kept free, in bytes, on machines with little memory.
+"""
+
+DEFAULT_PROBE_WORKERS = 2
+"""
+Number of workers started before any frame memory was measured.
+"""
+
+DEFAULT_INTERVAL = 2.0
+"""
+Minimum time in seconds between two evaluations of the number of workers.
+"""
+
+ScaleDecision = collections.namedtuple(
+    "ScaleDecision", ["workers", "threads", "reason"]
+)
+"""
+Number of processes and threads per process to use, with why they were chosen.
+"""
+
+
+def get_cpu_count():
+    """
+    Returns:
+        int: number of CPUs this process is allowed to run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def get_initial_workers(max_workers, cpu_count=None):
+    """
+    Args:
+        max_workers(int): upper bound of the number of processes, all the CPUs if 0.
+        cpu_count(int or None): default to the CPUs this process can use.
+
+    Returns:
+        int: number of workers an autoscaled render starts with.
+    """
+    cpu_count = cpu_count or get_cpu_count()
+    return min(max_workers or cpu_count, cpu_count, DEFAULT_PROBE_WORKERS)
+
+
+class _MemoryStatus(ctypes.Structure):
+    _fields_ = [
+        ("dwLength", ctypes.c_ulong),
+        ("dwMemoryLoad", ctypes.c_ulong),
+        ("ullTotalPhys", ctypes.c_ulonglong),
+        ("ullAvailPhys", ctypes.c_ulonglong),
+        ("ullTotalPageFile", ctypes.c_ulonglong),
+        ("ullAvailPageFile", ctypes.c_ulonglong),
+        ("ullTotalVirtual", ctypes.c_ulonglong),
+        ("ullAvailVirtual", ctypes.c_ulonglong),
+        ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+    ]
+
+
+def _get_windows_memory():
+    status = _MemoryStatus()
+    status.dwLength = ctypes.sizeof(_MemoryStatus)
+    if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        return None, None
+    return status.ullTotalPhys, status.ullAvailPhys
+
+
+def _get_linux_memory():
+    values = {}
+    with open("/proc/meminfo", "r") as meminfo:
+        for line in meminfo:
+            key, _, value = line.partition(":")
+            fields = value.split()
+            if fields:
+                values[key] = int(fields[0]) * 1024
+    available = values.get("MemAvailable")
+    if available is None:
+        # kernels older than 3.14
+        available = sum(values.get(key, 0) for key in ("MemFree", "Buffers", "Cached"))
+    return values.get("MemTotal"), available
+
+
+def _get_macos_memory():
+    total = int(subprocess.check_output(["sysctl", "-n", "hw.memsize"]))
+    output = subprocess.check_output(["vm_stat"], universal_newlines=True)
+    page_size = 4096
+    pages = {}
+    for line in output.splitlines():
+        if "page size of" in line:
+            page_size = int(line.split("page size of")[1].split()[0])
+            continue
+        key, _, value = line.partition(":")
+        value = value.strip().rstrip(".")
+        if value.isdigit():
+            pages[key.strip()] = int(value)
+    free_pages = sum(
+        pages.get(key, 0)
+        for key in (
+            "Pages free",
+            "Pages inactive",
+            "Pages speculative",
+            "Pages purgeable",
+        )
+    )
+    return total, free_pages * page_size
+
+
+def get_memory():
+    """
+    Returns:
+        tuple[int or None, int or None]:
+            total and available physical memory in bytes, None when unknown.
+    """
+    try:
+        if sys.platform == "win32":
+            return _get_windows_memory()
+        if sys.platform == "darwin":
+            return _get_macos_memory()
+        return _get_linux_memory()
+    except (OSError, ValueError, subprocess.CalledProcessError) as error:
+        LOGGER.debug("cannot read system memory: {}".format(error))
+        return None, None
+
+
+def format_size(size):
+    """
+    Args:
+        size(int): in bytes
+
+    Returns:
+        str: like "1.5 GB" or "800 MB"
+    """
+    if size < GB:
+        return "{:.0f} MB".format(size / MB)
+    return "{:.1f} GB".format(size / GB)
+
+
+class WorkerAutoscaler(object):
+    """
+    Find how many worker processes can render at the same time from the peak memory
+    measured on the frames already rendered.
+
+    Until a frame was measured only a few workers are started, then the count grows
+    while the memory available allows another process of the most demanding node,
+    and shrinks when the available memory drops below the reserve. Shrinking doesn't
+    kill any process: the pool waits for enough of them to finish.
+
+    Args:
+        max_workers(int): upper bound of the number of processes.
+        cpu_count(int or None): default to the CPUs this process can use.
+        memory_reserve(float): fraction of the total memory to always keep free.
+        interval(float): minimum time in seconds between two changes.
+        get_memory(callable or None):
+            returns the total and available memory in bytes, see :func:`get_memory`.
+    """
+
+    def __init__(
+        self,
+        max_workers,
+        cpu_count=None,
+        memory_reserve=DEFAULT_MEMORY_RESERVE,
+        interval=DEFAULT_INTERVAL,
+        get_memory=get_memory,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.cpu_count = cpu_count or get_cpu_count()
+        self.memory_reserve = memory_reserve
+        self.interval = interval
+        self._get_memory = get_memory
+
+        self._peak_by_node = {}  # type: dict[str, int]
+        self._last_update = None  # type: float | None
+        self.workers = get_initial_workers(self.max_workers, self.cpu_count)
+        self.threads = self.get_threads(self.workers)
+        LOGGER.info(
+            "starting with {} workers of {} threads until the memory of a frame "
+            "is measured".format(self.workers, self.threads)
+        )
+
+    @property
+    def peak_memory(self):
+        """
+        Returns:
+            tuple[str or None, int]:
+                the node whose frames needed the most memory, with that memory in bytes.
+        """
+        if not self._peak_by_node:
+            return None, 0
+        node = max(self._peak_by_node, key=self._peak_by_node.get)
+        return node, self._peak_by_node[node]
+
+    def get_threads(self, workers):
+        """
+        Args:
+            workers(int):
+
+        Returns:
+            int: number of threads per process so the workers share all the CPUs.
+        """
+        return max(1, self.cpu_count // max(1, workers))
+
+    def add_measure(self, node, peak_memory):
+        """
+        Args:
+            node(str): full name of the Write node that was rendered.
+            peak_memory(int or None): peak resident memory of the worker in bytes.
+        """
+        if not peak_memory:
+            return
+        if peak_memory > self._peak_by_node.get(node, 0):
+            if node not in self._peak_by_node:
+                LOGGER.debug(
+                    "first frame of '{}' peaked at {}".format(
+                        node, format_size(peak_memory)
+                    )
+                )
+            self._peak_by_node[node] = peak_memory
+
+    def update(self, running, starting=0, force=False):
+        """
+        Evaluate the number of workers again, at most once per ``interval``.
+
+        Args:
+            running(int): number of processes currently running.
+            starting(int): how many of them didn't render a frame yet.
+            force(bool): ignore the interval.
+
+        Returns:
+            ScaleDecision or None: the new values if they changed.
+        """
+        now = time.time()
+        if (
+            not force
+            and self._last_update is not None
+            and now - self._last_update < self.interval
+        ):
+            return None
+        self._last_update = now
+
+        decision = self.get_decision(running, starting)
+        if decision.workers == self.workers:
+            return None
+        direction = "up" if decision.workers > self.workers else "down"
+        LOGGER.info(
+            "scaling {} to {} workers of {} threads: {}".format(
+                direction, decision.workers, decision.threads, decision.reason
+            )
+        )
+        self.workers = decision.workers
+        self.threads = decision.threads
+        return decision
+
+    def get_decision(self, running, starting=0):
+        """
+        Args:
+            running(int): number of processes currently running.
+            starting(int): how many of them didn't render a frame yet, so didn't
+                reach their peak memory.
+
+        Returns:
+            ScaleDecision: what the number of workers should be now.
+        """
+        node, peak = self.peak_memory
+        if not peak:
+            return ScaleDecision(self.workers, self.threads, "no frame measured yet")
+
+        limit = min(self.max_workers, self.cpu_count)
+        limit_reason = (
+            "limited to {} CPUs".format(self.cpu_count)
+            if self.cpu_count < self.max_workers
+            else "limited to the maximum of {} workers".format(self.max_workers)
+        )
+        total, available = self._get_memory()
+        if total is None or available is None:
+            return ScaleDecision(
+                limit,
+                self.get_threads(limit),
+                "system memory unknown, {}".format(limit_reason),
+            )
+
+        reserve = max(MIN_MEMORY_RESERVE, total * self.memory_reserve)
+        # the running processes already use their memory, except the ones still
+        # loading the script. Each new one needs a peak of the most demanding node.
+        spare = available - reserve - starting * peak
+        workers = running + int(spare // peak)
+        memory_text = "{} available with {} reserved, {} per worker for '{}'".format(
+            format_size(available), format_size(reserve), format_size(peak), node
+        )
+        if workers >= limit:
+            return ScaleDecision(
+                limit,
+                self.get_threads(limit),
+                "{}, {}".format(memory_text, limit_reason),
+            )
+        workers = max(1, workers)
+        return ScaleDecision(workers, self.get_threads(workers), memory_text)
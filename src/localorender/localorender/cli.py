@@ -0,0 +1,733 @@
+"""
+Render Write nodes of a nuke script from the command line, without any GUI.
+
+Usage::
+
+    python -m localorender script.nk --frames 1-100 --skip-existing --workers 8
+
+When nuke cannot be imported, the command is executed again in ``nuke -t`` using
+the executable given with ``--nuke`` or the ``LOCALORENDER_NUKE`` environment variable.
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import APPNAME
+from . import LOGGER
+from . import __version__
+
+NUKE_EXE_ENV = "LOCALORENDER_NUKE"
+
+_CANCELLED_ERROR = "render cancelled"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="localorender",
+        description="Render Write nodes of a nuke script.",
+    )
+    parser.add_argument("script", help="path to the .nk script to render.")
+    parser.add_argument(
+        "--frames",
+        help="nuke frame-range like '1-100' or '1-10x2 20'. Default to the script frame-range.",
+    )
+    parser.add_argument(
+        "--views",
+        help="comma-separated views to render. Default to all the script views.",
+    )
+    parser.add_argument(
+        "--nodes",
+        help="comma-separated full names of the Write nodes to render. Default to all.",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="do not render the frames already existing on disk.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="number of background nuke processes rendering in parallel. "
+        "With 0 (default) frames are rendered in this process.",
+    )
+    parser.add_argument(
+        "--autoscale",
+        action="store_true",
+        help="adjust the number of background nuke processes, and their threads, "
+        "from the available memory and the peak memory of the first frames of "
+        "each node. --workers is then the maximum, default to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--hang-timeout",
+        type=float,
+        default=10.0,
+        metavar="FACTOR",
+        help="with --workers, kill and render again the frames taking more than "
+        "FACTOR times the median frame time of the render (and at least a minute). "
+        "0 to never kill a frame.",
+    )
+    parser.add_argument(
+        "--frame-order",
+        choices=["ascending", "subdivision", "stride"],
+        default="ascending",
+        help="order in which frames are rendered: 'subdivision' renders the first, "
+        "last and middle frames first, then the middle of each half, and so on; "
+        "'stride' renders every Nth frame first (see --stride), then the others.",
+    )
+    parser.add_argument(
+        "--stride",
+        type=int,
+        default=10,
+        metavar="N",
+        help="interval between the frames rendered first by '--frame-order stride'.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip existing frames, unless the nodes upstream or the files they read "
+        "changed since the frames were rendered.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="only render the frames not recorded as finished by previous renders.",
+    )
+    parser.add_argument(
+        "--scratch",
+        nargs="?",
+        const="",
+        metavar="DIRECTORY",
+        help="render in a new directory inside the given local directory and copy the "
+        "frames to their path in background. Default to $LOCALORENDER_SCRATCH or "
+        "the system temporary directory. Not supported with --proxy.",
+    )
+    parser.add_argument(
+        "--read-cache",
+        nargs="?",
+        const="",
+        metavar="DIRECTORY",
+        help="copy the files read upstream to a local cache before rendering and "
+        "read them from there. Default to $LOCALORENDER_READ_CACHE or the system "
+        "temporary directory.",
+    )
+    parser.add_argument(
+        "--read-cache-size",
+        type=float,
+        metavar="GB",
+        help="size limit of the read cache, the least recently used files are "
+        "removed above it. Default to $LOCALORENDER_READ_CACHE_SIZE or 50.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        metavar="N",
+        help="render again the frames that failed, up to N times.",
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=5.0,
+        metavar="SECONDS",
+        help="delay before the first retry, doubled on each following retry.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="read the header of the frames to find the truncated or corrupt ones: "
+        "existing corrupt frames are not skipped, and rendered frames found corrupt "
+        "are reported as failed (and retried with --retries).",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="MINUTES",
+        help="warn before rendering when the render or writing its frames is "
+        "expected to take longer.",
+    )
+    parser.add_argument("--proxy", action="store_true", help="render in proxy mode.")
+    parser.add_argument(
+        "--continue-on-error",
+        action="store_true",
+        help="keep rendering the other frames when one fails.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only print the paths that would be rendered.",
+    )
+    parser.add_argument(
+        "--nuke",
+        default=os.environ.get(NUKE_EXE_ENV),
+        help="nuke executable to use when not already running in nuke. "
+        "Default to the {} environment variable.".format(NUKE_EXE_ENV),
+    )
+    parser.add_argument("--verbose", action="store_true", help="show debug messages.")
+    parser.add_argument(
+        "--version", action="version", version="{} {}".format(APPNAME, __version__)
+    )
+    return parser
+
+
+def _configure_logging(level):
+    if LOGGER.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    formatter = logging.Formatter(
+        "%(levelname)-7s | %(asctime)s [%(name)s] %(message)s"
+    )
+    handler.setFormatter(formatter)
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
+
+
+def _run_in_nuke(nuke_exe, argv):
+    """
+    Execute the command again in a nuke python interpreter.
+
+    Returns:
+        int: exit code of the nuke process
+    """
+    if not nuke_exe:
+        LOGGER.error(
+            "nuke cannot be imported: run this command with 'nuke -t', or give the "
+            "nuke executable with --nuke or the {} environment variable."
+            "".format(NUKE_EXE_ENV)
+        )
+        return 2
+
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__main__.py")
+    command = [nuke_exe, "-t", main_path] + list(argv)
+    LOGGER.debug("executing {}".format(command))
+    return subprocess.call(command)
+
+
+def _create_write_behind(args):
+    """
+    Returns:
+        scratch.WriteBehindQueue or None: if the render happens in a scratch directory.
+    """
+    from . import scratch
+
+    if args.scratch is None:
+        return None
+    if args.proxy:
+        LOGGER.warning("rendering to a local scratch is not supported with proxy")
+        return None
+
+    scratch_root = os.path.abspath(args.scratch) if args.scratch else None
+    write_behind = scratch.WriteBehindQueue(scratch_root)
+    LOGGER.info("rendering to scratch directory '{}'".format(write_behind.scratch_dir))
+    return write_behind
+
+
+def _wait_for_transfers(write_behind, manifest_writer):
+    """
+    Wait for all the files rendered in the scratch directory to be copied.
+
+    Returns:
+        list[str]: errors that happened during the copies.
+    """
+    from . import render
+
+    errors = []
+    while True:
+        drained = write_behind.is_drained
+        transfer_results = write_behind.poll()
+        render.record_transfers(manifest_writer, transfer_results)
+        errors.extend(
+            "cannot copy '{}' from scratch: {}".format(result.path, result.error)
+            for result in transfer_results
+            if result.error is not None
+        )
+        if drained:
+            break
+        if write_behind.pending_count:
+            LOGGER.info(
+                "{} frames left to copy from scratch".format(write_behind.pending_count)
+            )
+        time.sleep(0.5)
+    write_behind.close()
+    return errors
+
+
+def _prefetch_reads(render_plan, rows, args):
+    """
+    Returns:
+        tuple[readcache.ReadCache or None, list[nuke.Node]]:
+            the read cache if enabled, and the nodes whose files are all cached.
+    """
+    from . import readcache
+
+    if args.read_cache is None:
+        return None, []
+
+    max_size = None
+    if args.read_cache_size is not None:
+        max_size = int(args.read_cache_size * 1024**3)
+    read_cache = readcache.ReadCache(
+        os.path.abspath(args.read_cache) if args.read_cache else None, max_size
+    )
+    result = readcache.prefetch_render_reads(
+        read_cache, render_plan, rows, use_proxy=args.proxy
+    )
+    return read_cache, result.cached_nodes
+
+
+def _log_prediction(render_history, script_path, render_plan, rows, args):
+    """
+    Log how long the render should take, from the previous renders of the script.
+
+    Returns:
+        float or None: the predicted duration in seconds, if any.
+    """
+    from . import history
+    from . import render
+    from . import stats
+
+    try:
+        prediction = render_history.predict(
+            script_path,
+            render.get_frame_counts(render_plan, rows),
+            use_proxy=args.proxy,
+            workers=args.workers,
+        )
+    except history.HistoryError as error:
+        LOGGER.warning(str(error))
+        return None
+    if prediction is None:
+        return None
+    LOGGER.info(
+        "estimated render time from previous renders: {}".format(
+            stats.format_duration(prediction.duration)
+        )
+    )
+    return prediction.duration
+
+
+def _forecast_output(
+    render_history, script_path, render_plan, rows, scan_cache, args, render_time
+):
+    """
+    Log the disk space and write time the render needs, with a warning for each
+    output volume that cannot hold or keep up with the frames.
+
+    Returns:
+        forecast.OutputForecast:
+    """
+    from . import forecast
+    from . import history
+    from . import render
+
+    known_sizes = {}
+    try:
+        node_stats = render_history.get_node_stats(
+            script_path,
+            use_proxy=args.proxy,
+            nodes=list(render.get_frame_counts(render_plan, rows)),
+        )
+    except history.HistoryError as error:
+        LOGGER.warning(str(error))
+    else:
+        known_sizes = {node: stat.mean_size for node, stat in node_stats.items()}
+
+    output_forecast = forecast.OutputForecast(
+        render_plan,
+        rows,
+        scan_cache.get_cached_entries,
+        known_sizes,
+        render_time=render_time,
+        budget=args.time_budget * 60 if args.time_budget else None,
+    )
+    _log_forecast(output_forecast)
+    return output_forecast
+
+
+def _log_forecast(output_forecast):
+    volumes = output_forecast.get_volumes()
+    LOGGER.info(output_forecast.get_summary(volumes))
+    for warning in output_forecast.get_warnings(volumes):
+        LOGGER.warning(warning)
+
+
+def _update_forecast(output_forecast, render_plan, node, frame, view):
+    """
+    Forecast again when the first frame of a node whose frame size was unknown
+    is written.
+    """
+    if node in output_forecast.frame_sizes:
+        return
+    row = render_plan.find_written_row(node, frame, view)
+    if row is None:
+        return
+    if output_forecast.add_rendered_frame(node, render_plan.get_path(row)):
+        _log_forecast(output_forecast)
+
+
+def _record_history(render_history, script_path, render_stats, sizes, args):
+    """
+    Add the render to the history, and warn about the nodes that became slower
+    than in the previous renders.
+    """
+    from . import history
+    from . import stats
+
+    node_names = set(timing.node for timing in render_stats.timings)
+    try:
+        render_history.record_session(
+            script_path,
+            render_stats.timings,
+            use_proxy=args.proxy,
+            workers=args.workers,
+            sizes=sizes,
+            start=render_stats.start_time,
+            end=render_stats.end_time,
+        )
+        regressions = render_history.get_regressions(
+            script_path, use_proxy=args.proxy, nodes=node_names
+        )
+    except history.HistoryError as error:
+        LOGGER.warning(str(error))
+        return
+    for regression in regressions:
+        LOGGER.warning(
+            "node '{}' rendered {:.1f}x slower than usual: {} per frame instead of {}"
+            "".format(
+                regression.node,
+                regression.ratio,
+                stats.format_duration(regression.mean_time),
+                stats.format_duration(regression.baseline_time),
+            )
+        )
+
+
+def _render_in_workers(
+    render_plan,
+    rows,
+    script_path,
+    args,
+    render_stats,
+    manifest_writer,
+    write_behind,
+    output_forecast,
+    copy_script=False,
+):
+    """
+    Args:
+        copy_script(bool): True if knobs were modified since the script was opened.
+
+    Returns:
+        list[str]: errors that happened during the render.
+    """
+    from . import engine
+    from . import render
+    from . import stats
+
+    root_name = None
+    tmpdir = None
+    if write_behind or copy_script:
+        # workers must render a copy of the script with the modified paths
+        tmpdir = tempfile.mkdtemp(prefix="nuke-{}-".format(APPNAME))
+        root_name = script_path
+        script_path = os.path.join(tmpdir, "script.nk")
+        original_paths = {}
+        if write_behind:
+            original_paths = render.redirect_to_scratch(render_plan, rows, write_behind)
+        try:
+            render.save_script_copy(script_path)
+        finally:
+            render.restore_file_knobs(original_paths)
+
+    units = render.build_render_units(
+        render_plan, rows, frame_order=args.frame_order, stride=args.stride
+    )
+    pool = render.create_render_pool(
+        script_path,
+        max_workers=args.workers,
+        root_name=root_name,
+        use_proxy=args.proxy,
+        continue_on_error=args.continue_on_error,
+        autoscale_workers=args.autoscale,
+        hang_timeout_factor=args.hang_timeout,
+    )
+    pool.submit(units)
+    LOGGER.info(
+        "rendering {} frames with {}{} workers".format(
+            len(units), "up to " if args.autoscale else "", args.workers
+        )
+    )
+    errors = []
+    render.record_planned(manifest_writer, render_plan, rows)
+
+    def _on_event(event):
+        render.record_render_event(manifest_writer, render_plan, event, write_behind)
+        if event.kind == engine.EVENT_FRAME_RENDERED:
+            item = event.item
+            _update_forecast(
+                output_forecast, render_plan, item.node, item.frame, item.view
+            )
+            render_stats.add_timing(
+                stats.FrameTiming(
+                    item.node,
+                    item.frame,
+                    item.view,
+                    event.start or event.time,
+                    event.time,
+                )
+            )
+        elif event.kind == engine.EVENT_FINISHED:
+            LOGGER.info(render_stats.get_progress_text())
+        elif event.kind == engine.EVENT_HUNG:
+            LOGGER.warning(render.get_event_error(event))
+        elif event.kind == engine.EVENT_FAILED:
+            errors.append(render.get_event_error(event))
+            LOGGER.error(errors[-1])
+
+    try:
+        pool.wait(callback=_on_event)
+    except KeyboardInterrupt:
+        LOGGER.warning("cancelling render")
+        pool.cancel()
+        errors.append(_CANCELLED_ERROR)
+    finally:
+        if tmpdir:
+            render.rmtree(tmpdir)
+    return errors
+
+
+def _render_in_session(
+    render_plan,
+    rows,
+    args,
+    render_stats,
+    manifest_writer,
+    write_behind,
+    output_forecast,
+):
+    """
+    Returns:
+        list[str]: errors that happened during the render.
+    """
+    import nuke
+
+    from . import render
+
+    def _before_frame():
+        node = nuke.thisNode().fullName()
+        render_stats.frame_started(node, nuke.frame(), nuke.thisView())
+
+    def _after_frame():
+        node = nuke.thisNode().fullName()
+        render_stats.frame_finished(node, nuke.frame(), nuke.thisView())
+        LOGGER.info(render_stats.get_progress_text())
+        _update_forecast(
+            output_forecast, render_plan, node, nuke.frame(), nuke.thisView()
+        )
+
+    return render.render_in_session(
+        render_plan,
+        rows,
+        use_proxy=args.proxy,
+        continue_on_error=args.continue_on_error,
+        before_frame=_before_frame,
+        after_frame=_after_frame,
+        manifest_writer=manifest_writer,
+        write_behind=write_behind,
+        frame_order=args.frame_order,
+        stride=args.stride,
+    )
+
+
+def run(args):
+    """
+    Render the script as specified by the command line arguments. Must be run in nuke.
+
+    Args:
+        args(argparse.Namespace): as parsed by :func:`build_parser`
+
+    Returns:
+        int: exit code
+    """
+    import nuke
+
+    from . import autoscale
+    from . import fingerprint
+    from . import history
+    from . import manifest
+    from . import render
+    from . import scanning
+    from . import stats
+
+    if args.autoscale and args.workers <= 0:
+        args.workers = autoscale.get_cpu_count()
+
+    script_path = os.path.abspath(args.script)
+    LOGGER.info("opening '{}'".format(script_path))
+    nuke.scriptOpen(script_path)
+
+    try:
+        frames = render.parse_frames(args.frames or str(nuke.root().frameRange()))
+        node_names = args.nodes.split(",") if args.nodes else None
+        write_nodes = render.get_write_nodes(node_names)
+    except ValueError as error:
+        LOGGER.error(str(error))
+        return 2
+    views = args.views.split(",") if args.views else nuke.views()
+
+    render_plan = render.build_plan(write_nodes, frames, views)
+    skip_existing = args.skip_existing or args.incremental
+    scan_cache = scanning.DirectoryScanCache()
+    if skip_existing and not args.resume:
+        scan_cache.scan(render_plan.directories)
+        render_plan.update_statuses(scan_cache.get_cached_entries)
+        if args.verify:
+            render.verify_existing_rows(render_plan)
+
+    fingerprints = {}
+    stale_rows = None
+    if args.incremental:
+        fingerprints = fingerprint.get_fingerprints(
+            render_plan, range(len(render_plan)), scan_cache, use_proxy=args.proxy
+        )
+        if not args.resume:
+            stale_rows = fingerprint.get_stale_rows(render_plan, fingerprints)
+    rows = render.get_rows_to_render(
+        render_plan, skip_existing, args.resume, stale_rows=stale_rows
+    )
+    LOGGER.info(
+        "{} paths to render for {} nodes".format(len(rows), len(render_plan.nodes))
+    )
+
+    if args.dry_run:
+        for row in rows:
+            print(render_plan.get_path(row))
+        return 0
+
+    if not rows:
+        LOGGER.info("nothing to render")
+        return 0
+
+    render_history = history.RenderHistory()
+    render_time = _log_prediction(render_history, script_path, render_plan, rows, args)
+    if not skip_existing or args.resume:
+        # find the frames already on disk, to estimate the size of the others
+        scan_cache.scan(render_plan.directories)
+        render_plan.update_statuses(scan_cache.get_cached_entries)
+    output_forecast = _forecast_output(
+        render_history, script_path, render_plan, rows, scan_cache, args, render_time
+    )
+    read_cache, cached_reads = _prefetch_reads(render_plan, rows, args)
+    render_stats = stats.RenderStats(total=len(rows))
+    render_stats.start()
+    manifest_writer = manifest.ManifestWriter()
+    original_reads = read_cache.redirect(cached_reads) if read_cache else {}
+    try:
+        attempt_rows = rows
+        attempt = 0
+        while True:
+            write_behind = _create_write_behind(args)
+            if args.workers > 0:
+                errors = _render_in_workers(
+                    render_plan,
+                    attempt_rows,
+                    script_path,
+                    args,
+                    render_stats,
+                    manifest_writer,
+                    write_behind,
+                    output_forecast,
+                    copy_script=bool(original_reads),
+                )
+            else:
+                errors = _render_in_session(
+                    render_plan,
+                    attempt_rows,
+                    args,
+                    render_stats,
+                    manifest_writer,
+                    write_behind,
+                    output_forecast,
+                )
+            if write_behind:
+                errors += _wait_for_transfers(write_behind, manifest_writer)
+            if args.verify and _CANCELLED_ERROR not in errors:
+                render.verify_finished_rows(manifest_writer, render_plan, attempt_rows)
+
+            failed_items = render.get_failed_items(
+                manifest_writer, render_plan, attempt_rows
+            )
+            if (
+                not failed_items
+                or attempt >= args.retries
+                or _CANCELLED_ERROR in errors
+            ):
+                break
+            attempt += 1
+            delay = render.get_retry_delay(attempt, args.retry_backoff)
+            LOGGER.info(
+                "retrying {} failed frames in {:.1f}s (retry {}/{})"
+                "".format(len(failed_items), delay, attempt, args.retries)
+            )
+            time.sleep(delay)
+            attempt_rows = render.get_item_rows(render_plan, failed_items)
+        render_stats.stop()
+    finally:
+        render.restore_file_knobs(original_reads)
+        manifest_writer.close()
+
+    if fingerprints:
+        rendered_rows = render.get_finished_rows(manifest_writer, render_plan, rows)
+        fingerprint.store_fingerprints(
+            render_plan, {row: fingerprints[row] for row in rendered_rows}
+        )
+    LOGGER.info(render_stats.get_progress_text())
+
+    if render_stats.timings:
+        _record_history(
+            render_history,
+            script_path,
+            render_stats,
+            render.get_rendered_sizes(manifest_writer, render_plan, rows),
+            args,
+        )
+        json_path, csv_path = stats.get_report_paths(script_path)
+        try:
+            render_stats.write_json(json_path)
+            render_stats.write_csv(csv_path)
+        except OSError as error:
+            LOGGER.warning("cannot write render report: {}".format(error))
+        else:
+            LOGGER.info("render report written to '{}'".format(json_path))
+
+    for (node_name, frame, view), error in sorted(failed_items.items()):
+        LOGGER.error(
+            "'{}' failed to render frame {} view {}: {}".format(
+                node_name, frame, view, error
+            )
+        )
+    for error in errors:
+        LOGGER.error(error)
+    return 1 if errors or failed_items else 0
+
+
+def main(argv=None):
+    """
+    Returns:
+        int: exit code
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    _configure_logging(logging.DEBUG if args.verbose else logging.INFO)
+
+    try:
+        import nuke
+    except ImportError:
+        return _run_in_nuke(args.nuke, argv)
+
+    return run(args)
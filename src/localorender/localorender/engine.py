@@ -0,0 +1,588 @@
+"""
+Render a nuke script in parallel using multiple background nuke processes.
+
+The frames to render are grouped into units (what nuke renders in one call) and
+units are split into chunks. Each chunk is rendered by a separate process started
+with the given command, to which the path of a json job file is appended.
+
+This module doesn't depend on nuke or Qt: the command can be any executable that
+follows the protocol implemented in :mod:`localorender.worker`.
+"""
+import collections
+import json
+import logging
+import math
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from . import worker
+
+LOGGER = logging.getLogger("LocaloRender.engine")
+
+EVENT_STARTED = worker.EVENT_STARTED
+EVENT_FINISHED = worker.EVENT_FINISHED
+EVENT_FAILED = worker.EVENT_FAILED
+EVENT_FRAME_RENDERED = worker.EVENT_FRAME_RENDERED
+EVENT_HUNG = "hung"
+"""
+A unit took too long according to the pool's watchdog: its process was killed and
+the unit is queued again, or followed by an ``EVENT_FAILED`` if it hung too often.
+"""
+
+RenderItem = collections.namedtuple("RenderItem", ["node", "frame", "view"])
+"""
+A single path that will be written to disk. ``node`` is the full name of the Write node.
+"""
+
+
+class RenderUnit(collections.namedtuple("RenderUnit", ["nodes", "frame", "views"])):
+    """
+    A single frame to render, for one or multiple nodes and views, in one nuke call.
+
+    Args:
+        nodes(tuple[str]): full name of the Write nodes
+        frame(int):
+        views(tuple[str]):
+    """
+
+    __slots__ = ()
+
+    def iter_items(self):
+        """
+        Returns:
+            collections.Iterable[RenderItem]:
+        """
+        for node in self.nodes:
+            for view in self.views:
+                yield RenderItem(node, self.frame, view)
+
+    def to_json(self):
+        return {
+            "nodes": list(self.nodes),
+            "frame": self.frame,
+            "views": list(self.views),
+        }
+
+
+RenderEvent = collections.namedtuple(
+    "RenderEvent",
+    ["kind", "unit", "worker", "time", "error", "item", "start", "peak_memory"],
+    defaults=(None, None, None),
+)
+"""
+Something that happened to a unit in a worker. ``kind`` is one of the ``EVENT_`` constants.
+
+For ``EVENT_FRAME_RENDERED`` events, ``item`` is the RenderItem that was written
+and ``start`` is when its rendering started, ``time`` being when it ended.
+``peak_memory`` is the peak resident memory of the worker process in bytes, if known.
+"""
+
+
+def build_units(items, coalesce=True):
+    """
+    Group the items rendering the same node and frame into a single unit.
+
+    Args:
+        items(collections.Iterable[RenderItem]):
+        coalesce(bool):
+            True to also group the nodes that render the exact same frames and views,
+            so nuke evaluates their shared upstream graph only once per frame.
+
+    Returns:
+        list[RenderUnit]: in the order of first appearance of each node/frame pair.
+    """
+    views_by_key = collections.OrderedDict()  # type: dict[tuple[str, int], list[str]]
+    for item in items:
+        views = views_by_key.setdefault((item.node, item.frame), [])
+        if item.view not in views:
+            views.append(item.view)
+
+    if not coalesce:
+        return [
+            RenderUnit((node,), frame, tuple(views))
+            for (node, frame), views in views_by_key.items()
+        ]
+
+    # group the nodes by what they must render
+    frames_by_node = (
+        collections.OrderedDict()
+    )  # type: dict[str, list[tuple[int, tuple[str]]]]
+    for (node, frame), views in views_by_key.items():
+        frames_by_node.setdefault(node, []).append((frame, tuple(views)))
+
+    nodes_by_signature = collections.OrderedDict()
+    for node, frames in frames_by_node.items():
+        signature = tuple(
+            sorted((frame, tuple(sorted(views))) for frame, views in frames)
+        )
+        nodes_by_signature.setdefault(signature, []).append(node)
+
+    units = []
+    for nodes in nodes_by_signature.values():
+        for frame, views in frames_by_node[nodes[0]]:
+            units.append(RenderUnit(tuple(nodes), frame, views))
+    return units
+
+
+def get_chunk_size(unit_count, max_workers):
+    """
+    Find a chunk size that keep all workers busy while limiting how many times a
+    nuke process has to be started.
+
+    Args:
+        unit_count(int):
+        max_workers(int):
+
+    Returns:
+        int:
+    """
+    return max(1, int(math.ceil(unit_count / float(max(1, max_workers) * 2))))
+
+
+def split_in_chunks(units, chunk_size):
+    """
+    Split the units in chunks of maximum ``chunk_size``, where each chunk only render
+    the same nodes, so a worker doesn't have to switch between unrelated parts of the script.
+
+    Args:
+        units(list[RenderUnit]):
+        chunk_size(int):
+
+    Returns:
+        list[list[RenderUnit]]:
+    """
+    units_by_nodes = {}  # type: dict[tuple[str], list[RenderUnit]]
+    for unit in units:
+        units_by_nodes.setdefault(unit.nodes, []).append(unit)
+
+    chunks = []
+    for node_units in units_by_nodes.values():
+        for index in range(0, len(node_units), chunk_size):
+            chunks.append(node_units[index : index + chunk_size])
+    return chunks
+
+
+class _WorkerProcess(object):
+    """
+    A running worker process with the chunk it is rendering.
+
+    Args:
+        identifier(int):
+        chunk(list[RenderUnit]):
+        job_path(str):
+        process(subprocess.Popen):
+        messages(queue.Queue): where to put the messages read from the process output
+    """
+
+    def __init__(self, identifier, chunk, job_path, process, messages):
+        self.identifier = identifier
+        self.chunk = chunk
+        self.job_path = job_path
+        self.process = process
+        self.output_closed = threading.Event()
+        # peak memory reported with the last rendered frame
+        self.peak_memory = None  # type: int | None
+        # index of the unit being rendered and when it started
+        self.current_unit = None  # type: int | None
+        self.unit_start = None  # type: float | None
+        # index of units that reported a final status
+        self.done_units = set()  # type: set[int]
+
+        self._messages = messages
+        self._reader = threading.Thread(
+            target=self._read_output,
+            name="localorender-worker-{}".format(identifier),
+        )
+        self._reader.daemon = True
+        self._reader.start()
+
+    def __repr__(self):
+        return "<{} {} pid={}>".format(
+            self.__class__.__name__, self.identifier, self.process.pid
+        )
+
+    @property
+    def is_finished(self):
+        return self.output_closed.is_set() and self.process.poll() is not None
+
+    def _read_output(self):
+        try:
+            for line in self.process.stdout:
+                message = worker.decode_message(line)
+                if message is None:
+                    LOGGER.debug(
+                        "[worker-{}] {}".format(self.identifier, line.rstrip())
+                    )
+                    continue
+                self._messages.put((self, message))
+        finally:
+            self.process.stdout.close()
+            self.output_closed.set()
+
+
+class RenderPool(object):
+    """
+    Render chunks of units in a pool of background processes.
+
+    The pool doesn't block: :meth:`poll` must be called regularly to start new
+    processes and collect what happened since the last call.
+
+    Args:
+        command(list[str]): arguments to start a worker, to which the job file path is appended.
+        job_options(dict or None): additional data written in every job file.
+        max_workers(int): maximum number of processes running at the same time.
+        env(dict or None): environment for the processes, default to the current one.
+        autoscaler(autoscale.WorkerAutoscaler or None):
+            adjusts the number of processes during the render from the memory they
+            report, without exceeding ``max_workers``.
+        threads_option(str or None): option of the command, inserted after the
+            executable, that sets the number of threads chosen by the autoscaler.
+        watchdog(watchdog.FrameWatchdog or None): kills the processes rendering a
+            unit for too long, and queues their units again.
+    """
+
+    def __init__(
+        self,
+        command,
+        job_options=None,
+        max_workers=1,
+        env=None,
+        autoscaler=None,
+        threads_option=None,
+        watchdog=None,
+    ):
+        self.command = list(command)
+        self.job_options = dict(job_options or {})
+        self.max_workers = max(1, max_workers)
+        self.autoscaler = autoscaler
+        self.threads_option = threads_option
+        self.watchdog = watchdog
+        self._env = env
+
+        self._pending = collections.deque()  # type: collections.deque[list[RenderUnit]]
+        self._running = []  # type: list[_WorkerProcess]
+        self._messages = queue.Queue()
+        self._jobdir = None  # type: str | None
+        self._worker_count = 0
+
+    @property
+    def is_done(self):
+        return not self._pending and not self._running
+
+    @property
+    def running_count(self):
+        return len(self._running)
+
+    @property
+    def worker_limit(self):
+        """
+        Number of processes that can currently run at the same time.
+        """
+        if self.autoscaler is None:
+            return self.max_workers
+        return min(self.max_workers, self.autoscaler.workers)
+
+    @property
+    def pending_count(self):
+        """
+        Number of units not yet assigned to a process.
+        """
+        return sum(len(chunk) for chunk in self._pending)
+
+    def submit(self, units, chunk_size=None):
+        """
+        Queue the given units for rendering.
+
+        Args:
+            units(list[RenderUnit]):
+            chunk_size(int or None): number of units per process, guessed if None.
+        """
+        units = list(units)
+        if not units:
+            return
+        if chunk_size is None:
+            chunk_size = get_chunk_size(len(units), self.max_workers)
+        chunks = split_in_chunks(units, chunk_size)
+        LOGGER.debug(
+            "queued {} units in {} chunks of max {}"
+            "".format(len(units), len(chunks), chunk_size)
+        )
+        self._pending.extend(chunks)
+
+    def start(self):
+        """
+        Start as many processes as allowed for the queued units.
+        """
+        self._fill_slots()
+
+    def poll(self):
+        """
+        Collect what happened in the workers and start new ones if there is free slots.
+
+        Returns:
+            list[RenderEvent]: events since the last call, in the order they were received.
+        """
+        # must be checked before reading messages so we are sure to have received all
+        # the messages of a worker before finalizing it.
+        finished = [process for process in self._running if process.is_finished]
+
+        events = self._read_messages()
+
+        for process in finished:
+            events.extend(self._finalize(process))
+
+        if self.watchdog is not None:
+            events.extend(self._kill_hung_processes())
+        if self.autoscaler is not None:
+            self._autoscale(events)
+        self._fill_slots()
+        if self.is_done:
+            self._cleanup()
+        return events
+
+    def wait(self, callback=None, interval=0.2):
+        """
+        Block until all the queued units are rendered.
+
+        Args:
+            callback(callable or None): called with each RenderEvent as they arrive.
+            interval(float): time in seconds between each poll.
+
+        Returns:
+            list[RenderEvent]: all the events received.
+        """
+        all_events = []
+        self.start()
+        while not self.is_done:
+            events = self.poll()
+            all_events.extend(events)
+            if callback:
+                for event in events:
+                    callback(event)
+            if not self.is_done:
+                time.sleep(interval)
+        return all_events
+
+    def cancel(self):
+        """
+        Stop all the running processes and forget the queued units.
+        """
+        self._pending.clear()
+        for process in self._running:
+            LOGGER.debug("killing {}".format(process))
+            process.process.kill()
+        for process in self._running:
+            process.process.wait()
+            process.output_closed.wait()
+        self._running = []
+        self._cleanup()
+
+    def _read_messages(self):
+        events = []
+        while True:
+            try:
+                process, message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+
+            index = message.get("unit")
+            kind = message.get("event")
+            if kind not in (
+                EVENT_STARTED,
+                EVENT_FINISHED,
+                EVENT_FAILED,
+                EVENT_FRAME_RENDERED,
+            ):
+                LOGGER.debug("ignoring unsupported message {}".format(message))
+                continue
+            if not isinstance(index, int) or not 0 <= index < len(process.chunk):
+                LOGGER.warning("ignoring message with invalid unit {}".format(message))
+                continue
+
+            if kind == EVENT_FRAME_RENDERED:
+                peak_memory = message.get("peak_memory")
+                if peak_memory:
+                    process.peak_memory = peak_memory
+                events.append(
+                    RenderEvent(
+                        kind=kind,
+                        unit=process.chunk[index],
+                        worker=process.identifier,
+                        time=message.get("time", time.time()),
+                        error=None,
+                        item=RenderItem(
+                            message.get("node"),
+                            message.get("frame"),
+                            message.get("view"),
+                        ),
+                        start=message.get("start"),
+                        peak_memory=peak_memory,
+                    )
+                )
+                continue
+
+            if kind == EVENT_STARTED:
+                process.current_unit = index
+                process.unit_start = message.get("time", time.time())
+            else:
+                process.done_units.add(index)
+                if process.current_unit == index:
+                    if self.watchdog is not None and kind == EVENT_FINISHED:
+                        self.watchdog.add_duration(
+                            message.get("time", time.time()) - process.unit_start
+                        )
+                    process.current_unit = None
+            events.append(
+                RenderEvent(
+                    kind=kind,
+                    unit=process.chunk[index],
+                    worker=process.identifier,
+                    time=message.get("time", time.time()),
+                    error=message.get("error"),
+                )
+            )
+        return events
+
+    def _finalize(self, process):
+        """
+        Remove the given finished process from the pool.
+
+        Returns:
+            list[RenderEvent]: failed events for units the process never reported.
+        """
+        self._running.remove(process)
+        returncode = process.process.returncode
+        LOGGER.debug("{} exited with code {}".format(process, returncode))
+        events = []
+        for index, unit in enumerate(process.chunk):
+            if index in process.done_units:
+                continue
+            error = "worker exited with code {} before rendering the frame".format(
+                returncode
+            )
+            events.append(
+                RenderEvent(EVENT_FAILED, unit, process.identifier, time.time(), error)
+            )
+        try:
+            os.remove(process.job_path)
+        except OSError:
+            pass
+        return events
+
+    def _kill_hung_processes(self):
+        """
+        Kill the processes rendering a unit for longer than the watchdog allows.
+
+        Returns:
+            list[RenderEvent]: a hung event for each unit, and a failed event if
+                it hung too many times to be queued again.
+        """
+        now = time.time()
+        hung = [
+            process
+            for process in self._running
+            if process.current_unit is not None
+            and self.watchdog.is_hung(now - process.unit_start)
+        ]
+        events = []
+        for process in hung:
+            index = process.current_unit
+            unit = process.chunk[index]
+            elapsed = now - process.unit_start
+            error = "frame hung for {:.0f}s (timeout {:.0f}s)".format(
+                elapsed, self.watchdog.timeout
+            )
+            LOGGER.warning(
+                "killing {}: {} {}".format(process, ",".join(unit.nodes), error)
+            )
+            process.process.kill()
+            process.process.wait()
+            process.output_closed.wait()
+            self._running.remove(process)
+            # the messages sent right before being killed
+            events.extend(self._read_messages())
+            if index not in process.done_units:
+                events.append(
+                    RenderEvent(EVENT_HUNG, unit, process.identifier, now, error)
+                )
+                process.done_units.add(index)
+                if self.watchdog.add_hang(unit):
+                    self._pending.appendleft([unit])
+                else:
+                    events.append(
+                        RenderEvent(EVENT_FAILED, unit, process.identifier, now, error)
+                    )
+            self._requeue_remaining(process)
+        return events
+
+    def _requeue_remaining(self, process):
+        """
+        Queue again the units a killed process didn't render, in front of the others.
+        """
+        remaining = [
+            unit
+            for index, unit in enumerate(process.chunk)
+            if index not in process.done_units
+        ]
+        if remaining:
+            LOGGER.debug(
+                "queuing again {} units of killed {}".format(len(remaining), process)
+            )
+            self._pending.appendleft(remaining)
+        try:
+            os.remove(process.job_path)
+        except OSError:
+            pass
+
+    def _autoscale(self, events):
+        for event in events:
+            if event.kind == EVENT_FRAME_RENDERED:
+                self.autoscaler.add_measure(event.item.node, event.peak_memory)
+        starting = sum(1 for process in self._running if process.peak_memory is None)
+        self.autoscaler.update(len(self._running), starting=starting)
+
+    def _fill_slots(self):
+        while self._pending and len(self._running) < self.worker_limit:
+            self._start_process(self._pending.popleft())
+
+    def _start_process(self, chunk):
+        if self._jobdir is None:
+            self._jobdir = tempfile.mkdtemp(prefix="localorender-jobs-")
+
+        self._worker_count += 1
+        identifier = self._worker_count
+        job_path = os.path.join(self._jobdir, "job-{}.json".format(identifier))
+        job = dict(self.job_options)
+        job["units"] = [unit.to_json() for unit in chunk]
+        with open(job_path, "w") as job_file:
+            json.dump(job, job_file)
+
+        command = self.command + [job_path]
+        if self.autoscaler is not None and self.threads_option:
+            command[1:1] = [self.threads_option, str(self.autoscaler.threads)]
+        LOGGER.debug("starting worker {}: {}".format(identifier, command))
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            errors="replace",
+            bufsize=1,
+            env=self._env,
+            # avoid a console window popping for each worker on Windows
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self._running.append(
+            _WorkerProcess(identifier, chunk, job_path, process, self._messages)
+        )
+
+    def _cleanup(self):
+        if self._jobdir and os.path.exists(self._jobdir):
+            shutil.rmtree(self._jobdir, ignore_errors=True)
+        self._jobdir = None
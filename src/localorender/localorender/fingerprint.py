@@ -0,0 +1,271 @@
+"""
+Fingerprints of what a Write node renders for each frame, to only render again
+the frames whose inputs changed since they were written.
+
+The fingerprint of a frame combines:
+
+- the values of the knobs of all the nodes upstream of the Write node (knobs that
+  only affect the node graph display, like the position, are ignored).
+- the modification time of the files read by the upstream Read nodes at that frame.
+
+Fingerprints of rendered files are stored in a json sidecar in their directory.
+
+This is a heuristic: anything not stored in knobs (like a python callback or an
+environment variable used in an expression) is not detected.
+"""
+import hashlib
+import json
+import logging
+import os
+
+import nuke
+
+from . import template
+
+LOGGER = logging.getLogger("LocaloRender.fingerprint")
+
+SIDECAR_FILENAME = ".localorender-fingerprints.json"
+
+IGNORED_KNOBS = frozenset(
+    [
+        "xpos",
+        "ypos",
+        "selected",
+        "label",
+        "note_font",
+        "note_font_size",
+        "note_font_color",
+        "tile_color",
+        "gl_color",
+        "hide_input",
+        "postage_stamp",
+        "postage_stamp_frame",
+        "bookmark",
+        "indicators",
+        "icon",
+        "cached",
+        "dope_sheet",
+        "help",
+        "onCreate",
+        "onDestroy",
+        "knobChanged",
+        "updateUI",
+        "autolabel",
+    ]
+)
+"""
+Knobs that don't affect the rendered image.
+"""
+
+ROOT_KNOBS = (
+    "format",
+    "proxy_type",
+    "proxy_scale",
+    "proxy_format",
+    "colorManagement",
+    "OCIO_config",
+    "workingSpaceLUT",
+)
+"""
+Knobs of the Root node affecting how all nodes render.
+"""
+
+
+def get_sidecar_path(directory):
+    return os.path.join(directory, SIDECAR_FILENAME)
+
+
+def read_sidecar(directory):
+    """
+    Args:
+        directory(str): output directory of rendered files
+
+    Returns:
+        dict[str, str]: fingerprint of each rendered file name.
+    """
+    try:
+        with open(get_sidecar_path(directory), "r") as sidecar_file:
+            fingerprints = json.load(sidecar_file)
+    except (OSError, ValueError):
+        return {}
+    return fingerprints if isinstance(fingerprints, dict) else {}
+
+
+def write_sidecar(directory, fingerprints):
+    """
+    Update the sidecar of the given directory with new fingerprints.
+
+    Args:
+        directory(str): output directory of rendered files
+        fingerprints(dict[str, str]): fingerprint of each rendered file name.
+    """
+    content = read_sidecar(directory)
+    content.update(fingerprints)
+    path = get_sidecar_path(directory)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w") as sidecar_file:
+            json.dump(content, sidecar_file, indent=0, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError as error:
+        LOGGER.warning("cannot write fingerprints to '{}': {}".format(path, error))
+
+
+def iter_upstream_nodes(node):
+    """
+    Iterate through the given node and all the nodes it depends on, including
+    the content of groups.
+
+    Args:
+        node(nuke.Node):
+
+    Returns:
+        collections.Iterable[nuke.Node]:
+    """
+    dependency_flags = nuke.INPUTS | nuke.HIDDEN_INPUTS | nuke.EXPRESSIONS
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        name = node.fullName()
+        if name in seen:
+            continue
+        seen.add(name)
+        yield node
+        stack.extend(node.dependencies(dependency_flags))
+        if isinstance(node, nuke.Group):
+            stack.extend(node.nodes())
+
+
+def _hash_knobs(hasher, node, knob_names=None):
+    knobs = node.knobs()
+    for knob_name in sorted(knobs if knob_names is None else knob_names):
+        if knob_name in IGNORED_KNOBS or knob_name not in knobs:
+            continue
+        try:
+            value = knobs[knob_name].toScript()
+        except Exception:
+            continue
+        hasher.update("{}={}\n".format(knob_name, value).encode("utf-8"))
+
+
+def get_node_fingerprint(write_node, use_proxy=False):
+    """
+    Args:
+        write_node(nuke.Node):
+        use_proxy(bool): if the render will happen in proxy mode.
+
+    Returns:
+        tuple[str, list[template.PathTemplate]]:
+            hash of the knobs upstream of the node, and templates of the files read upstream.
+    """
+    hasher = hashlib.sha1()
+    hasher.update("proxy={}\n".format(use_proxy).encode("utf-8"))
+    _hash_knobs(hasher, nuke.root(), ROOT_KNOBS)
+
+    read_templates = []
+    nodes = sorted(iter_upstream_nodes(write_node), key=lambda node: node.fullName())
+    for node in nodes:
+        hasher.update("[{} {}]\n".format(node.Class(), node.fullName()).encode("utf-8"))
+        _hash_knobs(hasher, node)
+        if node is write_node or node.Class() == "Write" or not node.knob("file"):
+            continue
+        read_path = nuke.filename(node)
+        if read_path:
+            read_templates.append(template.PathTemplate(read_path))
+
+    return hasher.hexdigest(), read_templates
+
+
+def get_node_fingerprints(render_plan, rows, use_proxy=False):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(collections.Iterable[int]):
+        use_proxy(bool): if the render will happen in proxy mode.
+
+    Returns:
+        dict[int, tuple[str, list[template.PathTemplate]]]:
+            :func:`get_node_fingerprint` of each node id of the given rows.
+    """
+    node_ids = set(render_plan.get_node_id(row) for row in rows)
+    return {
+        node_id: get_node_fingerprint(render_plan.nodes[node_id], use_proxy)
+        for node_id in node_ids
+    }
+
+
+def get_fingerprints(
+    render_plan, rows, scan_cache, use_proxy=False, node_fingerprints=None
+):
+    """
+    Compute the fingerprint of the given rows of a plan.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]):
+        scan_cache(scanning.DirectoryScanCache): used to get the read files mtime
+        use_proxy(bool): if the render will happen in proxy mode.
+        node_fingerprints(dict or None): result of :func:`get_node_fingerprints`
+            for these rows. When given nuke is not used, so this can be called
+            outside the main thread.
+
+    Returns:
+        dict[int, str]: fingerprint of each row
+    """
+    if node_fingerprints is None:
+        node_fingerprints = get_node_fingerprints(render_plan, rows, use_proxy)
+    fingerprints = {}
+    for row in rows:
+        node_hash, read_templates = node_fingerprints[render_plan.get_node_id(row)]
+        frame = render_plan.get_frame(row)
+        view = render_plan.get_view(row)
+        hasher = hashlib.sha1(node_hash.encode("utf-8"))
+        for read_template in read_templates:
+            stat = scan_cache.get_stat(read_template.format(frame, view))
+            mtime = None if stat is None else stat.st_mtime
+            hasher.update("{}\n".format(mtime).encode("utf-8"))
+        fingerprints[row] = hasher.hexdigest()
+
+    return fingerprints
+
+
+def get_stale_rows(render_plan, fingerprints):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        fingerprints(dict[int, str]): current fingerprint of rows
+
+    Returns:
+        set[int]: rows whose stored fingerprint doesn't match the current one.
+    """
+    sidecars = {}  # type: dict[int, dict[str, str]]
+    stale = set()
+    for row, fingerprint in fingerprints.items():
+        directory_id = render_plan.get_directory_id(row)
+        sidecar = sidecars.get(directory_id)
+        if sidecar is None:
+            sidecar = sidecars[directory_id] = read_sidecar(
+                render_plan.directories[directory_id]
+            )
+        if sidecar.get(render_plan.get_filename(row)) != fingerprint:
+            stale.add(row)
+    return stale
+
+
+def store_fingerprints(render_plan, fingerprints):
+    """
+    Save the fingerprints of rendered rows in the sidecar of their directory.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        fingerprints(dict[int, str]): fingerprint of rows that were rendered.
+    """
+    by_directory = {}  # type: dict[str, dict[str, str]]
+    for row, fingerprint in fingerprints.items():
+        directory = render_plan.get_directory(row)
+        by_directory.setdefault(directory, {})[
+            render_plan.get_filename(row)
+        ] = fingerprint
+    for directory, directory_fingerprints in by_directory.items():
+        write_sidecar(directory, directory_fingerprints)
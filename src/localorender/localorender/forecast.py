@@ -0,0 +1,402 @@
+"""
+Forecast the disk space and write time a render needs, before launching it.
+
+The size of the frames of each Write node is estimated from its frames already on
+disk, from the previous renders recorded in the history, or from its first
+rendered frame. Output directories are grouped by volume to compare their total
+with the free space, and a short write probe measures how fast each volume is.
+
+This module doesn't depend on nuke or Qt.
+"""
+import collections
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from . import plan
+from . import stats
+
+LOGGER = logging.getLogger("LocaloRender.forecast")
+
+MAX_SIZE_SAMPLES = 32
+"""
+Maximum number of existing frames looked at to estimate the frame size of a node.
+"""
+
+DEFAULT_PROBE_SIZE = 16 * 1024**2
+"""
+Maximum number of bytes written to a probe file to measure the write throughput
+of a volume.
+"""
+
+DEFAULT_PROBE_DURATION = 1.0
+"""
+Maximum time in seconds spent writing a probe file, on slow volumes.
+"""
+
+PROBE_MAX_AGE = 600.0
+"""
+Seconds during which the throughput measured on a volume is reused.
+"""
+
+_PROBE_CHUNK_SIZE = 1024**2
+
+VolumeForecast = collections.namedtuple(
+    "VolumeForecast", ["directory", "size", "free", "throughput"]
+)
+"""
+What will be written on a volume: ``directory`` is one of its output directories
+existing on disk, ``size`` the bytes to write, ``free`` the bytes available and
+``throughput`` the write speed in bytes per second. Unknown values are None.
+"""
+
+_throughputs = {}  # type: dict[int, tuple[float, float | None]]
+_throughputs_lock = threading.Lock()
+
+
+def format_size(size):
+    """
+    Args:
+        size(float): in bytes
+
+    Returns:
+        str: like "12.3 GB"
+    """
+    if size < 1024**2:
+        return "{:.0f} KB".format(size / 1024.0)
+    if size < 1024**3:
+        return "{:.1f} MB".format(size / 1024.0**2)
+    return "{:.1f} GB".format(size / 1024.0**3)
+
+
+def get_existing_parent(path):
+    """
+    Args:
+        path(str): absolute path that may not exist
+
+    Returns:
+        str or None: the path or its nearest existing parent.
+    """
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+def probe_write_throughput(
+    directory, size=DEFAULT_PROBE_SIZE, max_duration=DEFAULT_PROBE_DURATION
+):
+    """
+    Write and remove a temporary file in the given directory to measure how fast
+    it can be written. The result is reused for the same volume during
+    ``PROBE_MAX_AGE`` seconds.
+
+    Args:
+        directory(str): existing directory
+        size(int): maximum bytes to write
+        max_duration(float): stop writing after this many seconds
+
+    Returns:
+        float or None: bytes per second, None if the directory is not writable.
+    """
+    try:
+        device = os.stat(directory).st_dev
+    except OSError:
+        return None
+    with _throughputs_lock:
+        probe_time, throughput = _throughputs.get(device, (None, None))
+    if probe_time is not None and time.time() - probe_time < PROBE_MAX_AGE:
+        return throughput
+
+    chunk = os.urandom(_PROBE_CHUNK_SIZE)
+    written = 0
+    try:
+        descriptor, probe_path = tempfile.mkstemp(
+            prefix=".localorender-probe-", dir=directory
+        )
+    except OSError as error:
+        LOGGER.debug("cannot probe '{}': {}".format(directory, error))
+        return None
+    try:
+        start = time.time()
+        with os.fdopen(descriptor, "wb") as probe_file:
+            while written < size and time.time() - start < max_duration:
+                probe_file.write(chunk)
+                written += len(chunk)
+            probe_file.flush()
+            # measure the storage, not the system cache
+            os.fsync(probe_file.fileno())
+        duration = time.time() - start
+    except OSError as error:
+        LOGGER.debug("cannot probe '{}': {}".format(directory, error))
+        throughput = None
+    else:
+        throughput = written / max(duration, 1e-6)
+        LOGGER.debug("probed '{}': {}/s".format(directory, format_size(throughput)))
+    finally:
+        try:
+            os.remove(probe_path)
+        except OSError:
+            pass
+
+    with _throughputs_lock:
+        _throughputs[device] = (time.time(), throughput)
+    return throughput
+
+
+class OutputForecast(object):
+    """
+    Estimate the bytes a render will write on each volume.
+
+    The forecast can be updated with :meth:`add_rendered_frame` while its volumes
+    are computed in another thread.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows that will be rendered.
+        get_cached_entries(callable): returns the cached directory entries,
+            see :meth:`scanning.DirectoryScanCache.get_cached_entries`.
+        known_sizes(dict[str, float] or None): mean frame size of Write nodes from
+            previous renders, by full name. Frames on disk are preferred.
+        render_time(float or None): predicted duration in seconds of the render.
+        budget(float or None): maximum duration in seconds of the render.
+    """
+
+    def __init__(
+        self,
+        render_plan,
+        rows,
+        get_cached_entries,
+        known_sizes=None,
+        render_time=None,
+        budget=None,
+    ):
+        self._plan = render_plan
+        self._rows = list(rows)
+        self._get_cached_entries = get_cached_entries
+        self.render_time = render_time
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._directory_sizes = None  # type: dict[str, float] | None
+        self.frame_sizes = {}  # type: dict[str, float]
+        # where each frame size comes from, to explain the forecast
+        self.sources = {}  # type: dict[str, str]
+        for node, size in (known_sizes or {}).items():
+            if size:
+                self.frame_sizes[node] = size
+                self.sources[node] = "previous renders"
+        self._measure_existing_frames()
+
+    @property
+    def unknown_nodes(self):
+        """
+        Returns:
+            list[str]: the nodes to render whose frame size is not known yet.
+        """
+        node_names = self._plan.node_names
+        nodes = set(node_names[self._plan.get_node_id(row)] for row in self._rows)
+        return sorted(node for node in nodes if node not in self.frame_sizes)
+
+    def _get_size(self, row):
+        """
+        Returns:
+            int or None: size of the file of the row, from the directory cache.
+        """
+        entries = self._get_cached_entries(self._plan.get_directory(row))
+        if not entries:
+            return None
+        entry = entries.get(self._plan.get_filename(row))
+        if entry is None:
+            return None
+        if isinstance(entry, os.stat_result):
+            return entry.st_size
+        try:
+            return entry.stat().st_size
+        except OSError:
+            return None
+
+    def _measure_existing_frames(self):
+        existing_rows = collections.defaultdict(list)
+        for row in range(len(self._plan)):
+            if self._plan.get_status(row) == plan.STATUS_EXISTS:
+                existing_rows[self._plan.get_node_id(row)].append(row)
+
+        for node_id, rows in existing_rows.items():
+            # frames spread over the sequence, as their size often changes along a shot
+            step = max(1, len(rows) // MAX_SIZE_SAMPLES)
+            sizes = [self._get_size(row) for row in rows[::step][:MAX_SIZE_SAMPLES]]
+            sizes = [size for size in sizes if size]
+            if sizes:
+                node = self._plan.node_names[node_id]
+                self.frame_sizes[node] = sum(sizes) / float(len(sizes))
+                self.sources[node] = "{} frames on disk".format(len(sizes))
+
+    def add_rendered_frame(self, node, path):
+        """
+        Use the first rendered frame of a node whose frame size was unknown.
+
+        Args:
+            node(str): full name of the Write node
+            path(str): of the frame just written
+
+        Returns:
+            bool: True if the frame size of the node was unknown until now.
+        """
+        if node in self.frame_sizes:
+            return False
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        with self._lock:
+            self.frame_sizes[node] = size
+            self.sources[node] = "first rendered frame"
+            self._directory_sizes = None
+        return True
+
+    def get_total_size(self):
+        """
+        Returns:
+            int: estimated bytes to write for the nodes whose frame size is known.
+        """
+        return sum(size for size in self._get_directory_sizes().values())
+
+    def _get_directory_sizes(self):
+        with self._lock:
+            if self._directory_sizes is None:
+                self._directory_sizes = self._compute_directory_sizes()
+            return self._directory_sizes
+
+    def _compute_directory_sizes(self):
+        sizes = collections.Counter()
+        for row in self._rows:
+            frame_size = self.frame_sizes.get(
+                self._plan.node_names[self._plan.get_node_id(row)]
+            )
+            if frame_size is None:
+                continue
+            # a frame rendered again replaces its previous file
+            previous = 0
+            if self._plan.get_status(row) in (plan.STATUS_EXISTS, plan.STATUS_CORRUPT):
+                previous = self._get_size(row) or 0
+            sizes[self._plan.get_directory(row)] += frame_size - previous
+        return sizes
+
+    def get_volumes(self, probe=True):
+        """
+        Args:
+            probe(bool): measure the write throughput of each volume.
+
+        Returns:
+            list[VolumeForecast]: one per volume receiving frames.
+        """
+        volumes = collections.OrderedDict()  # type: dict[object, list]
+        for directory, size in sorted(self._get_directory_sizes().items()):
+            existing = get_existing_parent(directory)
+            if existing is None:
+                continue
+            try:
+                key = os.stat(existing).st_dev
+            except OSError:
+                key = existing
+            volume = volumes.setdefault(key, [existing, 0])
+            volume[1] += size
+
+        forecasts = []
+        for directory, size in volumes.values():
+            try:
+                free = shutil.disk_usage(directory).free
+            except OSError:
+                free = None
+            throughput = probe_write_throughput(directory) if probe else None
+            forecasts.append(
+                VolumeForecast(directory, max(0, int(size)), free, throughput)
+            )
+        return forecasts
+
+    def get_warnings(self, volumes, budget=None, render_time=None):
+        """
+        Args:
+            volumes(list[VolumeForecast]): see :meth:`get_volumes`
+            budget(float or None): maximum duration in seconds of the render,
+                default to the one given to the forecast.
+            render_time(float or None): predicted duration in seconds of the
+                render, default to the one given to the forecast.
+
+        Returns:
+            list[str]: a message for each volume that cannot hold or keep up with
+                the frames.
+        """
+        budget = self.budget if budget is None else budget
+        render_time = self.render_time if render_time is None else render_time
+        warnings = []
+        for volume in volumes:
+            if volume.free is not None and volume.size > volume.free:
+                warnings.append(
+                    "not enough space for '{}': about {} to write but {} free"
+                    "".format(
+                        volume.directory,
+                        format_size(volume.size),
+                        format_size(volume.free),
+                    )
+                )
+            if not volume.throughput or not volume.size:
+                continue
+            write_time = volume.size / volume.throughput
+            if budget is not None and write_time > budget:
+                warnings.append(
+                    "writing about {} to '{}' takes {} at {}/s, over the "
+                    "{} budget".format(
+                        format_size(volume.size),
+                        volume.directory,
+                        stats.format_duration(write_time),
+                        format_size(volume.throughput),
+                        stats.format_duration(budget),
+                    )
+                )
+            elif render_time is not None and write_time > render_time:
+                warnings.append(
+                    "'{}' cannot keep up: writing about {} takes {} at {}/s, "
+                    "longer than the {} expected to render".format(
+                        volume.directory,
+                        format_size(volume.size),
+                        stats.format_duration(write_time),
+                        format_size(volume.throughput),
+                        stats.format_duration(render_time),
+                    )
+                )
+        if budget is not None and render_time is not None and render_time > budget:
+            warnings.append(
+                "rendering is expected to take {}, over the {} budget".format(
+                    stats.format_duration(render_time), stats.format_duration(budget)
+                )
+            )
+        return warnings
+
+    def get_summary(self, volumes):
+        """
+        Args:
+            volumes(list[VolumeForecast]):
+
+        Returns:
+            str: one line describing the forecast.
+        """
+        parts = []
+        for volume in volumes:
+            text = "{} to '{}'".format(format_size(volume.size), volume.directory)
+            if volume.free is not None:
+                text += " ({} free".format(format_size(volume.free))
+                if volume.throughput:
+                    text += ", {}/s".format(format_size(volume.throughput))
+                text += ")"
+            parts.append(text)
+        summary = "expected output: {}".format(", ".join(parts) or "nothing")
+        unknown = self.unknown_nodes
+        if unknown:
+            summary += "; size unknown until rendered for {}".format(", ".join(unknown))
+        return summary
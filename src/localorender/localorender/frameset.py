@@ -0,0 +1,440 @@
+"""
+Set of frames stored as sorted runs of frames with a constant step, so long or
+sparse frame-ranges stay cheap in memory and time whatever the number of frames.
+"""
+import bisect
+import re
+
+_RANGE_REGEX = re.compile(r"^(-?\d+)(?:-(-?\d+)(?:([xy×])(\d+))?)?$")
+
+
+class _RunsBuilder(object):
+    """
+    Build the canonical runs of a set from its frames given in ascending order,
+    where whole runs can be added at once without iterating their frames.
+
+    The canonical runs are the maximal intervals of consecutive frames, and the
+    frames alone between them grouped from left to right by constant step, when
+    there is at least 3 of them. So two sets are equal if their runs are.
+    """
+
+    def __init__(self):
+        self.runs = []  # type: list[tuple[int, int, int]]
+        # interval of consecutive frames being extended
+        self._interval = None  # type: list[int] | None
+        # isolated frames being grouped: first, last, step and count
+        self._group = None  # type: list[int] | None
+
+    def add_interval(self, first, last):
+        self._add_frame(first)
+        self._interval[1] = last
+
+    def add_run(self, first, last, step):
+        """
+        Args:
+            first(int):
+            last(int): aligned on the step
+            step(int): greater than 1
+        """
+        count = (last - first) // step + 1
+        # the first frame may extend an interval, and the group takes the step of
+        # the run once its first frames are added
+        for frame in range(first, first + min(count, 3) * step, step):
+            self._add_frame(frame)
+        if count <= 3:
+            return
+        self._end_interval()
+        middle = count - 4
+        group = self._group
+        if middle and group[2] == step and group[1] == first + 2 * step:
+            # the frames between the third and the last one are isolated
+            group[1] = last - step
+            group[3] += middle
+        else:
+            for frame in range(first + 3 * step, last, step):
+                self._add_single(frame)
+        # the last frame may start an interval
+        self._add_frame(last)
+
+    def _add_frame(self, frame):
+        interval = self._interval
+        if interval is not None and frame == interval[1] + 1:
+            interval[1] = frame
+            return
+        self._end_interval()
+        self._interval = [frame, frame]
+
+    def _end_interval(self):
+        interval = self._interval
+        self._interval = None
+        if interval is None:
+            return
+        if interval[0] == interval[1]:
+            self._add_single(interval[0])
+            return
+        self._end_group()
+        self.runs.append((interval[0], interval[1], 1))
+
+    def _add_single(self, frame):
+        group = self._group
+        if group is None:
+            self._group = [frame, frame, 0, 1]
+            return
+        if group[3] == 1:
+            group[1:] = [frame, frame - group[0], 2]
+            return
+        if frame - group[1] == group[2]:
+            group[1] = frame
+            group[3] += 1
+            return
+        if group[3] == 2:
+            # too short to be a run: its second frame starts a new group
+            self.runs.append((group[0], group[0], 1))
+            self._group = [group[1], frame, frame - group[1], 2]
+            return
+        self._end_group()
+        self._group = [frame, frame, 0, 1]
+
+    def _end_group(self):
+        group = self._group
+        self._group = None
+        if group is None:
+            return
+        if group[3] >= 3:
+            self.runs.append((group[0], group[1], group[2]))
+            return
+        self.runs.append((group[0], group[0], 1))
+        if group[3] == 2:
+            self.runs.append((group[1], group[1], 1))
+
+    def finish(self):
+        self._end_interval()
+        self._end_group()
+        return self.runs
+
+
+def _normalize_run(run):
+    """
+    Returns:
+        tuple[int, int, int]: the run with its first frame before its last, and its
+            last frame aligned on the step.
+    """
+    if len(run) == 2:
+        first, last = run
+        step = 1
+    else:
+        first, last, step = run
+    if step < 1:
+        raise ValueError("invalid frame step {}".format(step))
+    if first > last:
+        first, last = last, first
+    return first, first + (last - first) // step * step, step
+
+
+def _split_run(run, first, last):
+    """
+    Returns:
+        list[tuple[int, int, int]]: the parts of the run before and after the
+            ``first``-``last`` interval.
+    """
+    start, end, step = run
+    parts = []
+    if start < first:
+        parts.append((start, start + (first - 1 - start) // step * step, step))
+    if end > last:
+        after = start + ((last - start) // step + 1) * step
+        parts.append((max(start, after), end, step))
+    return parts
+
+
+def _get_canonical_runs(runs):
+    """
+    Args:
+        runs(collections.Iterable[tuple]): (first, last) or (first, last, step),
+            in any order and possibly overlapping.
+
+    Returns:
+        list[tuple[int, int, int]]: the canonical runs of their union.
+    """
+    intervals = []
+    stepped = []
+    for run in runs:
+        run = _normalize_run(run)
+        if run[2] == 1 or run[0] == run[1]:
+            intervals.append(run[:2])
+        else:
+            stepped.append(run)
+
+    merged = []  # type: list[list[int]]
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    merged_starts = [first for first, _ in merged]
+
+    # remove the frames covered by the intervals from the stepped runs
+    pieces = []
+    for run in stepped:
+        index = max(0, bisect.bisect_right(merged_starts, run[0]) - 1)
+        parts = [run]
+        while index < len(merged) and merged[index][0] <= run[1]:
+            first, last = merged[index]
+            if parts and last >= parts[-1][0]:
+                parts[-1:] = _split_run(parts[-1], first, last)
+            index += 1
+        pieces.extend(part for part in parts if part[0] <= part[1])
+
+    # stepped runs overlapping each other are merged when they share their step
+    # and alignment, else their frames are expanded, which is expected to be rare
+    segments = [(first, last, 1) for first, last in merged]
+    pieces.sort()
+    index = 0
+    while index < len(pieces):
+        cluster = [pieces[index]]
+        end = pieces[index][1]
+        index += 1
+        while index < len(pieces) and pieces[index][0] <= end:
+            cluster.append(pieces[index])
+            end = max(end, pieces[index][1])
+            index += 1
+        first, _, step = cluster[0]
+        if all(run[2] == step and (run[0] - first) % step == 0 for run in cluster):
+            segments.append((first, end, step))
+            continue
+        frames = sorted(
+            set(frame for run in cluster for frame in range(run[0], run[1] + 1, run[2]))
+        )
+        segments.extend((frame, frame, 1) for frame in frames)
+
+    builder = _RunsBuilder()
+    for first, last, step in sorted(segments):
+        if step == 1:
+            builder.add_interval(first, last)
+        else:
+            builder.add_run(first, last, step)
+    return builder.finish()
+
+
+class FrameSet(object):
+    """
+    Immutable set of frames, iterated in ascending order.
+
+    Args:
+        runs(collections.Iterable[tuple]): inclusive (first, last) intervals or
+            (first, last, step) runs, in any order and possibly overlapping.
+    """
+
+    __slots__ = ("_runs", "_starts", "_count")
+
+    def __init__(self, runs=()):
+        self._runs = tuple(_get_canonical_runs(runs))
+        self._starts = [run[0] for run in self._runs]  # type: list[int]
+        self._count = sum(
+            (last - first) // step + 1 for first, last, step in self._runs
+        )
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Args:
+            frames(collections.Iterable[int]):
+
+        Returns:
+            FrameSet:
+        """
+        return cls((frame, frame) for frame in frames)
+
+    @classmethod
+    def from_string(cls, framerange):
+        """
+        Args:
+            framerange(str): nuke frame-range syntax like "1-10x2 20", ranges can
+                also be separated by commas. "1-10y3" is the frames of "1-10" not
+                in "1-10x3".
+
+        Raises:
+            ValueError: if the frame-range cannot be parsed.
+
+        Returns:
+            FrameSet:
+        """
+        runs = []
+        for token in framerange.replace(",", " ").split():
+            match = _RANGE_REGEX.match(token)
+            if not match:
+                raise ValueError("Unsupported frame range '{}'".format(framerange))
+            first = int(match.group(1))
+            last = int(match.group(2)) if match.group(2) is not None else first
+            step = int(match.group(4) or 1)
+            if step < 1:
+                raise ValueError("Unsupported frame range '{}'".format(framerange))
+            if match.group(3) == "y":
+                frames = FrameSet([(first, last)]) - FrameSet([(first, last, step)])
+                runs.extend(frames.runs)
+            else:
+                runs.append((first, last, step))
+        return cls(runs)
+
+    @property
+    def runs(self):
+        """
+        Returns:
+            tuple[tuple[int, int, int]]: sorted disjoint inclusive (first, last, step)
+                runs, with intervals of consecutive frames having a step of 1.
+        """
+        return self._runs
+
+    @property
+    def first(self):
+        """
+        Raises:
+            ValueError: if the set is empty.
+        """
+        if not self._runs:
+            raise ValueError("empty FrameSet")
+        return self._runs[0][0]
+
+    @property
+    def last(self):
+        """
+        Raises:
+            ValueError: if the set is empty.
+        """
+        if not self._runs:
+            raise ValueError("empty FrameSet")
+        return self._runs[-1][1]
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return bool(self._runs)
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        for first, last, step in self._runs:
+            for frame in range(first, last + 1, step):
+                yield frame
+
+    def _find_run(self, frame):
+        """
+        Returns:
+            int: index of the run whose span contains the frame, or -1.
+        """
+        index = bisect.bisect_right(self._starts, frame) - 1
+        if index >= 0 and frame <= self._runs[index][1]:
+            return index
+        return -1
+
+    def __contains__(self, frame):
+        index = self._find_run(frame)
+        if index < 0:
+            return False
+        first, _, step = self._runs[index]
+        return (frame - first) % step == 0
+
+    def __eq__(self, other):
+        if not isinstance(other, FrameSet):
+            return NotImplemented
+        return self._runs == other._runs
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self._runs)
+
+    def __repr__(self):
+        return "{}('{}')".format(self.__class__.__name__, self.to_string())
+
+    def __str__(self):
+        return self.to_string()
+
+    def union(self, other):
+        """
+        Args:
+            other(FrameSet):
+
+        Returns:
+            FrameSet: frames in either set.
+        """
+        return FrameSet(self._runs + other._runs)
+
+    def difference(self, other):
+        """
+        Args:
+            other(FrameSet):
+
+        Returns:
+            FrameSet: frames of this set not in the other.
+        """
+        runs = []
+        for run in self._runs:
+            step = run[2]
+            index = max(0, bisect.bisect_right(other._starts, run[0]) - 1)
+            # part of the run not compared yet with the runs of the other set
+            remaining = run
+            while remaining is not None and index < len(other._runs):
+                other_first, other_last, other_step = other._runs[index]
+                index += 1
+                if other_last < remaining[0]:
+                    continue
+                if other_first > remaining[1]:
+                    break
+                inside_first = remaining[0]
+                if other_first > inside_first:
+                    inside_first += (
+                        (other_first - inside_first + step - 1) // step * step
+                    )
+                inside_last = min(remaining[1], other_last)
+
+                parts = _split_run(remaining, other_first, other_last)
+                if parts and parts[0][0] < other_first:
+                    runs.append(parts.pop(0))
+                remaining = parts[0] if parts else None
+
+                if other_step == 1 or (
+                    other_step == step and (inside_first - other_first) % step == 0
+                ):
+                    continue
+                # both stepped with different steps, frames are compared one by one
+                runs.extend(
+                    (frame, frame)
+                    for frame in range(inside_first, inside_last + 1, step)
+                    if (frame - other_first) % other_step
+                )
+            if remaining is not None:
+                runs.append(remaining)
+        return FrameSet(runs)
+
+    def intersection(self, other):
+        """
+        Args:
+            other(FrameSet):
+
+        Returns:
+            FrameSet: frames in both sets.
+        """
+        return self.difference(self.difference(other))
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
+
+    def to_string(self):
+        """
+        Returns:
+            str: the shortest nuke frame-range describing the set, like "1-10 20-30x2".
+        """
+        tokens = []
+        for first, last, step in self._runs:
+            if first == last:
+                tokens.append(str(first))
+            elif step == 1:
+                tokens.append("{}-{}".format(first, last))
+            else:
+                tokens.append("{}-{}x{}".format(first, last, step))
+        return " ".join(tokens)
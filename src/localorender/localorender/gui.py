@@ -0,0 +1,3300 @@
+"""
+Qt interface of LocaloRender, and its integration in nuke.
+"""
+import collections
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+import webbrowser
+from functools import partial
+
+import nuke
+import pyui
+
+from PySide2 import QtWidgets
+from PySide2 import QtCore
+from PySide2 import QtGui
+
+from . import APPNAME
+from . import __version__
+from . import autoscale
+from . import engine
+from . import fingerprint
+from . import forecast
+from . import frameset
+from . import history
+from . import install
+from . import manifest
+from . import nodeindex
+from . import plan
+from . import readcache
+from . import render
+from . import scanning
+from . import schedule
+from . import scratch
+from . import stats
+from . import thumbnails
+from . import verify
+from . import watchdog
+
+LOGGER = logging.getLogger("LocaloRender.gui")
+
+PROGRESS_TOOLTIP_INTERVAL = 1.0
+"""
+Minimum seconds between two updates of the per-node statistics of the progress
+tooltip during a render.
+"""
+
+PreparedRender = collections.namedtuple(
+    "PreparedRender",
+    ["fingerprints", "stale_rows", "changed_rows", "verified_rows", "corrupt_rows"],
+)
+"""
+What is computed in background before a render: the fingerprint of the rows that
+may be rendered, the rows whose fingerprint changed (None if not needed), the rows
+whose status changed when their directories were scanned again, and the existing
+files that were verified with the error of the corrupt ones.
+"""
+
+"""_____________________________________________________________________________________
+QT GUI
+"""
+
+
+class SvgIcons:
+    """
+    We create a "hacky" system to have custom QIcon with no file dependency before the runtime.
+    """
+
+    def __init__(self):
+        # note: we cannot use a context manager as QIcon are loaded on demand from disk.
+        self._tmpdir = tempfile.mkdtemp(prefix="nuke-{}-".format(APPNAME))
+        # this will not be called if the app crash
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.clean_files)
+
+        # ref: https://pictogrammers.com/library/mdi/icon/file-hidden/
+        tmpfile = self._write_svg(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><title>file-hidden</title><path fill="#D34A44" d="M13,9H14V11H11V7H13V9M18.5,9L16.38,6.88L17.63,5.63L20,8V10H18V11H15V9H18.5M13,3.5V2H12V4H13V6H11V4H9V2H8V4H6V5H4V4C4,2.89 4.89,2 6,2H14L16.36,4.36L15.11,5.61L13,3.5M20,20A2,2 0 0,1 18,22H16V20H18V19H20V20M18,15H20V18H18V15M12,22V20H15V22H12M8,22V20H11V22H8M6,22C4.89,22 4,21.1 4,20V18H6V20H7V22H6M4,14H6V17H4V14M4,10H6V13H4V10M18,11H20V14H18V11M4,6H6V9H4V6Z" /></svg>',
+        )
+        self.filedontexist = QtGui.QIcon(tmpfile)
+
+        # ref: https://pictogrammers.com/library/mdi/icon/file-check-outline/
+        tmpfile = self._write_svg(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><title>file-check-outline</title><path fill="#58CE53" d="M23.5 17L18.5 22L15 18.5L16.5 17L18.5 19L22 15.5L23.5 17M13.09 20H6V4H13V9H18V13.09C18.33 13.04 18.66 13 19 13S19.67 13.04 20 13.09V8L14 2H6C4.89 2 4 2.9 4 4V20C4 21.11 4.89 22 6 22H13.81C13.46 21.39 13.21 20.72 13.09 20Z" /></svg>',
+        )
+        self.fileexist = QtGui.QIcon(tmpfile)
+
+        # ref: https://pictogrammers.com/library/mdi/icon/sync/
+        tmpfile = self._write_svg(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><title>sync</title><path fill="#D2D9EC" d="M12,18A6,6 0 0,1 6,12C6,11 6.25,10.03 6.7,9.2L5.24,7.74C4.46,8.97 4,10.43 4,12A8,8 0 0,0 12,20V23L16,19L12,15M12,4V1L8,5L12,9V6A6,6 0 0,1 18,12C18,13 17.75,13.97 17.3,14.8L18.76,16.26C19.54,15.03 20,13.57 20,12A8,8 0 0,0 12,4Z" /></svg>',
+        )
+        self.reload = QtGui.QIcon(tmpfile)
+
+        # ref: https://pictogrammers.com/library/mdi/icon/alert-circle/
+        tmpfile = self._write_svg(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><title>alert-circle</title><path fill="#D34A44" d="M13,13H11V7H13M13,17H11V15H13M12,2A10,10 0 0,0 2,12A10,10 0 0,0 12,22A10,10 0 0,0 22,12A10,10 0 0,0 12,2Z" /></svg>',
+        )
+        self.renderfailed = QtGui.QIcon(tmpfile)
+
+        # ref: https://pictogrammers.com/library/mdi/icon/help/
+        tmpfile = self._write_svg(
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><title>help</title><path fill="#D2D9EC" d="M10,19H13V22H10V19M12,2C17.35,2.22 19.68,7.62 16.5,11.67C15.67,12.67 14.33,13.33 13.67,14.17C13,15 13,16 13,17H10C10,15.33 10,13.92 10.67,12.92C11.33,11.92 12.67,11.33 13.5,10.67C15.92,8.43 15.32,5.26 12,5A3,3 0 0,0 9,8H6A6,6 0 0,1 12,2Z" /></svg>',
+        )
+        self.help = QtGui.QIcon(tmpfile)
+
+    def clean_files(self):
+        if not os.path.exists(self._tmpdir):
+            return
+        LOGGER.debug("removing temp dir '{}'".format(self._tmpdir))
+        render.rmtree(self._tmpdir)
+
+    def __del__(self):
+        """
+        Remove the temporary directory when the instance is deleted.
+
+        (I haven't found this called by nuke :/)
+        """
+        self.clean_files()
+
+    def _write_svg(self, content):
+        filename = uuid.uuid4().hex
+        filepath = os.path.join(self._tmpdir, filename + ".svg")
+        LOGGER.debug("writing temp icon to '{}'".format(filepath))
+        with open(filepath, "w") as f:
+            f.write(content)
+        return filepath
+
+
+class DiskScanner(QtCore.QObject):
+    """
+    Update a directory cache in a background thread, to not freeze the GUI on slow disks.
+
+    Args:
+        cache(scanning.DirectoryScanCache):
+    """
+
+    scanned = QtCore.Signal(int)
+    """
+    Emitted with the generation number of the scan request that just finished.
+    """
+
+    def __init__(self, cache, parent=None):
+        super(DiskScanner, self).__init__(parent)
+        self._cache = cache
+        self._generation = 0
+
+    @property
+    def generation(self):
+        """
+        Number of the last scan request.
+        """
+        return self._generation
+
+    def scan(self, directories):
+        """
+        Start scanning the given directories in a background thread.
+
+        Args:
+            directories(collections.Iterable[str]):
+
+        Returns:
+            int: generation number of this request
+        """
+        self._generation += 1
+        thread = threading.Thread(
+            target=self._run,
+            args=(self._generation, list(directories)),
+            name="{}-scanner".format(APPNAME),
+        )
+        thread.daemon = True
+        thread.start()
+        return self._generation
+
+    def _run(self, generation, directories):
+        try:
+            self._cache.scan(directories)
+        except Exception as error:
+            LOGGER.exception("error while scanning directories: {}".format(error))
+        try:
+            self.scanned.emit(generation)
+        except RuntimeError:
+            # the underlying QObject was deleted while we were scanning
+            pass
+
+
+class DirectoryWatcher(QtCore.QObject):
+    """
+    Watch directories and update their content in a directory cache when it changes.
+
+    Changes are reported by a ``QFileSystemWatcher`` as soon as they happen on
+    local disks. As network mounts usually don't report them, all the directories
+    are also polled at a slower pace, only the directories whose modification
+    time changed being listed again.
+
+    Directories that don't exist yet are watched through their closest existing
+    parent, so their creation is noticed too.
+
+    Notifications are batched: the directories changed during ``batch_interval``
+    are scanned together in a background thread, and a single :attr:`changed`
+    signal is emitted for all of them, so a directory receiving many files per
+    second doesn't flood the GUI thread.
+
+    Args:
+        cache(scanning.DirectoryScanCache):
+        batch_interval(int): milliseconds during which changes are accumulated.
+        poll_interval(int): milliseconds between two checks of all the directories.
+    """
+
+    changed = QtCore.Signal(object)
+    """
+    Emitted with the list of directories whose content changed in the cache.
+    """
+
+    _scanned = QtCore.Signal(object)
+
+    MAX_WATCHED = 256
+    """
+    Maximum number of directories given to the system watcher, whose resources
+    are limited (inotify watches on linux). Others are only polled.
+    """
+
+    def __init__(self, cache, batch_interval=250, poll_interval=5000, parent=None):
+        super(DirectoryWatcher, self).__init__(parent)
+        self._cache = cache
+        self._directories = []  # type: list[str]
+        # path given to the system watcher: watched directories it reports for
+        self._watched = {}  # type: dict[str, list[str]]
+        self._dirty = set()  # type: set[str]
+        self._scanning = False
+
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._batch_timer = QtCore.QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self._batch_timer.setInterval(batch_interval)
+        self._batch_timer.timeout.connect(self._flush)
+        self._poll_timer = QtCore.QTimer(self)
+        self._poll_timer.setInterval(poll_interval)
+        self._poll_timer.timeout.connect(self._on_poll)
+        self._scanned.connect(self._on_scanned)
+
+    @property
+    def is_watching(self):
+        return self._poll_timer.isActive()
+
+    def watch(self, directories):
+        """
+        Replace the watched directories.
+
+        Args:
+            directories(collections.Iterable[str]): directories that may not exist yet.
+        """
+        self.stop()
+        self._directories = list(directories)
+        if not self._directories:
+            return
+        self._add_system_watches(self._directories)
+        self._poll_timer.start()
+
+    def stop(self):
+        """
+        Stop watching all directories.
+        """
+        watched = self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        self._watched = {}
+        self._poll_timer.stop()
+        self._batch_timer.stop()
+        self._dirty.clear()
+        self._directories = []
+
+    def _add_system_watches(self, directories):
+        for directory in directories:
+            if directory in self._watched:
+                continue
+            watched_path = directory
+            while not os.path.isdir(watched_path):
+                parent = os.path.dirname(watched_path)
+                if parent == watched_path:
+                    break
+                watched_path = parent
+
+            reported = self._watched.get(watched_path)
+            if reported is None:
+                if len(self._watched) >= self.MAX_WATCHED:
+                    continue
+                if not self._watcher.addPath(watched_path):
+                    continue
+                reported = self._watched[watched_path] = []
+            if directory not in reported:
+                reported.append(directory)
+
+    def _mark_dirty(self, directories):
+        self._dirty.update(directories)
+        if not self._batch_timer.isActive():
+            self._batch_timer.start()
+
+    def _flush(self):
+        if not self._dirty:
+            return
+        if self._scanning:
+            # a single scan at a time, the changes are picked on next batch
+            self._batch_timer.start()
+            return
+        directories = list(self._dirty)
+        self._dirty.clear()
+        self._scanning = True
+        thread = threading.Thread(
+            target=self._run,
+            args=(directories,),
+            name="{}-watcher".format(APPNAME),
+        )
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, directories):
+        changed = []
+        try:
+            for directory in directories:
+                previous = self._cache.get_cached_entries(directory)
+                # the same entries are returned if the directory didn't change
+                if self._cache.get_entries(directory) is not previous:
+                    changed.append(directory)
+        except Exception as error:
+            LOGGER.exception(
+                "error while scanning watched directories: {}".format(error)
+            )
+        try:
+            self._scanned.emit(changed)
+        except RuntimeError:
+            # the underlying QObject was deleted while we were scanning
+            pass
+
+    @QtCore.Slot(str)
+    def _on_directory_changed(self, path):
+        directories = self._watched.get(os.path.normpath(path))
+        if directories:
+            self._mark_dirty(directories)
+
+    @QtCore.Slot()
+    def _on_poll(self):
+        if self._scanning:
+            return
+        self._mark_dirty(self._directories)
+
+    @QtCore.Slot(object)
+    def _on_scanned(self, directories):
+        self._scanning = False
+        if not self.is_watching:
+            return
+        watched = set(self._directories)
+        directories = [directory for directory in directories if directory in watched]
+        if directories:
+            # watch the directories created since the last scan
+            self._add_system_watches(directories)
+            self.changed.emit(directories)
+        if self._dirty and not self._batch_timer.isActive():
+            self._batch_timer.start()
+
+
+class PlanBuilder(QtCore.QObject):
+    """
+    Build render plans in a background thread, then scan their directories.
+
+    Each new request cancels the previous ones, so only the plan of the latest
+    request is emitted.
+
+    Args:
+        scan_cache(scanning.DirectoryScanCache):
+    """
+
+    plan_ready = QtCore.Signal(int, object)
+    """
+    Emitted with the generation number of the request and the new plan.RenderPlan.
+    """
+
+    def __init__(self, scan_cache, parent=None):
+        super(PlanBuilder, self).__init__(parent)
+        self._scan_cache = scan_cache
+        self._generation = 0
+        self._cancel_event = None  # type: threading.Event | None
+        # connected first so the request is over for the other receivers
+        self.plan_ready.connect(self._on_plan_ready)
+
+    @property
+    def generation(self):
+        """
+        Number of the last request.
+        """
+        return self._generation
+
+    @property
+    def is_building(self):
+        """
+        True if the latest request is still in progress.
+        """
+        return self._cancel_event is not None
+
+    def cancel(self):
+        """
+        Stop the request in progress, if any.
+        """
+        self._generation += 1
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        self._cancel_event = None
+
+    def request(self, plan_nodes, frames):
+        """
+        Start building a plan in background, cancelling the previous request.
+
+        Args:
+            plan_nodes(list[plan.PlanNode]):
+            frames(list[int]):
+
+        Returns:
+            int: generation number of this request
+        """
+        self.cancel()
+        self._cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=self._run,
+            args=(self._generation, self._cancel_event, plan_nodes, frames),
+            name="{}-planner".format(APPNAME),
+        )
+        thread.daemon = True
+        thread.start()
+        return self._generation
+
+    def build(self, plan_nodes, frames):
+        """
+        Build a plan immediately, cancelling any request in progress.
+
+        Returns:
+            plan.RenderPlan:
+        """
+        self.cancel()
+        return plan.build_render_plan(plan_nodes, frames)
+
+    def _run(self, generation, cancel_event, plan_nodes, frames):
+        try:
+            render_plan = plan.build_render_plan(plan_nodes, frames, cancel_event)
+            self._scan_cache.scan(render_plan.directories)
+        except plan.PlanCancelled:
+            return
+        except Exception as error:
+            LOGGER.exception("error while building render plan: {}".format(error))
+            render_plan = plan.RenderPlan()
+
+        if cancel_event.is_set():
+            return
+        try:
+            self.plan_ready.emit(generation, render_plan)
+        except RuntimeError:
+            # the underlying QObject was deleted while we were working
+            pass
+
+    @QtCore.Slot(int, object)
+    def _on_plan_ready(self, generation, render_plan):
+        if generation == self._generation:
+            self._cancel_event = None
+
+
+class BackgroundCall(QtCore.QObject):
+    """
+    Call a function in a background thread, then a callback with its result in
+    the thread of this object, so the dialog doesn't freeze during slow work.
+
+    Args:
+        function(callable): called without arguments in the background thread.
+        callback(callable): called with the result of the function.
+        error_callback(callable or None):
+            called with the error message if the function raised.
+    """
+
+    succeeded = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, function, callback, error_callback=None, parent=None):
+        super(BackgroundCall, self).__init__(parent)
+        self._function = function
+        self._callback = callback
+        self._error_callback = error_callback
+        self._cancelled = False
+        self.succeeded.connect(self._on_succeeded)
+        self.failed.connect(self._on_failed)
+
+    def start(self):
+        thread = threading.Thread(
+            target=self._run, name="{}-background".format(APPNAME)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def cancel(self):
+        """
+        Don't call any callback once the function returns.
+        """
+        self._cancelled = True
+
+    def _run(self):
+        try:
+            result = self._function()
+        except Exception as error:
+            LOGGER.exception("error in background call: {}".format(error))
+            signal, value = self.failed, str(error)
+        else:
+            signal, value = self.succeeded, result
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            # the underlying QObject was deleted while we were working
+            pass
+
+    @QtCore.Slot(object)
+    def _on_succeeded(self, result):
+        if not self._cancelled:
+            self._callback(result)
+
+    @QtCore.Slot(str)
+    def _on_failed(self, error):
+        if not self._cancelled and self._error_callback is not None:
+            self._error_callback(error)
+
+
+def _decode_with_qt(path, max_width, max_height):
+    """
+    Decode a thumbnail with the image formats supported by Qt, as the image
+    libraries of :mod:`thumbnails` are usually not available in nuke.
+
+    Returns:
+        thumbnails.Thumbnail or None: None if the format is not supported.
+    """
+    reader = QtGui.QImageReader(path)
+    if not reader.canRead():
+        return None
+    size = reader.size()
+    if size.isValid():
+        # formats like JPEG can then decode at a reduced size directly
+        reader.setScaledSize(
+            QtCore.QSize(
+                *thumbnails.get_fitted_size(
+                    size.width(), size.height(), max_width, max_height
+                )
+            )
+        )
+    image = reader.read()
+    if image.isNull():
+        return None
+    if not size.isValid():
+        image = image.scaled(
+            max_width,
+            max_height,
+            QtCore.Qt.KeepAspectRatio,
+            QtCore.Qt.SmoothTransformation,
+        )
+    image = image.convertToFormat(QtGui.QImage.Format_RGB888)
+    bits = bytes(image.constBits())
+    line_size = image.bytesPerLine()
+    row_size = image.width() * 3
+    data = b"".join(
+        bits[line_size * y : line_size * y + row_size] for y in range(image.height())
+    )
+    return thumbnails.Thumbnail(image.width(), image.height(), data)
+
+
+def _thumbnail_to_image(thumbnail):
+    """
+    Args:
+        thumbnail(thumbnails.Thumbnail):
+
+    Returns:
+        QtGui.QImage:
+    """
+    image = QtGui.QImage(
+        thumbnail.data,
+        thumbnail.width,
+        thumbnail.height,
+        thumbnail.width * 3,
+        QtGui.QImage.Format_RGB888,
+    )
+    # the image doesn't own the data without a copy
+    return image.copy()
+
+
+class ThumbnailProvider(QtCore.QObject):
+    """
+    Give the thumbnails of rendered frames, decoding the missing ones in background
+    threads so the GUI never waits for the disk.
+
+    Args:
+        max_width(int):
+        max_height(int):
+        max_cache_size(int): in bytes
+    """
+
+    changed = QtCore.Signal()
+    """
+    Emitted when new thumbnails are available, at most every ``batch_interval``.
+    """
+
+    _loaded = QtCore.Signal()
+
+    def __init__(
+        self,
+        max_width,
+        max_height,
+        max_cache_size=thumbnails.DEFAULT_MAX_CACHE_SIZE,
+        batch_interval=100,
+        parent=None,
+    ):
+        super(ThumbnailProvider, self).__init__(parent)
+        decoders = [
+            decoder
+            for decoder in thumbnails.get_decoders()
+            if decoder is not thumbnails.decode_stub
+        ]
+        decoders.append(_decode_with_qt)
+        self._cache = thumbnails.ThumbnailCache(max_cache_size)
+        self._loader = thumbnails.ThumbnailLoader(
+            self._cache,
+            max_width,
+            max_height,
+            decoders=decoders,
+            convert=_thumbnail_to_image,
+            callback=self._on_thread_loaded,
+        )
+        self._batch_timer = QtCore.QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self._batch_timer.setInterval(batch_interval)
+        self._batch_timer.timeout.connect(self.changed)
+        self._loaded.connect(self._on_loaded)
+
+    def get(self, path):
+        """
+        Args:
+            path(str): of an existing file
+
+        Returns:
+            QtGui.QImage or None:
+                None if not decoded yet, in which case it is requested, or if the
+                file cannot be decoded.
+        """
+        found, image = self._cache.get_latest(path)
+        if not found:
+            self._loader.request(path)
+        return image
+
+    def retain(self, paths):
+        """
+        Args:
+            paths(collections.Iterable[str]): the only paths to keep decoding.
+        """
+        self._loader.retain(paths)
+
+    def discard(self, path):
+        """
+        Decode the given path again next time it is requested.
+        """
+        self._cache.discard(path)
+
+    def stop(self):
+        self._loader.stop()
+
+    def _on_thread_loaded(self, path):
+        try:
+            self._loaded.emit()
+        except RuntimeError:
+            # the underlying QObject was deleted while decoding
+            pass
+
+    @QtCore.Slot()
+    def _on_loaded(self):
+        if not self._batch_timer.isActive():
+            self._batch_timer.start()
+
+
+class WriteNodesModel(QtCore.QAbstractTableModel):
+    """
+    Expose a RenderPlan to Qt views.
+
+    No Qt object is stored per row: the data is generated from the plan columns
+    only when requested by the view, so for visible rows only. Sorting is done
+    on the plan by keeping the order of its rows.
+
+    Args:
+        icons(SvgIcons):
+    """
+
+    columns = {
+        "frame": {"index": 0, "label": "Frame"},
+        "node": {"index": 1, "label": "Node"},
+        "path": {"index": 2, "label": "Path"},
+        "status": {"index": 3, "label": "Status"},
+        "view": {"index": 4, "label": "View"},
+    }
+
+    def __init__(self, icons, parent=None):
+        super(WriteNodesModel, self).__init__(parent)
+        self._icons = icons
+        self._plan = plan.RenderPlan()
+        # rows of the plan in displayed order
+        self._order = []  # type: list[int]
+        # displayed row for each row of the plan, built on demand
+        self._inverse_order = None  # type: list[int] | None
+        self._sort_column = "frame"
+        self._sort_descending = False
+        # error of the (node, frame, view) that failed in the last renders
+        self._failed_items = {}  # type: dict[tuple[str, int, str], str]
+        # warning of the nodes that became slower to render, by full name
+        self._node_warnings = {}  # type: dict[str, str]
+        self._thumbnails = None  # type: ThumbnailProvider | None
+        self._column_names = sorted(
+            self.columns, key=lambda column: self.columns[column]["index"]
+        )
+        self._status_display = {
+            plan.STATUS_UNKNOWN: (None, "Checking if the frame exists on disk ..."),
+            plan.STATUS_MISSING: (
+                icons.filedontexist,
+                "Frame not written to disk yet.",
+            ),
+            plan.STATUS_EXISTS: (icons.fileexist, "Frame already exist on disk."),
+            plan.STATUS_COPYING: (
+                icons.reload,
+                "Frame rendered, copying it from the local scratch directory ...",
+            ),
+            plan.STATUS_COPY_FAILED: (
+                icons.filedontexist,
+                "Frame rendered but it could not be copied from the local scratch "
+                "directory, see the logs.",
+            ),
+            plan.STATUS_CORRUPT: (
+                icons.renderfailed,
+                "Frame on disk is truncated or corrupt, it will be rendered again.",
+            ),
+        }
+
+    @property
+    def plan(self):
+        """
+        Returns:
+            plan.RenderPlan:
+        """
+        return self._plan
+
+    def set_plan(self, render_plan):
+        """
+        Args:
+            render_plan(plan.RenderPlan):
+        """
+        self.beginResetModel()
+        self._plan = render_plan
+        self._order = render_plan.get_sort_order(
+            self._sort_column, self._sort_descending
+        )
+        self._inverse_order = None
+        self.endResetModel()
+
+    def set_failed_items(self, failed_items):
+        """
+        Highlight the rows that failed to render, whatever their status on disk.
+
+        Args:
+            failed_items(dict[tuple[str, int, str], str]): error of each (node, frame, view)
+        """
+        self._failed_items = dict(failed_items)
+        if self._order:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._order) - 1, len(self._column_names) - 1),
+            )
+
+    def set_node_warnings(self, node_warnings):
+        """
+        Highlight the node of the rows of the given nodes.
+
+        Args:
+            node_warnings(dict[str, str]): message for each Write node full name
+        """
+        self._node_warnings = dict(node_warnings)
+        if self._order:
+            column = self.columns["node"]["index"]
+            self.dataChanged.emit(
+                self.index(0, column), self.index(len(self._order) - 1, column)
+            )
+
+    def set_thumbnails(self, provider):
+        """
+        Show a thumbnail of the existing frames next to their frame number.
+
+        Args:
+            provider(ThumbnailProvider or None): None to hide the thumbnails.
+        """
+        self._thumbnails = provider
+        if self._order:
+            column = self.columns["frame"]["index"]
+            self.dataChanged.emit(
+                self.index(0, column), self.index(len(self._order) - 1, column)
+            )
+
+    def _get_failure(self, row):
+        if not self._failed_items:
+            return None
+        plan_ = self._plan
+        key = (plan_.get_node_name(row), plan_.get_frame(row), plan_.get_view(row))
+        return self._failed_items.get(key)
+
+    def get_plan_row(self, index):
+        """
+        Args:
+            index(QtCore.QModelIndex):
+
+        Returns:
+            int or None: row in the plan for the given index
+        """
+        if not index.isValid():
+            return None
+        return self._order[index.row()]
+
+    def notify_rows_changed(self, plan_rows):
+        """
+        Update the views for the given plan rows, whose status changed.
+
+        Args:
+            plan_rows(list[int]):
+        """
+        if not plan_rows:
+            return
+
+        if self._thumbnails is not None:
+            for plan_row in plan_rows:
+                self._thumbnails.discard(self._plan.get_path(plan_row))
+
+        if len(plan_rows) > 1:
+            # avoid building the inverse order, most of the rows probably changed
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._order) - 1, len(self._column_names) - 1),
+            )
+            return
+
+        if self._inverse_order is None:
+            self._inverse_order = [0] * len(self._order)
+            for row, plan_row in enumerate(self._order):
+                self._inverse_order[plan_row] = row
+        row = self._inverse_order[plan_rows[0]]
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self._column_names) - 1)
+        )
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._order)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._column_names)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            column = self._column_names[section]
+            return self.columns[column].get("label", column)
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = self._order[index.row()]
+        column = self._column_names[index.column()]
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == "frame":
+                return str(self._plan.get_frame(row)).zfill(4)
+            elif column == "node":
+                return self._plan.get_node_label(row)
+            elif column == "path":
+                return self._plan.get_path(row)
+            elif column == "view":
+                return self._plan.get_view(row)
+
+        elif column == "frame" and role == QtCore.Qt.DecorationRole:
+            # only called for the visible rows, so only those are decoded
+            if self._thumbnails is None:
+                return None
+            if self._plan.get_status(row) != plan.STATUS_EXISTS:
+                return None
+            return self._thumbnails.get(self._plan.get_path(row))
+
+        elif column == "status" and role == QtCore.Qt.DecorationRole:
+            if self._get_failure(row) is not None:
+                return self._icons.renderfailed
+            return self._status_display[self._plan.get_status(row)][0]
+
+        elif column == "status" and role == QtCore.Qt.ToolTipRole:
+            failure = self._get_failure(row)
+            if failure is not None:
+                return "Frame failed to render: {}".format(failure)
+            return self._status_display[self._plan.get_status(row)][1]
+
+        elif role == QtCore.Qt.ForegroundRole and self._get_failure(row) is not None:
+            return QtGui.QBrush(QtGui.QColor("#D34A44"))
+
+        elif column == "node" and self._node_warnings:
+            warning = self._node_warnings.get(self._plan.get_node_name(row))
+            if warning is None:
+                return None
+            if role == QtCore.Qt.ToolTipRole:
+                return warning
+            if role == QtCore.Qt.ForegroundRole:
+                return QtGui.QBrush(QtGui.QColor("#E0A030"))
+
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self._sort_column = self._column_names[column]
+        self._sort_descending = order == QtCore.Qt.DescendingOrder
+        self.beginResetModel()
+        self._order = self._plan.get_sort_order(
+            self._sort_column, self._sort_descending
+        )
+        self._inverse_order = None
+        self.endResetModel()
+
+
+class WriteNodesView(QtWidgets.QTableView):
+    """
+    A collection of paths that will be created by the associated Write nodes.
+
+    A table view is used as it doesn't need to layout every row of the model,
+    unlike a tree view.
+
+    Args:
+        icons(SvgIcons):
+        scan_cache(scanning.DirectoryScanCache): shared cache to find which path exists on disk.
+    """
+
+    plan_updated = QtCore.Signal()
+    """
+    Emitted when a new plan is displayed, or the status of all its rows was
+    checked on disk.
+    """
+
+    thumbnail_size = (64, 36)
+
+    def __init__(self, icons, scan_cache, parent=None):
+        super(WriteNodesView, self).__init__(parent)
+
+        self._model = WriteNodesModel(icons, self)
+        self._scan_cache = scan_cache
+        self._scanner = DiskScanner(scan_cache, self)
+        self._scanner.scanned.connect(self._on_scanned)
+        self._builder = PlanBuilder(scan_cache, self)
+        self._builder.plan_ready.connect(self._on_plan_ready)
+        self._watcher = DirectoryWatcher(scan_cache, parent=self)
+        self._watcher.changed.connect(self._on_directories_changed)
+        self._thumbnails = None  # type: ThumbnailProvider | None
+        # drop the thumbnails requested for rows scrolled out of view
+        self._scroll_timer = QtCore.QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.setInterval(100)
+        self._scroll_timer.timeout.connect(self._retain_visible_thumbnails)
+
+        self.setModel(self._model)
+        self.setAlternatingRowColors(False)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        # select only one row at a time
+        self.setSelectionMode(self.SingleSelection)
+        # select only rows
+        self.setSelectionBehavior(self.SelectRows)
+        # remove dotted border on columns
+        self.setFocusPolicy(QtCore.Qt.NoFocus)
+
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(header.Interactive)
+        header.setStretchLastSection(True)
+        header.setHighlightSections(False)
+        header.setDefaultAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        header.setSortIndicator(0, QtCore.Qt.AscendingOrder)
+        # only look at the first rows when resizing columns to their content
+        header.setResizeContentsPrecision(20)
+        self.setSortingEnabled(True)
+
+        rows_header = self.verticalHeader()
+        rows_header.hide()
+        # uniform row heights
+        rows_header.setSectionResizeMode(rows_header.Fixed)
+        rows_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self._default_icon_size = self.iconSize()
+        self.verticalScrollBar().valueChanged.connect(self._scroll_timer.start)
+
+        self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+
+        self.customContextMenuRequested[QtCore.QPoint].connect(self._context_menu)
+
+    @property
+    def plan(self):
+        """
+        Returns:
+            plan.RenderPlan:
+        """
+        return self._model.plan
+
+    @property
+    def is_populating(self):
+        """
+        True if a new plan is being built in background.
+        """
+        return self._builder.is_building
+
+    def populate(self, write_nodes, frames, views, background=True):
+        """
+        Clean and fill the tree with new items.
+
+        Args:
+            write_nodes(list[nuke.Node]):
+            frames(list[int]):
+            views(list[str]):
+            background(bool):
+                if True the paths are computed and checked on disk in a background
+                thread and the tree is updated when done. Else it happens immediately.
+        """
+        plan_nodes = render.get_plan_nodes(write_nodes, views) if frames else []
+
+        if background and plan_nodes:
+            self._builder.request(plan_nodes, frames)
+            return
+
+        self._set_plan(self._builder.build(plan_nodes, frames))
+        self.refresh_status()
+
+    def _set_plan(self, render_plan):
+        self._model.set_plan(render_plan)
+        for columnIndex in range(self._model.columnCount()):
+            self.resizeColumnToContents(columnIndex)
+        if self._thumbnails is not None:
+            # resizing requested the thumbnails of rows that may not be visible
+            self._scroll_timer.start()
+        if self.isVisible():
+            self._watcher.watch(render_plan.directories)
+
+    def showEvent(self, event):
+        super(WriteNodesView, self).showEvent(event)
+        if not self._watcher.is_watching:
+            self._watcher.watch(self.plan.directories)
+            # catch up with what changed while hidden
+            self.refresh_status()
+
+    def hideEvent(self, event):
+        self._watcher.stop()
+        if self._thumbnails is not None:
+            self._thumbnails.stop()
+        super(WriteNodesView, self).hideEvent(event)
+
+    @property
+    def thumbnails_visible(self):
+        return self._thumbnails is not None
+
+    def set_thumbnails_visible(self, visible):
+        """
+        Show a thumbnail of the rendered frames, decoded in background when their
+        row is displayed.
+
+        Args:
+            visible(bool):
+        """
+        if visible == self.thumbnails_visible:
+            return
+        rows_header = self.verticalHeader()
+        column = WriteNodesModel.columns["frame"]["index"]
+        width, height = self.thumbnail_size
+        if visible:
+            self._thumbnails = ThumbnailProvider(width, height, parent=self)
+            self._thumbnails.changed.connect(self.viewport().update)
+            self.setIconSize(QtCore.QSize(width, height))
+            rows_header.setDefaultSectionSize(height + 4)
+            # not resized to contents, it would decode the thumbnails of hidden rows
+            self.setColumnWidth(column, self.columnWidth(column) + width + 4)
+        else:
+            self._thumbnails.stop()
+            self._thumbnails.deleteLater()
+            self._thumbnails = None
+            self.setIconSize(self._default_icon_size)
+            rows_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
+            self.resizeColumnToContents(column)
+        self._model.set_thumbnails(self._thumbnails)
+
+    def refresh_status(self):
+        """
+        Check in background which paths exist on disk and update the rows once done.
+        """
+        if not len(self.plan):
+            return
+        self._scanner.scan(self.plan.directories)
+
+    def update_status(self):
+        """
+        Update the rows from what is already known in the directory cache.
+        """
+        changed = self.plan.update_statuses(self._scan_cache.get_cached_entries)
+        self._model.notify_rows_changed(changed)
+
+    def notify_rows_changed(self, rows):
+        """
+        Update the display of the given rows, whose status was changed in the plan.
+
+        Args:
+            rows(list[int]): rows in the plan
+        """
+        self._model.notify_rows_changed(rows)
+
+    def set_row_exists(self, row, exists):
+        """
+        Args:
+            row(int): row in the plan
+            exists(bool): True if the path of the row exists on disk.
+        """
+        status = plan.STATUS_EXISTS if exists else plan.STATUS_MISSING
+        self.set_row_status(row, status)
+
+    def set_row_status(self, row, status):
+        """
+        Args:
+            row(int): row in the plan
+            status(int): one of the ``plan.STATUS_`` constants
+        """
+        if self.plan.set_status(row, status):
+            self._model.notify_rows_changed([row])
+
+    def set_failed_items(self, failed_items):
+        """
+        Args:
+            failed_items(dict[tuple[str, int, str], str]): see :meth:`WriteNodesModel.set_failed_items`
+        """
+        self._model.set_failed_items(failed_items)
+
+    def set_node_warnings(self, node_warnings):
+        """
+        Args:
+            node_warnings(dict[str, str]): see :meth:`WriteNodesModel.set_node_warnings`
+        """
+        self._model.set_node_warnings(node_warnings)
+
+    def update_rendered_path(self, node_name, frame, view, copying=False):
+        """
+        Update the status of the single row written by the given node, frame and view.
+
+        Only that row path is checked on disk so this is cheap enough to be called
+        after each rendered frame, whatever the size of the plan.
+
+        Args:
+            node_name(str): full name of the Write node
+            frame(int):
+            view(str):
+            copying(bool): True if the frame was rendered in a scratch directory
+                and is being copied to its path.
+        """
+        render_plan = self.plan
+        row = render_plan.find_written_row(node_name, frame, view)
+        if row is None:
+            return
+
+        if copying:
+            self.set_row_status(row, plan.STATUS_COPYING)
+            return
+        exists = self._scan_cache.refresh_path(render_plan.get_path(row))
+        self.set_row_exists(row, exists)
+
+    def select_node(self, row):
+        self.plan.get_node(row).setSelected(True)
+
+    def copy_path_to_clipboard(self, row):
+        clipboard = QtWidgets.QApplication.clipboard()
+        clipboard.clear(mode=clipboard.Clipboard)
+        clipboard.setText(self.plan.get_path(row), mode=clipboard.Clipboard)
+
+    def open_path_in_file_explorer(self, row):
+        directory = self.plan.get_directory(row)
+        if not os.path.exists(directory):
+            LOGGER.warning("cannot open non-existing directory '{}'".format(directory))
+            return
+        webbrowser.open(directory)
+
+    @QtCore.Slot(int, object)
+    def _on_plan_ready(self, generation, render_plan):
+        # ignore results of outdated requests, a newer one is in progress
+        if generation != self._builder.generation:
+            return
+        self._set_plan(render_plan)
+        # directories were already scanned by the builder
+        self.update_status()
+        self.plan_updated.emit()
+
+    @QtCore.Slot(int)
+    def _on_scanned(self, generation):
+        # ignore results of outdated scans, a newer one is in progress
+        if generation != self._scanner.generation:
+            return
+        self.update_status()
+        self.plan_updated.emit()
+
+    @QtCore.Slot(object)
+    def _on_directories_changed(self, directories):
+        changed = self.plan.update_statuses(
+            self._scan_cache.get_cached_entries, directories=directories
+        )
+        self._model.notify_rows_changed(changed)
+
+    @QtCore.Slot()
+    def _retain_visible_thumbnails(self):
+        if self._thumbnails is None or not self._model.rowCount():
+            return
+        first = self.rowAt(0)
+        last = self.rowAt(self.viewport().height() - 1)
+        if first < 0:
+            return
+        if last < 0:
+            last = self._model.rowCount() - 1
+        paths = []
+        for row in range(first, last + 1):
+            plan_row = self._model.get_plan_row(self._model.index(row, 0))
+            paths.append(self.plan.get_path(plan_row))
+        self._thumbnails.retain(paths)
+
+    def _context_menu(self, point):
+        """
+        Open a context menu at the given point.
+        """
+        row = self._model.get_plan_row(self.indexAt(point))
+        if row is None:
+            return
+
+        qmenu = QtWidgets.QMenu()
+        action1 = QtWidgets.QAction("Select Node in Nodegraph")
+        action1.triggered.connect(partial(self.select_node, row))
+        qmenu.addAction(action1)
+        action2 = QtWidgets.QAction("Copy Path")
+        action2.triggered.connect(partial(self.copy_path_to_clipboard, row))
+        qmenu.addAction(action2)
+        action3 = QtWidgets.QAction("Open Path in File Explorer")
+        action3.triggered.connect(partial(self.open_path_in_file_explorer, row))
+        qmenu.addAction(action3)
+
+        qmenu.exec_(QtGui.QCursor.pos())
+
+
+class FrameRangeFieldWidget(QtWidgets.QLineEdit):
+    """
+    A field where the user enter a frame range expression that resolve to a list of frames.
+    """
+
+    def __init__(self, parent=None):
+        super(FrameRangeFieldWidget, self).__init__(parent)
+        self.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested[QtCore.QPoint].connect(self._on_contextmenu)
+
+    def set_framerange_from_project(self):
+        framerange = str(nuke.root().frameRange())
+        LOGGER.debug("setting framerange '{}' from root".format(framerange))
+        self.setText(framerange)
+
+    def set_framerange_from_frame(self, frame=None):
+        if frame is None:
+            frame = nuke.frame()
+        LOGGER.debug("setting framerange to frame '{}' ".format(frame))
+        self.setText("{}-{}".format(frame, frame))
+
+    def set_framerange_from_active_node(self):
+        try:
+            activeInput = nuke.activeViewer().activeInput()
+            framerange = nuke.activeViewer().node().upstreamFrameRange(activeInput)
+            framerange = str(framerange)
+        except:
+            return self.set_framerange_from_project()
+
+        LOGGER.debug("setting framerange '{}' from active node".format(framerange))
+        self.setText(framerange)
+
+    def set_framerange_viewer_inout(self, viewer):
+        """
+        Args:
+            viewer(nuke.Viewer):
+        """
+        framerange = str(viewer.playbackRange())
+        self.setText(framerange)
+
+    def set_framerange_viewer_visible(self, viewer):
+        """
+        Args:
+            viewer(nuke.Viewer):
+        """
+        framerange = str(viewer.visibleRange())
+        self.setText(framerange)
+
+    def set_invalid_framerange_state(self, enabled):
+        """
+        Args:
+            enabled(bool):
+        """
+        if enabled:
+            self.setStyleSheet("QWidget{ background-color: #7B2E36;}")
+            self.setToolTip("Invalid frame range expression.")
+        else:
+            self.setStyleSheet("")
+            self.setToolTip("")
+
+    def get_frames(self):
+        """
+        Returns:
+            frameset.FrameSet:
+        """
+        return render.parse_frames(self.text())
+
+    def _on_contextmenu(self, point):
+        menu = self.createStandardContextMenu()
+        menu.addSection("Presets")
+        menu.addAction("project", self.set_framerange_from_project)
+        menu.addAction("active viewer input", self.set_framerange_from_active_node)
+        menu.addAction("current frame", self.set_framerange_from_frame)
+        menu.addAction("frame 1", partial(self.set_framerange_from_frame, 1))
+
+        for viewer_node in nuke.allNodes("Viewer", nuke.Root()):
+            viewermenu = menu.addMenu(viewer_node.name())
+            viewermenu.addAction(
+                "in-out", partial(self.set_framerange_viewer_inout, viewer_node)
+            )
+            viewermenu.addAction(
+                "visible", partial(self.set_framerange_viewer_visible, viewer_node)
+            )
+
+        menu.exec_(QtGui.QCursor.pos())
+
+    def save_settings(self, settings):
+        """
+        Args:
+            settings(QtCore.QSettings):
+        """
+        settings.beginGroup("framerangeselector")
+        settings.setValue("expression", self.text())
+        settings.endGroup()
+
+    def load_settings(self, settings):
+        """
+        Args:
+            settings(QtCore.QSettings):
+        """
+        settings.beginGroup("framerangeselector")
+        if settings.contains("expression"):
+            value = settings.value("expression", type=str)
+            self.setText(value)
+        settings.endGroup()
+
+
+class ViewSelectWidget(QtWidgets.QPushButton):
+    """
+    A combobox looking button that allow to check which views you want to render.
+    """
+
+    selected_views_changed = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(ViewSelectWidget, self).__init__(parent)
+        self._menu = QtWidgets.QMenu(self)
+        self._selected_views = []
+
+        self.setMenu(self._menu)
+        self.setToolTip(
+            "Filter out which views to render. The original list of view is determined "
+            "on the Write node and this widget can only reduce the numebr of view "
+            "to render but not render new ones."
+        )
+
+        for view in nuke.views():
+            action = self._menu.addAction(view)  # type: QtWidgets.QAction
+            action.setCheckable(True)
+            action.changed.connect(self._on_action_triggerred)
+
+    @property
+    def selected_views(self):
+        """
+        Returns:
+            list[str]:
+        """
+        return self._selected_views
+
+    def set_first_view_selected(self):
+        for action in self._menu.actions():
+            action.setChecked(True)
+            break
+
+    def set_selected_views(self, views, selected):
+        """
+        Args:
+            views(list[str]): list of view name
+            selected(bool): state to set
+        """
+        for action in self._menu.actions():
+            if action.text() in views:
+                action.setChecked(selected)
+            else:
+                action.setChecked(not selected)
+
+    def _on_action_triggerred(self, *args):
+        self._selected_views = []
+        for action in self._menu.actions():
+            if action.isChecked():
+                self._selected_views.append(action.text())
+
+        label = ", ".join(self._selected_views)
+        self.setText(label)
+        self.selected_views_changed.emit()
+
+    def save_settings(self, settings):
+        """
+        Args:
+            settings(QtCore.QSettings):
+        """
+        settings.beginGroup("viewselector")
+        settings.setValue("selected", ",".join(self.selected_views))
+        settings.endGroup()
+
+    def load_settings(self, settings):
+        """
+        Args:
+            settings(QtCore.QSettings):
+        """
+        settings.beginGroup("viewselector")
+        if settings.contains("selected"):
+            value = settings.value("selected", type=str)  # type: str
+            views = value.split(",")
+            self.set_selected_views(views, selected=True)
+        settings.endGroup()
+
+
+class WriteNodeSelectorWidget(QtWidgets.QComboBox):
+    option_selection = "Selected Write Nodes"
+    option_all = "All Write Nodes"
+    option_this = "This current Write Node"
+    options = [option_selection, option_all, option_this]
+
+    def __init__(self, parent=None):
+        super(WriteNodeSelectorWidget, self).__init__(parent)
+        self.addItems(self.options)
+        self.setCurrentIndex(-1)
+
+    def set_current_option(self, option_name):
+        """
+        Args:
+            option_name(str):
+        """
+        option_index = self.options.index(option_name)
+        self.setCurrentIndex(option_index)
+
+    def get_selected_nodes(self):
+        """
+        Returns:
+            list[nuke.Node]:
+        """
+        option = self.currentText()
+        if option == self.option_selection:
+            return nuke.selectedNodes("Write")
+        elif option == self.option_all:
+            return render.get_write_nodes()
+        else:
+            node = nuke.thisNode()
+            return [node] if node.Class() == "Write" else []
+
+    def save_settings(self, settings):
+        """
+        Args:
+            settings(QtCore.QSettings):
+        """
+        settings.beginGroup("writenodeselector")
+        settings.setValue("selected", self.currentText())
+        settings.endGroup()
+
+    def load_settings(self, settings):
+        """
+        Args:
+            settings(QtCore.QSettings):
+        """
+        settings.beginGroup("writenodeselector")
+        if settings.contains("selected"):
+            value = settings.value("selected", type=str)
+            self.set_current_option(value)
+        settings.endGroup()
+
+
+class LocaloRenderDialog(QtWidgets.QDialog):
+    """
+    Args:
+        node_selection_mode(str or None):
+        lock_settings(bool): True to disabel the QSettings system
+    """
+
+    # emitted from the thread verifying frames
+    _verify_progressed = QtCore.Signal(int, int)
+    # emitted from the thread copying files to the read cache
+    _cache_progressed = QtCore.Signal(int, int)
+
+    def __init__(self, node_selection_mode=None, lock_settings=False):
+        super(LocaloRenderDialog, self).__init__()
+        LOGGER.debug("{}({})".format(self.__class__.__name__, node_selection_mode))
+        if (
+            node_selection_mode
+            and node_selection_mode not in WriteNodeSelectorWidget.options
+        ):
+            raise ValueError(
+                "Unsuported node selection mode '{}', expected one of {}"
+                "".format(node_selection_mode, WriteNodeSelectorWidget.options)
+            )
+
+        # we instance once at tree level to avoid to many IO calls
+        self._icons = SvgIcons()
+        # shared by the tree and the render to check which frames exist on disk
+        self._scan_cache = scanning.DirectoryScanCache()
+        # Write nodes are listed again on each refresh: cache them for the session,
+        # resolved again when the dialog opens as callbacks may have been missed
+        nodeindex.get_index().install()
+        nodeindex.get_index().invalidate()
+        self._app_settings = QtCore.QSettings("liamcollod.nuke", APPNAME)
+        self._enable_settings = False
+        if not lock_settings and self._app_settings.contains(".enabled"):
+            self._enable_settings = True
+
+        self._write_nodes = []  # type: list[nuke.Node]
+        self._frames = frameset.FrameSet()  # type: frameset.FrameSet
+        self._views = []  # type: list[str]
+        self._render_pool = None  # type: engine.RenderPool | None
+        self._render_plan = None  # type: plan.RenderPlan | None
+        self._render_tmpdir = None  # type: str | None
+        self._render_errors = []  # type: list[str]
+        self._render_stats = None  # type: stats.RenderStats | None
+        self._progress_tooltip_time = 0.0
+        self._render_manifest = None  # type: manifest.ManifestWriter | None
+        self._render_fingerprints = {}  # type: dict[int, str]
+        # if the frames of the current render must be verified once finished
+        self._render_verify = False
+        self._render_hung_count = 0
+        self._render_forecast = None  # type: forecast.OutputForecast | None
+        self._forecast_update = None  # type: BackgroundCall | None
+        self._forecast_update_pending = False
+        self._render_use_proxy = False
+        self._render_workers = 0
+        self._render_rows = []  # type: list[int]
+        self._render_cancelled = False
+        self._render_preparation = None  # type: BackgroundCall | None
+        self._render_preparation_cancel = None  # type: callable | None
+        # (resume, retry) of a render waiting for the plan to be built
+        self._pending_launch = None  # type: tuple[bool, bool] | None
+        self._render_verification = None  # type: BackgroundCall | None
+        # error of the (node, frame, view) that failed in the last renders
+        self._failed_items = {}  # type: dict[tuple[str, int, str], str]
+        self._retry_attempt = 0
+        self._retry_pending = False
+        self._render_timer = QtCore.QTimer(self)
+        self._render_timer.setInterval(250)
+        self._write_behind = None  # type: scratch.WriteBehindQueue | None
+        self._read_cache = None  # type: readcache.ReadCache | None
+        self._history = history.RenderHistory()
+        # node statistics and regressions of each (script, proxy) in the history,
+        # loaded in background and cleared after each render
+        self._history_cache = {}  # type: dict[tuple[str, bool], tuple[dict, list]]
+        self._history_loading = None  # type: BackgroundCall | None
+        self._transfer_timer = QtCore.QTimer(self)
+        self._transfer_timer.setInterval(250)
+        # delay before the paths are computed again after the frame-range is edited
+        self._populate_timer = QtCore.QTimer(self)
+        self._populate_timer.setSingleShot(True)
+        self._populate_timer.setInterval(300)
+
+        self._layout = QtWidgets.QVBoxLayout()
+        self._layout_header = QtWidgets.QHBoxLayout()
+        self._layout_footer = QtWidgets.QHBoxLayout()
+        self._layout_buttons = QtWidgets.QHBoxLayout()
+
+        self._tree = WriteNodesView(icons=self._icons, scan_cache=self._scan_cache)
+        self._menubar = QtWidgets.QMenuBar()
+        self._label_title = QtWidgets.QLabel(
+            "<b>{} <sub>v{}</sub></b>".format(APPNAME, __version__)
+        )
+        self._label_frames = QtWidgets.QLabel("Frame Range")
+        self._field_frames = FrameRangeFieldWidget()
+        self._button_help = QtWidgets.QToolButton()
+        self._label_nodes = QtWidgets.QLabel("Nodes")
+        self._node_selector = WriteNodeSelectorWidget()
+        self._button_refresh = QtWidgets.QToolButton()
+        self._option_thumbnails = QtWidgets.QCheckBox("Thumbnails")
+        self._button_render = QtWidgets.QPushButton("Render")
+        self._button_resume = QtWidgets.QPushButton("Resume")
+        self._button_retry = QtWidgets.QPushButton("Retry Failed")
+        self._label_progress = QtWidgets.QLabel()
+        self._views_selector = ViewSelectWidget()
+        self._option_proxy = QtWidgets.QCheckBox("Use Proxy")
+        self._option_continue_error = QtWidgets.QCheckBox("Continue On Error")
+        self._option_skip_existing = QtWidgets.QCheckBox("Skip Existing Frames")
+        self._option_incremental = QtWidgets.QCheckBox("Only Outdated")
+        self._option_scratch = QtWidgets.QCheckBox("Render To Local Scratch")
+        self._option_read_cache = QtWidgets.QCheckBox("Cache Read Files")
+        self._option_verify = QtWidgets.QCheckBox("Verify Frames")
+        self._option_watchdog = QtWidgets.QCheckBox("Restart Hung Frames")
+        self._label_workers = QtWidgets.QLabel("Workers")
+        self._option_workers = QtWidgets.QSpinBox()
+        self._option_autoscale = QtWidgets.QCheckBox("Auto")
+        self._label_retries = QtWidgets.QLabel("Retries")
+        self._option_retries = QtWidgets.QSpinBox()
+        self._option_retry_backoff = QtWidgets.QDoubleSpinBox()
+        self._label_frame_order = QtWidgets.QLabel("Order")
+        self._option_frame_order = QtWidgets.QComboBox()
+        self._option_stride = QtWidgets.QSpinBox()
+
+        self._menubar.setCornerWidget(self._label_title, QtCore.Qt.Corner.TopLeftCorner)
+        menu = self._menubar.addMenu("Settings")
+        menu.setDisabled(lock_settings)
+        self._settings_action = menu.addAction("Enable Settings")
+        self._settings_action.setToolTip(
+            "Enable or disable settings saving/loading when the UI is created."
+        )
+        self._settings_action.setCheckable(True)
+        self._settings_action.setChecked(self._enable_settings)  # before signal !
+        self._settings_action.triggered.connect(self._on_toggle_settings)
+        menu.addAction("Reset Default Settings", self.reset_settings)
+        menu.addAction("Save Current Settings", self.save_settings)
+        menu = self._menubar.addMenu("Help")
+        menu.addAction("Open Reference", self._on_open_ref)
+        menu.addAction("Open Documentation", self._on_open_doc)
+        menu.addAction("Report An Issue", self._on_report_issue)
+
+        self.setLayout(self._layout)
+        self._layout.addWidget(self._menubar)
+        self._layout.addSpacing(10)
+        self._layout.addLayout(self._layout_header)
+        self._layout.addWidget(self._tree)
+        self._layout.addLayout(self._layout_footer)
+        self._layout.addWidget(self._label_progress)
+        self._layout.addLayout(self._layout_buttons)
+        self._layout_buttons.addWidget(self._button_render, 1)
+        self._layout_buttons.addWidget(self._button_resume)
+        self._layout_buttons.addWidget(self._button_retry)
+        self._layout_header.addWidget(self._label_frames)
+        self._layout_header.addWidget(self._field_frames)
+        self._layout_header.addWidget(self._button_help)
+        self._layout_header.addWidget(self._label_nodes)
+        self._layout_header.addWidget(self._node_selector)
+        self._layout_header.addStretch(1)
+        self._layout_header.addWidget(self._option_thumbnails)
+        self._layout_header.addWidget(self._button_refresh)
+        self._layout_footer.addWidget(self._views_selector)
+        self._layout_footer.addWidget(self._label_workers)
+        self._layout_footer.addWidget(self._option_workers)
+        self._layout_footer.addWidget(self._option_autoscale)
+        self._layout_footer.addWidget(self._label_retries)
+        self._layout_footer.addWidget(self._option_retries)
+        self._layout_footer.addWidget(self._option_retry_backoff)
+        self._layout_footer.addWidget(self._label_frame_order)
+        self._layout_footer.addWidget(self._option_frame_order)
+        self._layout_footer.addWidget(self._option_stride)
+        self._layout_footer.addStretch(1)
+        self._layout_footer.addWidget(self._option_proxy)
+        self._layout_footer.addWidget(self._option_continue_error)
+        self._layout_footer.addWidget(self._option_skip_existing)
+        self._layout_footer.addWidget(self._option_incremental)
+        self._layout_footer.addWidget(self._option_scratch)
+        self._layout_footer.addWidget(self._option_read_cache)
+        self._layout_footer.addWidget(self._option_verify)
+        self._layout_footer.addWidget(self._option_watchdog)
+
+        self.setWindowTitle("local render from Write node")
+        self._layout.setContentsMargins(15, 5, 15, 15)
+        self._button_refresh.setIcon(self._icons.reload)
+        self._option_thumbnails.setToolTip(
+            "Show a thumbnail of the frames existing on disk.<br>"
+            "Only the displayed rows are decoded, in background."
+        )
+        self._button_refresh.setToolTip(
+            "Reload the below list of paths from the Write nodes, resolving\n"
+            "their path again.\n"
+            "Files appearing on disk are updated automatically."
+        )
+        self._option_incremental.setToolTip(
+            "Skip existing frames, unless the nodes upstream or the files they read "
+            "changed since the frames were rendered.<br>"
+            "Frames rendered without this option are always considered outdated."
+        )
+        self._option_scratch.setToolTip(
+            "Render to a local scratch directory (${}, or the system temporary "
+            "directory) and copy the frames to their path in background.<br>"
+            "Faster when the output paths are on a slow network storage. "
+            "Not available with proxy."
+            "".format(scratch.SCRATCH_DIR_ENV)
+        )
+        self._option_read_cache.setToolTip(
+            "Before rendering, copy the files read upstream to a local cache (${}, "
+            "or the system temporary directory) and read them from there.<br>"
+            "The least recently used files are removed above ${} gigabytes "
+            "(default {})."
+            "".format(
+                readcache.CACHE_DIR_ENV,
+                readcache.CACHE_SIZE_ENV,
+                readcache.DEFAULT_MAX_SIZE // 1024**3,
+            )
+        )
+        self._option_verify.setToolTip(
+            "Read the header of the frames to find the truncated or corrupt ones "
+            "(EXR, DPX, PNG and JPEG).<br>"
+            "Existing corrupt frames are not skipped, and rendered frames found "
+            "corrupt are reported as failed."
+        )
+        self._option_watchdog.setToolTip(
+            "With workers, kill and render again the frames taking more than {:g} "
+            "times the median frame time of the render (and at least {:g}s), like "
+            "on a stalled network read.<br>"
+            "A frame hanging a second time is reported as failed.<br>"
+            "Renders in the current session are not watched."
+            "".format(watchdog.DEFAULT_TIMEOUT_FACTOR, watchdog.DEFAULT_MIN_TIMEOUT)
+        )
+        self._option_skip_existing.setToolTip(
+            "Frames that are already existing on disk will not be rendered again."
+        )
+        self._button_retry.setToolTip(
+            "Render again only the frames that failed in the previous renders."
+        )
+        self._button_retry.setEnabled(False)
+        self._option_retries.setRange(0, 10)
+        self._option_retries.setToolTip(
+            "Number of times the frames that failed are automatically rendered again."
+        )
+        self._label_retries.setToolTip(self._option_retries.toolTip())
+        self._option_retry_backoff.setRange(0, 3600)
+        self._option_retry_backoff.setDecimals(1)
+        self._option_retry_backoff.setSuffix(" s")
+        self._option_retry_backoff.setToolTip(
+            "Delay before the first retry, doubled on each following retry."
+        )
+        self._button_resume.setToolTip(
+            "Only render the frames that previous renders didn't confirm as finished."
+        )
+        self._option_workers.setRange(0, os.cpu_count() or 1)
+        self._option_workers.setSpecialValueText("current session")
+        self._option_workers.setToolTip(
+            "Number of background nuke processes rendering in parallel.<br>"
+            "With 0 the render happens in the current session, blocking the GUI."
+        )
+        self._label_workers.setToolTip(self._option_workers.toolTip())
+        self._option_autoscale.setToolTip(
+            "Adjust the number of background processes during the render, and how "
+            "many threads they use, from the available memory and the peak memory "
+            "of the first frames of each node.<br>"
+            "Workers is then the maximum number of processes, all the CPUs if 0."
+        )
+        for frame_order, label in schedule.FRAME_ORDERS.items():
+            self._option_frame_order.addItem(label, frame_order)
+        self._option_frame_order.setToolTip(
+            "Order in which the frames are rendered.<br>"
+            "The progressive orders render a coarse preview of the whole range "
+            "first, then fill the frames in between."
+        )
+        self._label_frame_order.setToolTip(self._option_frame_order.toolTip())
+        self._option_stride.setRange(2, 1000)
+        self._option_stride.setPrefix("N=")
+        self._option_stride.setToolTip(
+            "Interval between the frames rendered first by the "
+            "'Every Nth Frame First' order."
+        )
+        self._button_help.setIcon(self._icons.help)
+        self._button_help.setToolTip(
+            "Nuke syntax for frame-ranges. Examples:<ul><li>3</li><li>1 3 4 8</li><li>1-10</li><li>1-10×2</li><li>1-10×2 10-30x3</li></ul>"
+            "You can right click the field to show presets."
+        )
+
+        self._field_frames.textChanged.connect(self._on_framerange_modified)
+        self._button_render.clicked.connect(self._on_render_clicked)
+        self._button_resume.clicked.connect(self._on_resume_clicked)
+        self._button_retry.clicked.connect(self._on_retry_clicked)
+        self._render_timer.timeout.connect(self._on_render_pool_poll)
+        self._option_frame_order.currentIndexChanged.connect(
+            self._on_frame_order_modified
+        )
+        self._transfer_timer.timeout.connect(self._on_transfer_poll)
+        self._option_workers.valueChanged.connect(self._on_workers_modified)
+        self._option_autoscale.toggled.connect(self._on_workers_modified)
+        self._on_workers_modified()
+        self._tree.plan_updated.connect(self._update_prediction)
+        self._tree.plan_updated.connect(self._on_plan_updated)
+        self._populate_timer.timeout.connect(self._on_framerange_settled)
+        self._verify_progressed.connect(self._on_verify_progress)
+        self._cache_progressed.connect(self._on_cache_progress)
+        self._button_refresh.clicked.connect(self._on_refresh_clicked)
+        self._option_thumbnails.toggled.connect(self._tree.set_thumbnails_visible)
+        self._button_help.clicked.connect(self._on_framerange_help)
+        self._views_selector.selected_views_changed.connect(self._on_views_modified)
+        self._node_selector.currentIndexChanged.connect(
+            self._on_node_selection_mode_modified
+        )
+
+        # those functions are last cause need to trigger signals we just connected:
+
+        settings_loaded = self.load_settings()
+        if not settings_loaded:
+            self.set_defaults(node_selection_mode)
+
+    def hideEvent(self, event):
+        LOGGER.debug("saving settings;")
+        self.save_settings()
+        super(LocaloRenderDialog, self).hideEvent(event)
+
+    def updateValue(self):
+        """
+        This method is expected by Nuke but is useless.
+        """
+        pass
+
+    def populate(self, background=True):
+        """
+        Args:
+            background(bool): see :meth:`WriteNodesView.populate`
+        """
+        LOGGER.info(
+            "_write_nodes={} _frames={} _views={}"
+            "".format(self._write_nodes, len(self._frames), self._views)
+        )
+        self._tree.populate(
+            write_nodes=self._write_nodes,
+            frames=self._frames,
+            views=self._views,
+            background=background,
+        )
+
+    def update_internals(self):
+        self._populate_timer.stop()
+        self._write_nodes = self._node_selector.get_selected_nodes()
+        self._views = self._views_selector.selected_views
+        self._update_internal_framerange()
+        self.populate()
+
+    def set_defaults(self, node_selection_mode=None):
+        self._option_proxy.setChecked(False)
+        self._option_continue_error.setChecked(False)
+        self._option_skip_existing.setChecked(False)
+        self._option_incremental.setChecked(False)
+        self._option_scratch.setChecked(False)
+        self._option_read_cache.setChecked(False)
+        self._option_verify.setChecked(False)
+        self._option_watchdog.setChecked(True)
+        self._option_thumbnails.setChecked(False)
+        self._option_workers.setValue(0)
+        self._option_autoscale.setChecked(False)
+        self._option_retries.setValue(0)
+        self._option_retry_backoff.setValue(5.0)
+        self._set_frame_order(schedule.ORDER_ASCENDING)
+        self._option_stride.setValue(schedule.DEFAULT_STRIDE)
+        self._field_frames.set_framerange_from_project()
+        self._node_selector.set_current_option(
+            node_selection_mode or self._node_selector.option_selection
+        )
+        self._views_selector.set_first_view_selected()
+
+    @property
+    def frame_order(self):
+        """
+        Returns:
+            str: one of the ``schedule.ORDER_`` constants
+        """
+        return self._option_frame_order.currentData()
+
+    def _set_frame_order(self, frame_order):
+        index = self._option_frame_order.findData(frame_order)
+        if index >= 0:
+            self._option_frame_order.setCurrentIndex(index)
+        self._option_stride.setEnabled(frame_order == schedule.ORDER_STRIDE)
+
+    @property
+    def is_rendering(self):
+        """
+        True if a render in background processes is in progress.
+        """
+        return self._render_pool is not None
+
+    @property
+    def is_preparing(self):
+        """
+        True if what a render needs is being computed in background before it starts.
+        """
+        return self._render_preparation is not None or self._pending_launch is not None
+
+    @property
+    def is_verifying(self):
+        """
+        True if the frames of the last render are being verified in background.
+        """
+        return self._render_verification is not None
+
+    @property
+    def is_copying(self):
+        """
+        True if frames rendered in a local scratch directory are still being copied.
+        """
+        return self._write_behind is not None
+
+    def launch_render(self, resume=False, retry=False):
+        """
+        Args:
+            resume(bool):
+                True to only render the frames not recorded as finished in the
+                render manifests, instead of using the "skip existing" option.
+            retry(bool):
+                True to only render the frames that failed in the previous renders.
+        """
+        if self.is_rendering or self.is_preparing or self.is_verifying:
+            LOGGER.warning("cannot launch render: a render is already in progress")
+            return
+        if self.is_copying:
+            LOGGER.warning(
+                "cannot launch render: the previous render is still being copied"
+            )
+            return
+
+        # the frame-range may have been edited right before clicking
+        if self._populate_timer.isActive():
+            self._populate_timer.stop()
+            self._update_internal_framerange()
+            self.populate()
+        if self._tree.is_populating:
+            LOGGER.debug("waiting for render plan to be updated")
+            self._pending_launch = (resume, retry)
+            self._button_render.setText("Cancel Render")
+            self._button_resume.setEnabled(False)
+            self._label_progress.setText("Waiting for the frame list...")
+            return
+
+        LOGGER.debug("saving settings")
+        self.save_settings()
+        self._render_cancelled = False
+        if not retry:
+            self._retry_attempt = 0
+        skip_existing = self._option_skip_existing.isChecked()
+        incremental = self._option_incremental.isChecked()
+        # incremental render always skip existing frames that are up-to-date
+        skip_existing = skip_existing or incremental
+        continue_error = self._option_continue_error.isChecked()
+        use_proxy = self._option_proxy.isChecked()
+        max_workers = self._option_workers.value()
+        autoscale_workers = self._option_autoscale.isChecked()
+        if autoscale_workers and not max_workers:
+            max_workers = autoscale.get_cpu_count()
+        frame_order = self.frame_order
+        stride = self._option_stride.value()
+        use_scratch = self._option_scratch.isChecked()
+        if use_scratch and use_proxy:
+            LOGGER.warning("rendering to a local scratch is not supported with proxy")
+            use_scratch = False
+
+        render_plan = self._tree.plan
+        if retry:
+            skip_existing = False
+        self._render_verify = self._option_verify.isChecked()
+        self._render_use_proxy = use_proxy
+        self._render_workers = max_workers
+        # existing frames are checked again on disk in background, the rows to
+        # render are then only known once prepared
+        check_existing = skip_existing and not resume
+        verify_existing = check_existing and self._render_verify
+        rows = None
+        if retry:
+            rows = render.get_item_rows(render_plan, self._failed_items)
+        elif not check_existing:
+            rows = render.get_rows_to_render(render_plan, skip_existing, resume=resume)
+
+        launch_prepared = partial(
+            self._launch_prepared_render,
+            render_plan,
+            rows,
+            skip_existing=skip_existing,
+            retry=retry,
+            use_proxy=use_proxy,
+            continue_error=continue_error,
+            max_workers=max_workers,
+            autoscale_workers=autoscale_workers,
+            frame_order=frame_order,
+            stride=stride,
+            use_scratch=use_scratch,
+        )
+        if not (incremental or check_existing):
+            launch_prepared(PreparedRender({}, None, [], [], {}))
+            return
+
+        # without known rows, all the frames on disk must be checked for changes
+        fingerprint_rows = range(len(render_plan)) if rows is None else rows
+        node_fingerprints = {}
+        if incremental:
+            # nuke can only be used from the main thread
+            node_fingerprints = fingerprint.get_node_fingerprints(
+                render_plan, fingerprint_rows, use_proxy=use_proxy
+            )
+        scan_cache = self._scan_cache
+        verify_progressed = self._verify_progressed
+
+        def prepare():
+            changed_rows = []
+            verified_rows = []
+            corrupt_rows = {}
+            if check_existing:
+                # only the directories modified since their last scan are listed
+                scan_cache.scan(render_plan.directories)
+                changed_rows = render_plan.update_statuses(
+                    scan_cache.get_cached_entries
+                )
+            if verify_existing:
+                verified_rows = render.get_existing_rows(render_plan)
+                corrupt_rows = verify.verify_rows(
+                    render_plan, verified_rows, progress_callback=verify_progressed.emit
+                )
+            fingerprints = {}
+            stale_rows = None
+            if incremental:
+                fingerprints = fingerprint.get_fingerprints(
+                    render_plan,
+                    fingerprint_rows,
+                    scan_cache,
+                    node_fingerprints=node_fingerprints,
+                )
+                if rows is None:
+                    stale_rows = fingerprint.get_stale_rows(render_plan, fingerprints)
+            return PreparedRender(
+                fingerprints, stale_rows, changed_rows, verified_rows, corrupt_rows
+            )
+
+        self._prepare_render(prepare, launch_prepared)
+
+    def _prepare_render(self, function, callback, message=None, cancel=None):
+        """
+        Compute what the render needs in background, then launch it.
+
+        Args:
+            function(callable): called in background.
+            callback(callable): called with the result of the function to launch
+                the render.
+            message(str or None): shown until the function returns.
+            cancel(callable or None): stop the function, from the GUI thread, when
+                the render is cancelled. Else its result is only ignored.
+        """
+        self._button_render.setText("Cancel Render")
+        self._button_resume.setEnabled(False)
+        self._label_progress.setText(message or "Preparing render...")
+        self._render_preparation = BackgroundCall(
+            function,
+            partial(self._on_render_prepared, callback),
+            error_callback=self._on_render_preparation_failed,
+            parent=self,
+        )
+        self._render_preparation_cancel = cancel
+        self._render_preparation.start()
+
+    def cancel_render_preparation(self):
+        """
+        Stop preparing the render, if it is.
+        """
+        if not self.is_preparing:
+            return
+        LOGGER.info("cancelling render preparation")
+        self._render_cancelled = True
+        if self._pending_launch is not None:
+            self._pending_launch = None
+            self._label_progress.clear()
+            self._button_render.setText("Render")
+            self._button_resume.setEnabled(True)
+            return
+        self._render_preparation.cancel()
+        if self._render_preparation_cancel is not None:
+            self._render_preparation_cancel()
+        self._end_render_preparation()
+        self._render_rows = []
+        self._release_read_cache()
+
+    def _end_render_preparation(self):
+        self._render_preparation.deleteLater()
+        self._render_preparation = None
+        self._render_preparation_cancel = None
+        self._label_progress.clear()
+        self._button_render.setText("Render")
+        self._button_resume.setEnabled(True)
+
+    def _on_render_prepared(self, callback, prepared):
+        self._end_render_preparation()
+        callback(prepared)
+
+    def _on_render_preparation_failed(self, error):
+        self._end_render_preparation()
+        self._release_read_cache()
+        nuke.critical("Cannot prepare the render: {}".format(error))
+
+    def _launch_prepared_render(
+        self,
+        render_plan,
+        rows,
+        prepared,
+        skip_existing,
+        retry,
+        use_proxy,
+        continue_error,
+        max_workers,
+        autoscale_workers,
+        frame_order,
+        stride,
+        use_scratch,
+    ):
+        """
+        Render the given rows, once what they need was prepared.
+
+        Args:
+            render_plan(plan.RenderPlan):
+            rows(list[int] or None): rows to render, None to find them from the
+                ``skip_existing`` option and the prepared stale rows.
+            prepared(PreparedRender):
+            skip_existing(bool):
+            retry(bool):
+            use_proxy(bool):
+            continue_error(bool):
+            max_workers(int): 0 to render in this nuke session.
+            autoscale_workers(bool):
+            frame_order(str): one of the ``schedule.ORDER_`` constants
+            stride(int):
+            use_scratch(bool):
+        """
+        self._render_fingerprints = prepared.fingerprints
+        self._tree.notify_rows_changed(prepared.changed_rows)
+        if prepared.verified_rows:
+            render.set_verified_statuses(
+                render_plan, prepared.verified_rows, prepared.corrupt_rows
+            )
+            self._tree.notify_rows_changed(list(prepared.corrupt_rows))
+        if rows is None:
+            rows = render.get_rows_to_render(
+                render_plan, skip_existing, stale_rows=prepared.stale_rows
+            )
+        self._render_rows = rows
+        self._button_retry.setEnabled(False)
+
+        start_render = partial(
+            self._start_render,
+            render_plan,
+            rows,
+            use_proxy=use_proxy,
+            continue_error=continue_error,
+            max_workers=max_workers,
+            autoscale_workers=autoscale_workers,
+            frame_order=frame_order,
+            stride=stride,
+            use_scratch=use_scratch,
+        )
+        cache_and_start = partial(
+            self._cache_reads_and_start, render_plan, rows, use_proxy, start_render
+        )
+        self._render_forecast = None
+        if rows and not retry:
+            if autoscale_workers:
+                max_workers = autoscale.get_initial_workers(max_workers)
+            self._forecast_output(
+                render_plan, rows, use_proxy, max_workers, cache_and_start
+            )
+        else:
+            cache_and_start()
+
+    def _cache_reads_and_start(self, render_plan, rows, use_proxy, start_render):
+        """
+        Copy the read files to the read cache if enabled, then call ``start_render``
+        with the nodes to point to the cache.
+        """
+        if self._option_read_cache.isChecked() and rows:
+            self._prefetch_reads(render_plan, rows, use_proxy, start_render)
+        else:
+            start_render([])
+
+    def _start_render(
+        self,
+        render_plan,
+        rows,
+        cached_reads,
+        use_proxy,
+        continue_error,
+        max_workers,
+        autoscale_workers,
+        frame_order,
+        stride,
+        use_scratch,
+    ):
+        """
+        Render the given rows, in this nuke session or in background processes.
+
+        Args:
+            render_plan(plan.RenderPlan):
+            rows(list[int]):
+            cached_reads(list[nuke.Node]): nodes to point to the read cache.
+            use_proxy(bool):
+            continue_error(bool):
+            max_workers(int): 0 to render in this nuke session.
+            autoscale_workers(bool):
+            frame_order(str): one of the ``schedule.ORDER_`` constants
+            stride(int):
+            use_scratch(bool):
+        """
+        if use_scratch and rows:
+            self._write_behind = scratch.WriteBehindQueue()
+            LOGGER.info(
+                "rendering to scratch directory '{}'".format(
+                    self._write_behind.scratch_dir
+                )
+            )
+
+        if max_workers:
+            self._launch_parallel_render(
+                render_plan,
+                rows,
+                max_workers=max_workers,
+                use_proxy=use_proxy,
+                continue_error=continue_error,
+                cached_reads=cached_reads,
+                frame_order=frame_order,
+                stride=stride,
+                autoscale_workers=autoscale_workers,
+                restart_hung=self._option_watchdog.isChecked(),
+            )
+            return
+
+        self._start_render_stats(len(rows))
+        self._render_plan = render_plan
+        self._render_errors = []
+        self._render_manifest = manifest.ManifestWriter()
+        original_reads = {}
+        if cached_reads:
+            original_reads = self._read_cache.redirect(cached_reads)
+        errors = []
+        try:
+            errors += render.render_in_session(
+                render_plan,
+                rows,
+                use_proxy=use_proxy,
+                continue_on_error=continue_error,
+                before_frame=self._on_frame_render_started,
+                after_frame=self._on_frame_rendered,
+                manifest_writer=self._render_manifest,
+                write_behind=self._write_behind,
+                frame_order=frame_order,
+                stride=stride,
+            )
+        finally:
+            render.restore_file_knobs(original_reads)
+            self._release_read_cache()
+            self._stop_render_stats()
+            if self.is_copying:
+                self._wait_for_transfers()
+                self._report_render_errors(errors)
+            else:
+                self._finish_render_manifest(
+                    on_finished=partial(self._report_render_errors, errors)
+                )
+
+    def cancel_render(self):
+        """
+        Stop the render in background processes, if any.
+        """
+        if not self.is_rendering:
+            return
+        LOGGER.info("cancelling render")
+        self._render_cancelled = True
+        self._render_pool.cancel()
+        self._finish_parallel_render()
+
+    def _launch_parallel_render(
+        self,
+        render_plan,
+        rows,
+        max_workers,
+        use_proxy,
+        continue_error,
+        cached_reads=(),
+        frame_order=schedule.ORDER_ASCENDING,
+        stride=schedule.DEFAULT_STRIDE,
+        autoscale_workers=False,
+        restart_hung=False,
+    ):
+        """
+        Render the given rows in background nuke processes, using a copy of the current script.
+
+        Args:
+            render_plan(plan.RenderPlan):
+            rows(list[int]): rows of the plan to render
+            max_workers(int):
+            use_proxy(bool):
+            continue_error(bool):
+            cached_reads(list[nuke.Node]): nodes to point to the read cache
+            frame_order(str): one of the ``schedule.ORDER_`` constants
+            stride(int): see :func:`schedule.order_frames`
+            autoscale_workers(bool): adjust the number of processes, up to
+                ``max_workers``, from the memory they use.
+            restart_hung(bool): kill and render again the frames taking much longer
+                than the others.
+        """
+        units = render.build_render_units(
+            render_plan, rows, frame_order=frame_order, stride=stride
+        )
+        if not units:
+            LOGGER.info("nothing to render")
+            self._close_write_behind()
+            self._release_read_cache()
+            return
+
+        self._render_tmpdir = tempfile.mkdtemp(prefix="nuke-{}-".format(APPNAME))
+        script_path = os.path.join(self._render_tmpdir, "script.nk")
+        LOGGER.debug("saving script copy to '{}'".format(script_path))
+        original_paths = {}
+        if self._write_behind:
+            # workers render the copy of the script, only it must point to the scratch
+            original_paths = render.redirect_to_scratch(
+                render_plan, rows, self._write_behind
+            )
+        if cached_reads:
+            original_paths.update(self._read_cache.redirect(cached_reads))
+        try:
+            render.save_script_copy(script_path)
+        finally:
+            render.restore_file_knobs(original_paths)
+
+        pool = render.create_render_pool(
+            script_path,
+            max_workers=max_workers,
+            root_name=nuke.root()["name"].value(),
+            use_proxy=use_proxy,
+            continue_on_error=continue_error,
+            autoscale_workers=autoscale_workers,
+            hang_timeout_factor=(
+                watchdog.DEFAULT_TIMEOUT_FACTOR if restart_hung else None
+            ),
+        )
+        pool.submit(units)
+        LOGGER.info(
+            "rendering {} frames with {}{} workers".format(
+                len(units), "up to " if autoscale_workers else "", max_workers
+            )
+        )
+        self._render_pool = pool
+        self._render_plan = render_plan
+        self._render_errors = []
+        self._render_hung_count = 0
+        self._render_manifest = manifest.ManifestWriter()
+        render.record_planned(self._render_manifest, render_plan, rows)
+        self._start_render_stats(len(rows))
+        self._button_render.setText("Cancel Render")
+        self._button_resume.setEnabled(False)
+        pool.start()
+        self._render_timer.start()
+
+    def _finish_parallel_render(self):
+        self._render_timer.stop()
+        self._render_pool = None
+        if self._render_tmpdir and os.path.exists(self._render_tmpdir):
+            render.rmtree(self._render_tmpdir)
+        self._render_tmpdir = None
+        self._release_read_cache()
+        self._button_render.setText("Render")
+        self._stop_render_stats()
+        errors = self._render_errors
+        self._render_errors = []
+        if self.is_copying:
+            self._wait_for_transfers()
+            self._report_render_errors(errors)
+        else:
+            self._finish_render_manifest(
+                on_finished=partial(self._report_render_errors, errors)
+            )
+
+    def _report_render_errors(self, errors, message=None):
+        """
+        Show the errors of the last render, unless its failed frames are retried.
+
+        Args:
+            errors(list[str]):
+            message(str or None): introduction of the errors.
+        """
+        if not errors or self._retry_pending:
+            return
+        message = message or "The following errors happens during rendering:"
+        message += "\n- ".join([""] + errors)
+        nuke.critical(message)
+
+    def _prefetch_reads(self, render_plan, rows, use_proxy, callback):
+        """
+        Copy the files read upstream of the given rows to the read cache in
+        background, then call the callback with the nodes whose files are all
+        cached.
+        """
+        if self._read_cache is None:
+            self._read_cache = readcache.ReadCache()
+        read_cache = self._read_cache
+        # nuke can only be used from the main thread
+        paths_by_node = readcache.get_render_read_paths(
+            render_plan, rows, use_proxy=use_proxy
+        )
+        cache_progressed = self._cache_progressed
+
+        def prefetch():
+            result = readcache.prefetch_read_paths(
+                read_cache, paths_by_node, progress_callback=cache_progressed.emit
+            )
+            return result.cached_nodes
+
+        self._prepare_render(
+            prefetch,
+            callback,
+            message="Caching read files...",
+            cancel=read_cache.cancel,
+        )
+
+    def _on_cache_progress(self, done, total):
+        self._label_progress.setText("Caching read files: {}/{}".format(done, total))
+
+    def _on_verify_progress(self, done, total):
+        self._label_progress.setText("Verifying frames: {}/{}".format(done, total))
+
+    def _forecast_output(self, render_plan, rows, use_proxy, workers, callback):
+        """
+        Estimate in background the disk space and write time the render needs, then
+        ask to confirm when the output volumes cannot hold or keep up with the
+        frames, and call the callback unless the render is cancelled.
+
+        Args:
+            render_plan(plan.RenderPlan):
+            rows(list[int]): rows to render
+            use_proxy(bool):
+            workers(int):
+            callback(callable): called without arguments to continue the render.
+        """
+        script_path = nuke.root()["name"].value()
+        render_history = self._history
+        get_cached_entries = self._scan_cache.get_cached_entries
+
+        def forecast_output():
+            frame_counts = render.get_frame_counts(render_plan, rows)
+            known_sizes = {}
+            render_time = None
+            if script_path:
+                try:
+                    node_stats = render_history.get_node_stats(
+                        script_path, use_proxy=use_proxy, nodes=list(frame_counts)
+                    )
+                except history.HistoryError as error:
+                    LOGGER.debug(str(error))
+                else:
+                    known_sizes = {
+                        node: node_stat.mean_size
+                        for node, node_stat in node_stats.items()
+                    }
+                    prediction = history.get_prediction(
+                        node_stats, frame_counts, workers=workers
+                    )
+                    render_time = prediction.duration if prediction else None
+
+            output_forecast = forecast.OutputForecast(
+                render_plan,
+                rows,
+                get_cached_entries,
+                known_sizes,
+                render_time=render_time,
+            )
+            return output_forecast, output_forecast.get_volumes()
+
+        self._prepare_render(
+            forecast_output,
+            partial(self._on_output_forecast, callback),
+            message="Forecasting output...",
+        )
+
+    def _on_output_forecast(self, callback, result):
+        output_forecast, volumes = result
+        self._render_forecast = output_forecast
+        LOGGER.info(output_forecast.get_summary(volumes))
+        warnings = output_forecast.get_warnings(volumes)
+        if warnings:
+            for warning in warnings:
+                LOGGER.warning(warning)
+            message = "The output of the render may not fit:"
+            message += "\n- ".join([""] + warnings)
+            message += "\n\nRender anyway ?"
+            if not nuke.ask(message):
+                LOGGER.info("render cancelled after the output forecast")
+                return
+        callback()
+
+    def _update_forecast(self, node_name, frame, view):
+        """
+        Forecast again the size of the render when the first frame of a node whose
+        frame size was unknown is written.
+        """
+        output_forecast = self._render_forecast
+        if output_forecast is None or node_name in output_forecast.frame_sizes:
+            return
+        row = self._render_plan.find_written_row(node_name, frame, view)
+        if row is None:
+            return
+        path = self._render_plan.get_path(row)
+        if output_forecast.add_rendered_frame(node_name, path):
+            self._log_forecast_update(output_forecast)
+
+    def _log_forecast_update(self, output_forecast):
+        """
+        Compute the volumes of the forecast in background, then log its summary
+        and warnings.
+        """
+        if self._forecast_update is not None:
+            self._forecast_update_pending = True
+            return
+        self._forecast_update = BackgroundCall(
+            output_forecast.get_volumes,
+            partial(self._on_forecast_updated, output_forecast),
+            error_callback=self._on_forecast_update_failed,
+            parent=self,
+        )
+        self._forecast_update.start()
+
+    def _end_forecast_update(self):
+        self._forecast_update.deleteLater()
+        self._forecast_update = None
+
+    def _on_forecast_updated(self, output_forecast, volumes):
+        self._end_forecast_update()
+        LOGGER.info(output_forecast.get_summary(volumes))
+        for warning in output_forecast.get_warnings(volumes):
+            LOGGER.warning(warning)
+        if self._forecast_update_pending:
+            # frame sizes became known during the update
+            self._forecast_update_pending = False
+            self._log_forecast_update(output_forecast)
+
+    def _on_forecast_update_failed(self, error):
+        self._end_forecast_update()
+        self._forecast_update_pending = False
+        LOGGER.warning("cannot update the output forecast: {}".format(error))
+
+    def _release_read_cache(self):
+        if self._read_cache is not None:
+            self._read_cache.release()
+
+    def _finish_render_manifest(self, on_finished=None):
+        """
+        Close the manifest of the last render once all its files are final, after
+        verifying them in background if needed.
+
+        Args:
+            on_finished(callable or None): called once the manifest is closed.
+        """
+        manifest_writer = self._render_manifest
+        render_plan = self._render_plan
+        self._render_manifest = None
+        self._render_plan = None
+        if manifest_writer is None or not (
+            self._render_verify and not self._render_cancelled
+        ):
+            self._close_render_manifest(manifest_writer, render_plan, on_finished, {})
+            return
+
+        rows = render.get_finished_rows(manifest_writer, render_plan, self._render_rows)
+        verify_progressed = self._verify_progressed
+        close_manifest = partial(
+            self._close_render_manifest, manifest_writer, render_plan, on_finished
+        )
+        self._button_resume.setEnabled(False)
+        self._button_render.setEnabled(False)
+        self._render_verification = BackgroundCall(
+            partial(
+                verify.verify_rows,
+                render_plan,
+                rows,
+                progress_callback=verify_progressed.emit,
+            ),
+            close_manifest,
+            error_callback=partial(self._on_verification_failed, close_manifest),
+            parent=self,
+        )
+        self._render_verification.start()
+
+    def _on_verification_failed(self, close_manifest, error):
+        LOGGER.error("cannot verify the rendered frames: {}".format(error))
+        close_manifest({})
+
+    def _close_render_manifest(
+        self, manifest_writer, render_plan, on_finished, corrupt_rows
+    ):
+        """
+        Args:
+            manifest_writer(manifest.ManifestWriter or None):
+            render_plan(plan.RenderPlan or None):
+            on_finished(callable or None):
+            corrupt_rows(dict[int, str]): rendered rows whose file is corrupt.
+        """
+        if self._render_verification is not None:
+            self._render_verification.deleteLater()
+            self._render_verification = None
+            self._label_progress.clear()
+        self._button_resume.setEnabled(True)
+        self._button_render.setEnabled(True)
+        if manifest_writer is not None:
+            render.record_corrupt_rows(manifest_writer, render_plan, corrupt_rows)
+            self._tree.notify_rows_changed(list(corrupt_rows))
+            manifest_writer.close()
+            self._record_history(manifest_writer, render_plan)
+            self._store_fingerprints(
+                manifest_writer, render_plan, range(len(render_plan))
+            )
+            self._update_failed_items(manifest_writer, render_plan)
+        if on_finished is not None:
+            on_finished()
+
+    def _update_failed_items(self, manifest_writer, render_plan):
+        """
+        Update the failed frames with the result of the last render, and schedule
+        a retry if some frames failed.
+        """
+        rows = self._render_rows
+        self._render_rows = []
+        for row in rows:
+            key = (
+                render_plan.get_node_name(row),
+                render_plan.get_frame(row),
+                render_plan.get_view(row),
+            )
+            self._failed_items.pop(key, None)
+        failed_items = render.get_failed_items(manifest_writer, render_plan, rows)
+        for (node_name, frame, view), error in failed_items.items():
+            LOGGER.warning(
+                "'{}' failed to render frame {} view {}: {}"
+                "".format(node_name, frame, view, error)
+            )
+        self._failed_items.update(failed_items)
+        self._tree.set_failed_items(self._failed_items)
+        self._button_retry.setEnabled(bool(self._failed_items))
+        self._button_retry.setText(
+            "Retry {} Failed".format(len(self._failed_items))
+            if self._failed_items
+            else "Retry Failed"
+        )
+
+        retries = self._option_retries.value()
+        if not failed_items or self._render_cancelled or self._retry_attempt >= retries:
+            return
+        self._retry_attempt += 1
+        delay = render.get_retry_delay(
+            self._retry_attempt, self._option_retry_backoff.value()
+        )
+        LOGGER.info(
+            "retrying {} failed frames in {:.1f}s (retry {}/{})"
+            "".format(len(failed_items), delay, self._retry_attempt, retries)
+        )
+        self._retry_pending = True
+        QtCore.QTimer.singleShot(int(delay * 1000), self._on_retry_timeout)
+
+    def _record_history(self, manifest_writer, render_plan):
+        """
+        Add the last render to the render history, and warn about the nodes that
+        became slower than in the previous renders.
+        """
+        script_path = nuke.root()["name"].value()
+        render_stats = self._render_stats
+        if not script_path or render_stats is None or not render_stats.timings:
+            return
+        timings = render_stats.timings
+        try:
+            self._history.record_session(
+                script_path,
+                timings,
+                use_proxy=self._render_use_proxy,
+                workers=self._render_workers,
+                sizes=render.get_rendered_sizes(
+                    manifest_writer, render_plan, self._render_rows
+                ),
+                start=render_stats.start_time,
+                end=render_stats.end_time,
+            )
+        except history.HistoryError as error:
+            LOGGER.warning(str(error))
+            return
+        finally:
+            self._history_cache.clear()
+        self._update_node_warnings(
+            script_path,
+            set(timing.node for timing in timings),
+            use_proxy=self._render_use_proxy,
+            log=True,
+        )
+
+    def _update_node_warnings(self, script_path, node_names, use_proxy, log=False):
+        """
+        Flag in the list the given nodes if they became slower to render.
+
+        Args:
+            script_path(str):
+            node_names(collections.Iterable[str]): full names of the Write nodes
+            use_proxy(bool):
+            log(bool): True to also log a warning for each slower node.
+        """
+        try:
+            regressions = self._history.get_regressions(
+                script_path, use_proxy=use_proxy, nodes=list(node_names)
+            )
+        except history.HistoryError as error:
+            LOGGER.warning(str(error))
+            return
+        self._set_node_warnings(regressions, log=log)
+
+    def _set_node_warnings(self, regressions, log=False):
+        """
+        Args:
+            regressions(list[history.Regression]):
+            log(bool): True to also log a warning for each slower node.
+        """
+        node_warnings = {}
+        for regression in regressions:
+            message = (
+                "Rendered {:.1f}x slower than usual in the last render: {} per frame "
+                "instead of {}.".format(
+                    regression.ratio,
+                    stats.format_duration(regression.mean_time),
+                    stats.format_duration(regression.baseline_time),
+                )
+            )
+            node_warnings[regression.node] = message
+            if log:
+                LOGGER.warning("node '{}': {}".format(regression.node, message))
+        self._tree.set_node_warnings(node_warnings)
+
+    @QtCore.Slot()
+    def _update_prediction(self):
+        """
+        Show how long rendering the current plan should take, from the history.
+        """
+        if self.is_rendering or self.is_copying:
+            return
+        script_path = nuke.root()["name"].value()
+        render_plan = self._tree.plan
+        if not script_path or not len(render_plan):
+            return
+
+        rows = range(len(render_plan))
+        if self._option_skip_existing.isChecked():
+            rows = [
+                row for row in rows if render_plan.get_status(row) != plan.STATUS_EXISTS
+            ]
+        use_proxy = self._option_proxy.isChecked()
+        history_stats = self._history_cache.get((script_path, use_proxy))
+        if history_stats is None:
+            self._load_history(script_path, use_proxy)
+            return
+        node_stats, regressions = history_stats
+        node_names = set(render_plan.node_names)
+        self._set_node_warnings(
+            [regression for regression in regressions if regression.node in node_names]
+        )
+        workers, autoscaled = self._get_prediction_workers()
+        frame_counts = render.get_frame_counts(render_plan, rows)
+        prediction = history.get_prediction(node_stats, frame_counts, workers=workers)
+        if prediction is None:
+            return
+        text = "Estimated render time: {} for {} frames".format(
+            stats.format_duration(prediction.duration),
+            prediction.known_frames + prediction.estimated_frames,
+        )
+        if prediction.estimated_frames:
+            text += " ({} frames of nodes never rendered)".format(
+                prediction.estimated_frames
+            )
+        if autoscaled:
+            text += ", with the {} worker{} autoscale starts with".format(
+                workers, "s" if workers > 1 else ""
+            )
+        self._label_progress.setText(text)
+        self._label_progress.setToolTip(
+            "From the previous renders of this script, stored in '{}'."
+            "".format(self._history.path)
+        )
+
+    def _get_prediction_workers(self):
+        """
+        Returns:
+            tuple[int, bool]: number of workers to predict the render time with,
+                and True if it is the starting count of the autoscaled workers,
+                which can grow during the render.
+        """
+        max_workers = self._option_workers.value()
+        if self._option_autoscale.isChecked():
+            return autoscale.get_initial_workers(max_workers), True
+        return max_workers, False
+
+    def _load_history(self, script_path, use_proxy):
+        """
+        Query the render history of the script in background, then update the
+        prediction.
+        """
+        if self._history_loading is not None:
+            return
+        render_history = self._history
+
+        def load():
+            try:
+                return (
+                    render_history.get_node_stats(script_path, use_proxy),
+                    render_history.get_regressions(script_path, use_proxy=use_proxy),
+                )
+            except history.HistoryError as error:
+                LOGGER.debug(str(error))
+                return {}, []
+
+        self._history_loading = BackgroundCall(
+            load,
+            partial(self._on_history_loaded, (script_path, use_proxy)),
+            error_callback=self._on_history_load_failed,
+            parent=self,
+        )
+        self._history_loading.start()
+
+    def _end_history_loading(self):
+        self._history_loading.deleteLater()
+        self._history_loading = None
+
+    def _on_history_loaded(self, key, history_stats):
+        self._end_history_loading()
+        self._history_cache[key] = history_stats
+        self._update_prediction()
+
+    def _on_history_load_failed(self, error):
+        self._end_history_loading()
+        LOGGER.warning("cannot read the render history: {}".format(error))
+
+    def _wait_for_transfers(self):
+        """
+        Keep polling the copies from the scratch directory once the render is done,
+        preventing another render until they are all finished.
+        """
+        self._button_render.setEnabled(False)
+        self._button_resume.setEnabled(False)
+        self._update_render_progress()
+        self._transfer_timer.start()
+
+    def _close_write_behind(self):
+        self._transfer_timer.stop()
+        write_behind = self._write_behind
+        self._write_behind = None
+        if write_behind is not None:
+            write_behind.close()
+
+    def _store_fingerprints(self, manifest_writer, render_plan, rows):
+        """
+        Save the fingerprints of the rows that were successfully rendered, if the
+        render was incremental.
+        """
+        fingerprints = self._render_fingerprints
+        self._render_fingerprints = {}
+        if not fingerprints:
+            return
+        rows = render.get_finished_rows(manifest_writer, render_plan, rows)
+        fingerprint.store_fingerprints(
+            render_plan, {row: fingerprints[row] for row in rows}
+        )
+
+    def _start_render_stats(self, frame_count):
+        self._render_stats = stats.RenderStats(total=frame_count)
+        self._render_stats.start()
+        self._update_render_progress()
+
+    def _stop_render_stats(self):
+        render_stats = self._render_stats
+        if render_stats is None:
+            return
+        render_stats.stop()
+        self._update_render_progress()
+        for node_summary in render_stats.get_node_summary():
+            LOGGER.info(
+                "node '{node}': {frames} frames in {total_time:.1f}s "
+                "({frames_per_minute:.1f} frames/min, slowest frame {max_time:.1f}s)"
+                "".format(**node_summary)
+            )
+        if render_stats.timings:
+            self._write_render_report(render_stats)
+
+    def _write_render_report(self, render_stats):
+        """
+        Write the timing of the render as json and csv next to the current script.
+
+        Args:
+            render_stats(stats.RenderStats):
+        """
+        script_path = nuke.root()["name"].value()
+        if not script_path:
+            LOGGER.warning("cannot write render report: the script is not saved")
+            return
+
+        json_path, csv_path = stats.get_report_paths(script_path)
+        try:
+            render_stats.write_json(json_path)
+            render_stats.write_csv(csv_path)
+        except OSError as error:
+            LOGGER.warning("cannot write render report: {}".format(error))
+            return
+        LOGGER.info("render report written to '{}'".format(json_path))
+
+    def _update_render_progress(self):
+        render_stats = self._render_stats
+        if render_stats is None:
+            self._label_progress.clear()
+            return
+
+        progress_text = render_stats.get_progress_text()
+        if self._write_behind is not None and self._write_behind.pending_count:
+            progress_text += " - {} frames left to copy from scratch".format(
+                self._write_behind.pending_count
+            )
+        if self._render_hung_count:
+            progress_text += " - {} hung frames killed".format(self._render_hung_count)
+        self._label_progress.setText(progress_text)
+        now = time.monotonic()
+        if (
+            render_stats.end_time is not None
+            or now - self._progress_tooltip_time >= PROGRESS_TOOLTIP_INTERVAL
+        ):
+            self._progress_tooltip_time = now
+            tooltip = [
+                "{node}: {frames_per_minute:.1f} frames/min (mean {mean_time:.1f}s)"
+                "".format(**node_summary)
+                for node_summary in render_stats.get_node_summary()
+            ]
+            self._label_progress.setToolTip("<br>".join(tooltip))
+        if not self.is_rendering:
+            # the render in the current session blocks the event loop
+            self._label_progress.repaint()
+
+    def save_settings(self):
+        if not self._enable_settings:
+            LOGGER.debug("cannot save settings: feature disabled")
+            return
+
+        settings = self._app_settings
+
+        settings.setValue(".version", __version__)
+        if self._enable_settings:
+            settings.setValue(".enabled", True)
+
+        self._node_selector.save_settings(settings)
+        self._field_frames.save_settings(settings)
+        self._views_selector.save_settings(settings)
+
+        settings.beginGroup("dialog")
+        settings.setValue("use_proxy", self._option_proxy.isChecked())
+        settings.setValue("continue_error", self._option_continue_error.isChecked())
+        settings.setValue("skip_existing", self._option_skip_existing.isChecked())
+        settings.setValue("incremental", self._option_incremental.isChecked())
+        settings.setValue("scratch", self._option_scratch.isChecked())
+        settings.setValue("read_cache", self._option_read_cache.isChecked())
+        settings.setValue("verify", self._option_verify.isChecked())
+        settings.setValue("hang_watchdog", self._option_watchdog.isChecked())
+        settings.setValue("thumbnails", self._option_thumbnails.isChecked())
+        settings.setValue("workers", self._option_workers.value())
+        settings.setValue("autoscale", self._option_autoscale.isChecked())
+        settings.setValue("retries", self._option_retries.value())
+        settings.setValue("retry_backoff", self._option_retry_backoff.value())
+        settings.setValue("frame_order", self.frame_order)
+        settings.setValue("frame_stride", self._option_stride.value())
+        settings.endGroup()
+
+    def load_settings(self):
+        """
+        Returns:
+            bool: True if some settings were loaded.
+        """
+        if not self._enable_settings:
+            LOGGER.debug("cannot load settings: feature disabled")
+            return False
+
+        settings = self._app_settings
+        if not settings.allKeys():
+            return False
+
+        version = settings.value(".version", None)  # type: str | None
+        if version != __version__:
+            LOGGER.debug("found old settings version '{}': clearing".format(version))
+            settings.clear()
+            return False
+
+        self._node_selector.load_settings(settings)
+        self._field_frames.load_settings(settings)
+        self._views_selector.load_settings(settings)
+
+        settings.beginGroup("dialog")
+        for option_key, option in [
+            ("use_proxy", self._option_proxy),
+            ("continue_error", self._option_continue_error),
+            ("skip_existing", self._option_skip_existing),
+            ("incremental", self._option_incremental),
+            ("scratch", self._option_scratch),
+            ("read_cache", self._option_read_cache),
+            ("verify", self._option_verify),
+            ("autoscale", self._option_autoscale),
+            ("hang_watchdog", self._option_watchdog),
+            ("thumbnails", self._option_thumbnails),
+        ]:
+            if settings.contains(option_key):
+                value = settings.value(option_key, type=bool)
+                option.setChecked(value)
+
+        if settings.contains("workers"):
+            self._option_workers.setValue(settings.value("workers", type=int))
+        if settings.contains("retries"):
+            self._option_retries.setValue(settings.value("retries", type=int))
+        if settings.contains("retry_backoff"):
+            self._option_retry_backoff.setValue(
+                settings.value("retry_backoff", type=float)
+            )
+        if settings.contains("frame_order"):
+            self._set_frame_order(settings.value("frame_order", type=str))
+        if settings.contains("frame_stride"):
+            self._option_stride.setValue(settings.value("frame_stride", type=int))
+
+        settings.endGroup()
+        return True
+
+    def reset_settings(self):
+        self._settings_action.setChecked(False)
+        self._app_settings.clear()
+        self.set_defaults()
+
+    def _update_internal_framerange(self):
+        try:
+            self._frames = self._field_frames.get_frames()
+        except ValueError:
+            self._frames = frameset.FrameSet()
+            self._field_frames.set_invalid_framerange_state(enabled=True)
+        else:
+            self._field_frames.set_invalid_framerange_state(enabled=False)
+
+    @QtCore.Slot()
+    def _on_framerange_modified(self):
+        # wait for the user to stop typing, restarting the timer on each keystroke
+        self._populate_timer.start()
+
+    @QtCore.Slot()
+    def _on_framerange_settled(self):
+        self._update_internal_framerange()
+        self.populate()
+
+    @QtCore.Slot()
+    def _on_views_modified(self):
+        self._views = self._views_selector.selected_views
+        self.populate()
+
+    @QtCore.Slot()
+    def _on_plan_updated(self):
+        if self._pending_launch is None or self._tree.is_populating:
+            return
+        resume, retry = self._pending_launch
+        self._pending_launch = None
+        self._label_progress.clear()
+        self._button_render.setText("Render")
+        self._button_resume.setEnabled(True)
+        self.launch_render(resume=resume, retry=retry)
+
+    @QtCore.Slot()
+    def _on_frame_order_modified(self):
+        self._option_stride.setEnabled(self.frame_order == schedule.ORDER_STRIDE)
+
+    @QtCore.Slot()
+    def _on_workers_modified(self):
+        # only the background workers can be killed when a frame hangs
+        self._option_watchdog.setEnabled(
+            bool(self._option_workers.value()) or self._option_autoscale.isChecked()
+        )
+
+    @QtCore.Slot()
+    def _on_render_clicked(self):
+        if self.is_rendering:
+            self.cancel_render()
+        elif self.is_preparing:
+            self.cancel_render_preparation()
+        else:
+            self.launch_render()
+
+    @QtCore.Slot()
+    def _on_refresh_clicked(self):
+        # resolve the paths again, nuke doesn't report every change of them
+        nodeindex.get_index().invalidate()
+        # other sessions may have rendered the script since the history was read
+        self._history_cache.clear()
+        self.update_internals()
+
+    @QtCore.Slot()
+    def _on_resume_clicked(self):
+        self.launch_render(resume=True)
+
+    @QtCore.Slot()
+    def _on_retry_clicked(self):
+        self._retry_attempt = 0
+        self.launch_render(retry=True)
+
+    @QtCore.Slot()
+    def _on_retry_timeout(self):
+        self._retry_pending = False
+        self.launch_render(retry=True)
+
+    @QtCore.Slot()
+    def _on_render_pool_poll(self):
+        for event in self._render_pool.poll():
+            render.record_render_event(
+                self._render_manifest, self._render_plan, event, self._write_behind
+            )
+            if event.kind == engine.EVENT_STARTED:
+                continue
+
+            if event.kind == engine.EVENT_HUNG:
+                LOGGER.warning(render.get_event_error(event))
+                self._render_hung_count += 1
+                continue
+
+            if event.kind == engine.EVENT_FRAME_RENDERED:
+                item = event.item
+                self._update_forecast(item.node, item.frame, item.view)
+                self._render_stats.add_timing(
+                    stats.FrameTiming(
+                        item.node,
+                        item.frame,
+                        item.view,
+                        event.start or event.time,
+                        event.time,
+                    )
+                )
+                continue
+
+            copying = self.is_copying and event.kind == engine.EVENT_FINISHED
+            for item in event.unit.iter_items():
+                self._tree.update_rendered_path(
+                    item.node, item.frame, item.view, copying=copying
+                )
+
+            if event.kind == engine.EVENT_FAILED:
+                self._render_errors.append(render.get_event_error(event))
+
+        if self._render_pool.is_done:
+            LOGGER.info("render finished")
+            self._finish_parallel_render()
+        else:
+            self._update_render_progress()
+
+    @QtCore.Slot()
+    def _on_transfer_poll(self):
+        write_behind = self._write_behind
+        transfer_results = write_behind.poll()
+        render.record_transfers(self._render_manifest, transfer_results)
+        for transfer_result in transfer_results:
+            path, node_name, frame, view = transfer_result.data
+            if transfer_result.error is None:
+                self._tree.update_rendered_path(node_name, frame, view)
+                continue
+            row = self._tree.plan.find_written_row(node_name, frame, view)
+            if row is not None:
+                self._tree.set_row_status(row, plan.STATUS_COPY_FAILED)
+            self._render_errors.append(
+                "cannot copy '{}' from scratch: {}".format(path, transfer_result.error)
+            )
+
+        if self.is_rendering or not write_behind.is_drained:
+            if transfer_results:
+                self._update_render_progress()
+            return
+
+        LOGGER.info("all rendered frames copied from scratch")
+        self._close_write_behind()
+        errors = self._render_errors
+        self._render_errors = []
+        self._update_render_progress()
+        self._finish_render_manifest(
+            on_finished=partial(
+                self._report_render_errors,
+                errors,
+                message="The following errors happens while copying rendered frames:",
+            )
+        )
+
+    def _on_frame_render_started(self):
+        """
+        Callback called by nuke before each frame rendered in the current session.
+        """
+        node = nuke.thisNode()
+        self._render_stats.frame_started(node.fullName(), nuke.frame(), nuke.thisView())
+
+    def _on_frame_rendered(self):
+        """
+        Callback called by nuke after each frame rendered in the current session.
+        """
+        node = nuke.thisNode()
+        frame = nuke.frame()
+        view = nuke.thisView()
+        self._tree.update_rendered_path(
+            node.fullName(), frame, view, copying=self.is_copying
+        )
+        self._render_stats.frame_finished(node.fullName(), frame, view)
+        self._update_forecast(node.fullName(), frame, view)
+        self._update_render_progress()
+
+    @QtCore.Slot()
+    def _on_framerange_help(self):
+        webbrowser.open(
+            "https://learn.foundry.com/nuke/content/getting_started/managing_scripts/defining_frame_ranges.html"
+        )
+
+    @QtCore.Slot()
+    def _on_open_ref(self):
+        webbrowser.open("https://github.com/MrLixm/nuke-tools-lxm")
+
+    @QtCore.Slot()
+    def _on_open_doc(self):
+        webbrowser.open("https://pyco-apps.github.io/software/localorender/")
+
+    @QtCore.Slot()
+    def _on_report_issue(self):
+        webbrowser.open("https://github.com/MrLixm/nuke-tools-lxm/issues")
+
+    @QtCore.Slot()
+    def _on_node_selection_mode_modified(self):
+        selection = self._node_selector.get_selected_nodes()
+        self._write_nodes = selection
+        self.populate()
+
+    @QtCore.Slot()
+    def _on_toggle_settings(self):
+        self._enable_settings = self._settings_action.isChecked()
+        settings = self._app_settings
+        if self._enable_settings:
+            LOGGER.debug("enabling (and saving) settings")
+            self.save_settings()
+        else:
+            LOGGER.debug("disabling (and clearing) settings")
+            settings.clear()
+
+
+"""_____________________________________________________________________________________
+INSTALLATION RELATED
+"""
+
+# moved to the install module, to not import this one at Nuke startup
+UiBuilder = install.UiBuilder
+open_as_panel = install.open_as_panel
+register_as_panel = install.register_as_panel
+nukescript_showRenderDialog = install.nukescript_showRenderDialog
+
+
+class LocaloRenderPanel(pyui.Dialog):
+    """
+    Nuke wrapper for Qt and integration in its GUI.
+
+    We intentionnaly don't inherit from the common nukescripts.PythonPanel to make
+    the process more explicit.
+
+    I tried to find a way to call some code when the panel close. Suprisingly nothing works.
+    I tried overriding: __del__, destory, hide, cancel, but they are all never called.
+
+    Args:
+        uibuilder(UiBuilder or None): optional builder to use to create the QWidget
+    """
+
+    identifier = "liamcollod.nuke.localorender"
+
+    def __init__(self, uibuilder=None):
+        super(LocaloRenderPanel, self).__init__(APPNAME, self.identifier)
+
+        uibuilder = uibuilder or UiBuilder()
+        expression = repr(uibuilder)
+
+        self.__node = nuke.PanelNode()
+        self.__nkwidget = None
+        self.__custom_knob = nuke.PyCustom_Knob(APPNAME, "", expression)
+        self.__custom_knob.setFlag(nuke.NO_UNDO | nuke.NO_ANIMATION)
+        self.__node.addKnob(self.__custom_knob)
+        self.__nkwidget = self.__node.createWidget(self)
+        # add() args are based upon nukescripts.PythonPanel.create
+        self.add(self.__nkwidget, 0, 0, 1, 3)
+
+    def show(self):
+        def _knob_changed_callback(widget):
+            pass
+
+        # adding a callback allow nuke to store a reference of 'self', so it is not
+        # garbage collected immediately.
+        nuke.addKnobChanged(
+            _knob_changed_callback,
+            args=self,
+            nodeClass="PanelNode",
+            node=self.__node,
+        )
+        super(LocaloRenderPanel, self).show()
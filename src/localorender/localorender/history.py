@@ -0,0 +1,510 @@
+"""
+Local database of past renders, to predict how long a render will take and find
+the Write nodes that became slower than in previous renders.
+
+Each render session is stored in a SQLite file (``LOCALORENDER_HISTORY`` or
+``~/.nuke/localorender-history.sqlite``) with the time spent and the size written
+for each frame of each node. Sessions are grouped by script path and proxy mode,
+as those change the render time a lot.
+
+The database can be queried from other tools::
+
+    from localorender import history
+
+    render_history = history.RenderHistory()
+    for session in render_history.get_sessions("/path/to/script.nk", limit=10):
+        print(session.start, session.frames, session.duration)
+    print(render_history.get_node_stats("/path/to/script.nk"))
+"""
+import collections
+import contextlib
+import logging
+import os
+import sqlite3
+import time
+
+LOGGER = logging.getLogger("LocaloRender.history")
+
+HISTORY_PATH_ENV = "LOCALORENDER_HISTORY"
+
+DEFAULT_BASELINE_SESSIONS = 5
+"""
+Number of previous sessions a node is compared to.
+"""
+
+DEFAULT_REGRESSION_RATIO = 1.5
+"""
+A node is regressed when its time per frame is this many times its usual time.
+"""
+
+DEFAULT_MIN_SLOWDOWN = 1.0
+"""
+Seconds per frame a node must lose to be regressed, so the noise of the timing
+of fast renders is not reported.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT NOT NULL,
+    proxy INTEGER NOT NULL,
+    workers INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_script ON sessions (script, proxy);
+CREATE TABLE IF NOT EXISTS frames (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    node TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    view TEXT NOT NULL,
+    duration REAL NOT NULL,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS frames_session ON frames (session_id, node);
+"""
+
+Session = collections.namedtuple(
+    "Session",
+    ["id", "script", "proxy", "workers", "start", "end", "frames", "duration"],
+)
+"""
+A past render. ``frames`` is the number of frames rendered and ``duration`` the
+sum of their render time, in seconds.
+"""
+
+FrameRecord = collections.namedtuple(
+    "FrameRecord", ["session_id", "node", "frame", "view", "duration", "size"]
+)
+"""
+A frame rendered in a past session, ``size`` is in bytes or None if unknown.
+"""
+
+NodeStats = collections.namedtuple(
+    "NodeStats", ["node", "sessions", "frames", "mean_time", "mean_size"]
+)
+"""
+Statistics of a node over its last sessions: mean render time per frame in
+seconds and mean size per frame in bytes (None if unknown).
+"""
+
+Prediction = collections.namedtuple(
+    "Prediction", ["duration", "known_frames", "estimated_frames"]
+)
+"""
+Predicted render time in seconds. ``known_frames`` are the frames of nodes found
+in the history, ``estimated_frames`` of nodes never rendered before, using the
+mean of the others.
+"""
+
+
+Regression = collections.namedtuple(
+    "Regression", ["node", "mean_time", "baseline_time", "ratio"]
+)
+"""
+A node whose time per frame in its last session is ``ratio`` times its usual one
+(median of its previous sessions).
+"""
+
+
+class HistoryError(Exception):
+    """
+    Raised when the history database cannot be read or written.
+    """
+
+    pass
+
+
+def get_default_history_path():
+    """
+    Returns:
+        str: path of the history database
+    """
+    return os.environ.get(HISTORY_PATH_ENV) or os.path.join(
+        os.path.expanduser("~"), ".nuke", "localorender-history.sqlite"
+    )
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def get_prediction(node_stats, frame_counts, workers=0):
+    """
+    Args:
+        node_stats(dict[str, NodeStats]): as returned by
+            :meth:`RenderHistory.get_node_stats`
+        frame_counts(dict[str, int]): number of frames to render for each
+            Write node full name.
+        workers(int): number of background processes, 0 to render in nuke. The
+            duration is divided by it, assuming the workers don't slow each other.
+
+    Returns:
+        Prediction or None: None if none of the nodes was rendered before.
+    """
+    known_frames = 0
+    duration = 0.0
+    for node, count in frame_counts.items():
+        if node in node_stats:
+            known_frames += count
+            duration += node_stats[node].mean_time * count
+    if not known_frames:
+        return None
+    estimated_frames = sum(frame_counts.values()) - known_frames
+    if estimated_frames:
+        duration += duration / known_frames * estimated_frames
+    return Prediction(
+        duration=duration / max(1, workers),
+        known_frames=known_frames,
+        estimated_frames=estimated_frames,
+    )
+
+
+class RenderHistory(object):
+    """
+    Read and write the render history database.
+
+    A connection is opened for each call, so an instance can be kept for the
+    whole session and used by other processes at the same time.
+
+    Args:
+        path(str or None): path of the database, created if necessary.
+            Default to :func:`get_default_history_path`.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_default_history_path()
+        self._initialized = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        try:
+            if not self._initialized:
+                directory = os.path.dirname(self.path)
+                if directory and not os.path.isdir(directory):
+                    os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10.0)
+        except (OSError, sqlite3.Error) as error:
+            raise HistoryError(
+                "cannot open render history '{}': {}".format(self.path, error)
+            )
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            if not self._initialized:
+                connection.executescript(_SCHEMA)
+                self._initialized = True
+            with connection:
+                yield connection
+        except sqlite3.Error as error:
+            raise HistoryError(
+                "error in render history '{}': {}".format(self.path, error)
+            )
+        finally:
+            connection.close()
+
+    def record_session(
+        self,
+        script,
+        timings,
+        use_proxy=False,
+        workers=0,
+        sizes=None,
+        start=None,
+        end=None,
+    ):
+        """
+        Add a render session to the history.
+
+        Args:
+            script(str): path of the rendered script
+            timings(list[stats.FrameTiming]): frames rendered
+            use_proxy(bool): if the render was in proxy mode
+            workers(int): number of background processes, 0 if rendered in nuke.
+            sizes(dict[tuple[str, int, str], int] or None):
+                size in bytes of the files written by each (node, frame, view).
+            start(float or None): timestamp, default to the start of the first frame.
+            end(float or None): timestamp, default to the end of the last frame.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            int or None: identifier of the new session, None if there was no frame.
+        """
+        if not timings:
+            return None
+        sizes = sizes or {}
+        start = min(timing.start for timing in timings) if start is None else start
+        end = max(timing.end for timing in timings) if end is None else end
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO sessions (script, proxy, workers, start, end) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (os.path.normpath(script), int(use_proxy), workers, start, end),
+            )
+            session_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO frames (session_id, node, frame, view, duration, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        timing.node,
+                        timing.frame,
+                        timing.view,
+                        timing.duration,
+                        sizes.get((timing.node, timing.frame, timing.view)),
+                    )
+                    for timing in timings
+                ],
+            )
+        LOGGER.debug(
+            "recorded render session {} with {} frames in '{}'"
+            "".format(session_id, len(timings), self.path)
+        )
+        return session_id
+
+    def get_sessions(self, script=None, use_proxy=None, limit=None):
+        """
+        Args:
+            script(str or None): only the sessions of this script.
+            use_proxy(bool or None): only the sessions in or out of proxy mode.
+            limit(int or None): maximum number of sessions returned.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            list[Session]: most recent first.
+        """
+        query = (
+            "SELECT sessions.id, script, proxy, workers, start, end, "
+            "COUNT(frames.session_id), TOTAL(frames.duration) "
+            "FROM sessions LEFT JOIN frames ON frames.session_id = sessions.id"
+        )
+        conditions, parameters = self._get_session_filter(script, use_proxy)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY sessions.id ORDER BY start DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        with self._connect() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+        return [
+            Session(
+                id=row[0],
+                script=row[1],
+                proxy=bool(row[2]),
+                workers=row[3],
+                start=row[4],
+                end=row[5],
+                frames=row[6],
+                duration=row[7],
+            )
+            for row in rows
+        ]
+
+    def get_frames(self, session_id, node=None):
+        """
+        Args:
+            session_id(int):
+            node(str or None): only the frames of this node.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            list[FrameRecord]:
+        """
+        query = (
+            "SELECT session_id, node, frame, view, duration, size FROM frames "
+            "WHERE session_id = ?"
+        )
+        parameters = [session_id]
+        if node is not None:
+            query += " AND node = ?"
+            parameters.append(node)
+        with self._connect() as connection:
+            rows = connection.execute(query + " ORDER BY rowid", parameters).fetchall()
+        return [FrameRecord(*row) for row in rows]
+
+    @staticmethod
+    def _get_session_filter(script, use_proxy):
+        conditions = []
+        parameters = []
+        if script is not None:
+            conditions.append("script = ?")
+            parameters.append(os.path.normpath(script))
+        if use_proxy is not None:
+            conditions.append("proxy = ?")
+            parameters.append(int(use_proxy))
+        return conditions, parameters
+
+    def _get_session_means(self, script, use_proxy, nodes=None):
+        """
+        Returns:
+            dict[str, list[tuple[int, float, int, float or None]]]: for each node,
+                (session id, mean time, frame count, mean size) of its sessions,
+                most recent first.
+        """
+        conditions, parameters = self._get_session_filter(script, use_proxy)
+        query = (
+            "SELECT node, session_id, AVG(duration), COUNT(*), AVG(size) "
+            "FROM frames JOIN sessions ON frames.session_id = sessions.id"
+        )
+        if nodes is not None:
+            nodes = list(nodes)
+            if not nodes:
+                return {}
+            conditions.append("node IN ({})".format(", ".join("?" * len(nodes))))
+            parameters.extend(nodes)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY node, session_id ORDER BY sessions.start DESC"
+        with self._connect() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+
+        means = collections.OrderedDict()
+        for node, session_id, mean_time, count, mean_size in rows:
+            means.setdefault(node, []).append((session_id, mean_time, count, mean_size))
+        return means
+
+    def get_node_stats(
+        self, script, use_proxy=False, nodes=None, sessions=DEFAULT_BASELINE_SESSIONS
+    ):
+        """
+        Args:
+            script(str): path of the script
+            use_proxy(bool):
+            nodes(list[str] or None): full names of the Write nodes, default to all.
+            sessions(int): number of last sessions of each node to consider.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            dict[str, NodeStats]: statistics of each node found in the history.
+        """
+        node_stats = {}
+        for node, node_sessions in self._get_session_means(
+            script, use_proxy, nodes
+        ).items():
+            node_sessions = node_sessions[:sessions]
+            frames = sum(count for _, _, count, _ in node_sessions)
+            sizes = [
+                (mean_size, count)
+                for _, _, count, mean_size in node_sessions
+                if mean_size is not None
+            ]
+            node_stats[node] = NodeStats(
+                node=node,
+                sessions=len(node_sessions),
+                frames=frames,
+                mean_time=sum(
+                    mean_time * count for _, mean_time, count, _ in node_sessions
+                )
+                / frames,
+                mean_size=(
+                    sum(size * count for size, count in sizes)
+                    / sum(count for _, count in sizes)
+                    if sizes
+                    else None
+                ),
+            )
+        return node_stats
+
+    def predict(self, script, frame_counts, use_proxy=False, workers=0):
+        """
+        Predict how long a render will take from the previous renders of the script.
+
+        Args:
+            script(str): path of the script
+            frame_counts(dict[str, int]): number of frames to render for each
+                Write node full name.
+            use_proxy(bool):
+            workers(int): number of background processes, 0 to render in nuke.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            Prediction or None: None if none of the nodes was rendered before.
+        """
+        node_stats = self.get_node_stats(script, use_proxy, nodes=list(frame_counts))
+        return get_prediction(node_stats, frame_counts, workers=workers)
+
+    def get_regressions(
+        self,
+        script,
+        use_proxy=False,
+        nodes=None,
+        ratio=DEFAULT_REGRESSION_RATIO,
+        baseline_sessions=DEFAULT_BASELINE_SESSIONS,
+        min_slowdown=DEFAULT_MIN_SLOWDOWN,
+    ):
+        """
+        Find the nodes whose time per frame in their last session is much higher
+        than in their previous sessions.
+
+        Args:
+            script(str): path of the script
+            use_proxy(bool):
+            nodes(list[str] or None): full names of the Write nodes, default to all.
+            ratio(float): minimum slowdown to report.
+            min_slowdown(float): minimum seconds per frame lost to report.
+            baseline_sessions(int): number of previous sessions compared with the last.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            list[Regression]: most regressed first.
+        """
+        regressions = []
+        for node, node_sessions in self._get_session_means(
+            script, use_proxy, nodes
+        ).items():
+            if len(node_sessions) < 2:
+                continue
+            mean_time = node_sessions[0][1]
+            baseline_time = _median(
+                [session[1] for session in node_sessions[1 : baseline_sessions + 1]]
+            )
+            if baseline_time <= 0:
+                continue
+            if (
+                mean_time / baseline_time >= ratio
+                and mean_time - baseline_time >= min_slowdown
+            ):
+                regressions.append(
+                    Regression(
+                        node=node,
+                        mean_time=mean_time,
+                        baseline_time=baseline_time,
+                        ratio=mean_time / baseline_time,
+                    )
+                )
+        regressions.sort(key=lambda regression: regression.ratio, reverse=True)
+        return regressions
+
+    def prune(self, max_age_days=365):
+        """
+        Remove the sessions older than the given age.
+
+        Raises:
+            HistoryError:
+
+        Returns:
+            int: number of sessions removed
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "DELETE FROM sessions WHERE start < ?",
+                (time.time() - max_age_days * 86400,),
+            )
+        return cursor.rowcount
@@ -0,0 +1,106 @@
+"""
+Entry points to install the tool in Nuke, usually called from a ``menu.py``.
+
+They are kept apart from :mod:`localorender.gui` so registering the tool at Nuke
+startup doesn't import pyui, Qt and the dialog: :mod:`localorender.gui` is only
+imported when the panel is first opened.
+
+This module doesn't depend on Qt.
+"""
+import importlib
+import logging
+
+import nuke
+
+from . import APPNAME
+from . import __version__
+
+LOGGER = logging.getLogger("LocaloRender.install")
+
+
+def _import_gui():
+    """
+    Returns:
+        module: :mod:`localorender.gui`, imported on the first call only.
+    """
+    return importlib.import_module(".gui", __package__)
+
+
+class UiBuilder:
+    """
+    Specify how to build a LocaloRenderDialog QWidget instance.
+    """
+
+    def __init__(
+        self,
+        node_selection_mode=None,
+        lock_settings=False,
+    ):
+        self.node_selection_mode = node_selection_mode
+        self.lock_settings = lock_settings
+
+    def __repr__(self):
+        param_repr = "node_selection_mode={!r}".format(self.node_selection_mode)
+        param_repr += ",lock_settings={!r}".format(self.lock_settings)
+        repr_str = "{}({})".format(UiBuilder.__name__, param_repr)
+        if __name__ != "__main__":
+            repr_str = __name__ + "." + repr_str
+        return repr_str
+
+    def makeUI(self):
+        """
+        This method is expected by PyCustom_Knob to return a QWidget.
+        """
+        widget = _import_gui().LocaloRenderDialog(
+            node_selection_mode=self.node_selection_mode,
+            lock_settings=self.lock_settings,
+        )
+        return widget
+
+
+def open_as_panel(modal=False, uibuilder=None):
+    """
+    Open the gui as a native nuke panel.
+
+    Args:
+        modal(bool): True to open the windows as blocking (no click outside possible).
+        uibuilder(UiBuilder or None): optional builder to use to create the QWidget
+    """
+    LOGGER.debug("launching GUI for {}v{}".format(APPNAME, __version__))
+    panel = _import_gui().LocaloRenderPanel(uibuilder=uibuilder)
+    if modal:
+        panel.showModal()
+    else:
+        panel.show()
+
+
+def register_as_panel():
+    """
+    Allow the panel to be created as a Custom panel from the usual Panel menu.
+
+    Nothing is registered in terminal sessions (``nuke -t``) which have no panels.
+    """
+    if not nuke.GUI:
+        return
+
+    def add_panel():
+        instance = _import_gui().LocaloRenderPanel()
+        nuke.thisPane().add(instance)
+        return instance
+
+    menu = nuke.menu("Pane")
+    menu.addCommand(APPNAME.title(), add_panel)
+
+
+def nukescript_showRenderDialog(uibuilder=None):
+    """
+    Function that intend to override the nukescript function.
+
+    Args:
+        uibuilder(UiBuilder or None): optional builder to use to create the QWidget.
+    """
+
+    def _wrapper(*args, **kwargs):
+        open_as_panel(modal=True, uibuilder=uibuilder)
+
+    return _wrapper
@@ -0,0 +1,307 @@
+"""
+Persistent record of what happened to each rendered file, to resume a render
+that was interrupted, even by a crash of nuke.
+
+Each output directory has its own manifest: a json-lines file where a line is
+appended each time a file changes state. The last line of a file name gives its
+current state. Being append-only, a crash can at worst leave an incomplete last
+line, which is ignored when reading. Manifests are compacted to the last line of
+each file name once a render is over, so they don't grow with every render.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+
+LOGGER = logging.getLogger("LocaloRender.manifest")
+
+MANIFEST_FILENAME = ".localorender-manifest.jsonl"
+
+STATE_PLANNED = "planned"
+STATE_STARTED = "started"
+STATE_FINISHED = "finished"
+STATE_FAILED = "failed"
+
+COMPACT_MIN_LINES = 1000
+"""
+Manifests with fewer lines are not compacted, it's not worth rewriting them.
+"""
+
+
+def get_manifest_path(directory):
+    """
+    Args:
+        directory(str): output directory of rendered files
+
+    Returns:
+        str: path of the manifest of the directory
+    """
+    return os.path.join(directory, MANIFEST_FILENAME)
+
+
+def read_manifest(directory):
+    """
+    Args:
+        directory(str): output directory of rendered files
+
+    Returns:
+        dict[str, dict]: last record of each file name, empty if there is no manifest.
+    """
+    records, _ = _read_records(get_manifest_path(directory))
+    return records
+
+
+def _read_records(manifest_path):
+    """
+    Returns:
+        tuple[dict[str, dict], int]: last record of each file name, and the number
+            of lines in the manifest.
+    """
+    records = {}
+    line_count = 0
+    try:
+        with open(manifest_path, "r") as manifest_file:
+            for line in manifest_file:
+                line_count += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # probably a line left incomplete by a crash
+                    continue
+                if isinstance(record, dict) and "file" in record:
+                    records[record["file"]] = record
+    except OSError:
+        pass
+    return records, line_count
+
+
+def compact_manifest(directory, min_lines=COMPACT_MIN_LINES):
+    """
+    Rewrite the manifest of the directory with only the last record of each file
+    name. The new manifest replaces the previous one atomically.
+
+    Args:
+        directory(str): output directory of rendered files
+        min_lines(int): don't compact manifests with fewer lines.
+
+    Returns:
+        bool: True if the manifest was rewritten.
+    """
+    manifest_path = get_manifest_path(directory)
+    records, line_count = _read_records(manifest_path)
+    if line_count < min_lines or line_count <= len(records):
+        return False
+    try:
+        descriptor, tmp_path = tempfile.mkstemp(
+            prefix=MANIFEST_FILENAME + ".", suffix=".tmp", dir=directory
+        )
+    except OSError as error:
+        LOGGER.warning(
+            "cannot compact render manifest in '{}': {}".format(directory, error)
+        )
+        return False
+    try:
+        with os.fdopen(descriptor, "w") as manifest_file:
+            manifest_file.write(
+                "".join(json.dumps(record) + "\n" for record in records.values())
+            )
+        os.replace(tmp_path, manifest_path)
+    except OSError as error:
+        LOGGER.warning(
+            "cannot compact render manifest in '{}': {}".format(directory, error)
+        )
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    LOGGER.debug(
+        "compacted render manifest of '{}' from {} to {} lines"
+        "".format(directory, line_count, len(records))
+    )
+    return True
+
+
+def get_states(render_plan):
+    """
+    Get the state of each row of the plan from the manifests of its directories.
+
+    Only the manifests are read: the rendered files are not checked on disk.
+
+    Args:
+        render_plan(plan.RenderPlan):
+
+    Returns:
+        list[str or None]: state of each row, None if not in a manifest.
+    """
+    records_by_directory = [
+        read_manifest(directory) for directory in render_plan.directories
+    ]
+    states = []
+    for row in range(len(render_plan)):
+        records = records_by_directory[render_plan.get_directory_id(row)]
+        record = records.get(render_plan.get_filename(row))
+        states.append(None if record is None else record.get("state"))
+    return states
+
+
+class ManifestWriter(object):
+    """
+    Append the state changes of rendered files to the manifest of their directory.
+
+    Errors while writing a manifest are only logged, so they never interrupt a render.
+    """
+
+    def __init__(self):
+        self._files = {}  # type: dict[str, object]
+        self._states = {}  # type: dict[str, str]
+        self._errors = {}  # type: dict[str, str]
+        self._broken_directories = set()  # type: set[str]
+
+    def _get_file(self, directory):
+        manifest_file = self._files.get(directory)
+        if manifest_file is not None or directory in self._broken_directories:
+            return manifest_file
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            manifest_file = open(get_manifest_path(directory), "a")
+        except OSError as error:
+            LOGGER.warning(
+                "cannot write render manifest in '{}': {}".format(directory, error)
+            )
+            self._broken_directories.add(directory)
+            return None
+        self._files[directory] = manifest_file
+        return manifest_file
+
+    def _write(self, directory, records):
+        manifest_file = self._get_file(directory)
+        if manifest_file is None:
+            return
+        try:
+            manifest_file.write(
+                "".join(json.dumps(record) + "\n" for record in records)
+            )
+            manifest_file.flush()
+        except OSError as error:
+            LOGGER.warning(
+                "cannot write render manifest in '{}': {}".format(directory, error)
+            )
+
+    def get_state(self, path):
+        """
+        Returns:
+            str or None: state recorded by this writer for the given path.
+        """
+        return self._states.get(path)
+
+    def get_error(self, path):
+        """
+        Returns:
+            str or None: error recorded by this writer if the given path failed.
+        """
+        return self._errors.get(path)
+
+    def record(self, path, state, node, frame, view, **kwargs):
+        """
+        Args:
+            path(str): absolute normalized path of the rendered file
+            state(str): one of the ``STATE_`` constants
+            node(str): full name of the Write node
+            frame(int):
+            view(str):
+            **kwargs: additional json-serializable data
+        """
+        self.record_many([(path, node, frame, view)], state, **kwargs)
+
+    def record_many(self, entries, state, **kwargs):
+        """
+        Same as :meth:`record` for multiple files, with a single write per directory.
+
+        Args:
+            entries(collections.Iterable[tuple[str, str, int, str]]):
+                (path, node, frame, view)
+            state(str): one of the ``STATE_`` constants
+            **kwargs: additional json-serializable data
+        """
+        now = time.time()
+        records_by_directory = {}
+        for path, node, frame, view in entries:
+            directory, filename = os.path.split(path)
+            record = {
+                "file": filename,
+                "state": state,
+                "node": node,
+                "frame": frame,
+                "view": view,
+                "time": now,
+            }
+            record.update(kwargs)
+            records_by_directory.setdefault(directory, []).append(record)
+            self._states[path] = state
+            if state == STATE_FAILED:
+                self._errors[path] = kwargs.get("error") or "unknown error"
+            else:
+                self._errors.pop(path, None)
+
+        for directory, records in records_by_directory.items():
+            self._write(directory, records)
+
+    def finish(self, path, node, frame, view):
+        """
+        Record the given file as finished, with its size and modification time,
+        or as failed if it was not written.
+
+        Returns:
+            bool: True if the file exists on disk.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.record(path, STATE_FAILED, node, frame, view, error="file not written")
+            return False
+        self.record(
+            path,
+            STATE_FINISHED,
+            node,
+            frame,
+            view,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+        )
+        return True
+
+    def close(self):
+        """
+        Record the files started but never finished as failed, then close and
+        compact the manifests.
+        """
+        interrupted = [
+            path for path, state in self._states.items() if state == STATE_STARTED
+        ]
+        for path in interrupted:
+            directory, filename = os.path.split(path)
+            self._write(
+                directory,
+                [
+                    {
+                        "file": filename,
+                        "state": STATE_FAILED,
+                        "time": time.time(),
+                        "error": "render interrupted",
+                    }
+                ],
+            )
+            self._states[path] = STATE_FAILED
+            self._errors[path] = "render interrupted"
+
+        for manifest_file in self._files.values():
+            try:
+                manifest_file.close()
+            except OSError:
+                pass
+        for directory in self._files:
+            compact_manifest(directory)
+        self._files = {}
@@ -0,0 +1,134 @@
+"""
+Cached index of the Write nodes of the script, including those nested in groups,
+with their resolved path.
+
+Walking the whole node graph and resolving the tcl of each path is slow on big
+scripts, so the index is only rebuilt when nuke callbacks report a change: a Write
+node created or deleted, or one of the knobs affecting its path edited.
+
+Nuke doesn't run the callbacks for every change: a knob set from python, or an
+expression of the path depending on other nodes, leaves the cached path outdated.
+:meth:`WriteNodeIndex.invalidate` must be called to resolve the paths again, the
+dialog does it when opened and on its "Refresh" button.
+"""
+import logging
+
+import nuke
+
+LOGGER = logging.getLogger("LocaloRender.nodeindex")
+
+PATH_KNOBS = frozenset(["file", "views", "proxy", "name"])
+"""
+Knobs of a Write node whose change invalidates its cached path.
+"""
+
+
+class WriteNodeIndex(object):
+    """
+    Write nodes of the script and their ``nuke.filename``, computed on first access
+    and kept until invalidated by the callbacks added with :meth:`install`.
+    """
+
+    def __init__(self):
+        self._nodes = None  # type: list[nuke.Node] | None
+        # node full name: path returned by nuke.filename
+        self._filenames = {}  # type: dict[str, str]
+        self._installed = False
+
+    @property
+    def is_installed(self):
+        return self._installed
+
+    def install(self):
+        """
+        Add the nuke callbacks keeping the index up-to-date.
+        """
+        if self._installed:
+            return
+        nuke.addOnCreate(self._on_write_created, nodeClass="Write")
+        nuke.addOnDestroy(self._on_write_destroyed, nodeClass="Write")
+        nuke.addKnobChanged(self._on_write_knob_changed, nodeClass="Write")
+        # the root holds the views, the proxy mode and knobs used in tcl paths
+        nuke.addKnobChanged(self._on_root_knob_changed, nodeClass="Root")
+        nuke.addOnScriptLoad(self.invalidate)
+        nuke.addOnScriptClose(self.invalidate)
+        self._installed = True
+        LOGGER.debug("installed Write node index callbacks")
+
+    def uninstall(self):
+        if not self._installed:
+            return
+        nuke.removeOnCreate(self._on_write_created, nodeClass="Write")
+        nuke.removeOnDestroy(self._on_write_destroyed, nodeClass="Write")
+        nuke.removeKnobChanged(self._on_write_knob_changed, nodeClass="Write")
+        nuke.removeKnobChanged(self._on_root_knob_changed, nodeClass="Root")
+        nuke.removeOnScriptLoad(self.invalidate)
+        nuke.removeOnScriptClose(self.invalidate)
+        self._installed = False
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Forget all the nodes and paths, they are computed again on next access.
+        """
+        self._nodes = None
+        self._filenames = {}
+
+    def get_write_nodes(self):
+        """
+        Returns:
+            list[nuke.Node]: all the Write nodes of the script, including the ones in groups.
+        """
+        if self._nodes is None or not self._installed:
+            self._nodes = nuke.allNodes("Write", nuke.root(), recurseGroups=True)
+        return list(self._nodes)
+
+    def get_filename(self, write_node):
+        """
+        Args:
+            write_node(nuke.Node):
+
+        Returns:
+            str or None: path of the node as returned by ``nuke.filename``.
+        """
+        if not self._installed:
+            return nuke.filename(write_node)
+        name = write_node.fullName()
+        if name not in self._filenames:
+            self._filenames[name] = nuke.filename(write_node)
+        return self._filenames[name]
+
+    def _on_root_knob_changed(self):
+        knob = nuke.thisKnob()
+        if knob is not None and knob.name() in ("frame", "selected"):
+            return
+        self._filenames = {}
+
+    def _on_write_created(self):
+        self._nodes = None
+
+    def _on_write_destroyed(self):
+        self._nodes = None
+        self._filenames.pop(nuke.thisNode().fullName(), None)
+
+    def _on_write_knob_changed(self):
+        knob = nuke.thisKnob()
+        if knob is None or knob.name() not in PATH_KNOBS:
+            return
+        if knob.name() == "name":
+            # the full name used as key changed, and maybe the paths using it
+            self.invalidate()
+            return
+        self._filenames.pop(nuke.thisNode().fullName(), None)
+
+
+_INDEX = WriteNodeIndex()
+
+
+def get_index():
+    """
+    Returns:
+        WriteNodeIndex: the index shared by the whole session. Its callbacks must
+            be installed with :meth:`WriteNodeIndex.install` for it to cache anything.
+    """
+    return _INDEX
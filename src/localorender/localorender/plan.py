@@ -0,0 +1,350 @@
+"""
+Compact storage of all the paths a render will write to disk.
+"""
+import array
+import collections
+import itertools
+import os
+
+STATUS_UNKNOWN = 0
+STATUS_MISSING = 1
+STATUS_EXISTS = 2
+STATUS_COPYING = 3
+STATUS_COPY_FAILED = 4
+STATUS_CORRUPT = 5
+
+PlanNode = collections.namedtuple(
+    "PlanNode", ["node", "name", "label", "template", "views"]
+)
+"""
+What is needed to plan the paths of a node.
+
+``template`` is an object with an ``expand(frames, views)`` method like
+:class:`localorender.template.PathTemplate`, or None if the node has no path.
+``views`` are the views to plan for this node.
+"""
+
+
+class PlanCancelled(Exception):
+    """
+    Raised when the building of a plan is cancelled.
+    """
+
+    pass
+
+
+class RenderPlan(object):
+    """
+    Columnar storage of the paths that will be written by a render.
+
+    Each row is a path that correspond to a Write node, a frame and a view. Nodes,
+    views and directories are stored once in lookup tables and each row only store
+    their index, so large plans stay cheap in memory.
+    """
+
+    def __init__(self):
+        self.nodes = []  # type: list[object]
+        self.node_names = []  # type: list[str]
+        self.node_labels = []  # type: list[str]
+        self.views = []  # type: list[str]
+        self.directories = []  # type: list[str]
+
+        self._node_ids = array.array("l")
+        self._frames = array.array("l")
+        self._view_ids = array.array("l")
+        self._directory_ids = array.array("l")
+        self._filenames = []  # type: list[str]
+        self._statuses = bytearray()
+
+        self._view_index = {}  # type: dict[str, int]
+        self._directory_index = {}  # type: dict[str, int]
+        # built on first lookup only
+        self._row_index = None  # type: dict[tuple[str, int, str], int] | None
+        self._directory_rows = None  # type: dict[int, array.array] | None
+
+    def __len__(self):
+        return len(self._frames)
+
+    def add_node(self, node, name, label=None):
+        """
+        Args:
+            node(object): the nuke node, or any object representing it
+            name(str): unique name of the node (like the full name)
+            label(str or None): short name for display, default to the name
+
+        Returns:
+            int: identifier of the node to use with :meth:`add_paths`
+        """
+        self.nodes.append(node)
+        self.node_names.append(name)
+        self.node_labels.append(name if label is None else label)
+        return len(self.nodes) - 1
+
+    def _get_view_id(self, view):
+        view_id = self._view_index.get(view)
+        if view_id is None:
+            view_id = self._view_index[view] = len(self.views)
+            self.views.append(view)
+        return view_id
+
+    def _get_directory_id(self, directory):
+        directory_id = self._directory_index.get(directory)
+        if directory_id is None:
+            directory_id = self._directory_index[directory] = len(self.directories)
+            self.directories.append(directory)
+        return directory_id
+
+    def add_paths(self, node_id, paths):
+        """
+        Add new rows for the given node.
+
+        Args:
+            node_id(int): as returned by :meth:`add_node`
+            paths(collections.Iterable[tuple[str, int, str]]): (path, frame, view),
+                where path is normalized (only use the os separator)
+        """
+        sep = os.sep
+        frames = self._frames
+        view_ids = self._view_ids
+        directory_ids = self._directory_ids
+        filenames = self._filenames
+        count = len(frames)
+
+        # consecutive paths usually share the same directory and view
+        last_directory = last_view = None
+        directory_id = view_id = -1
+        for path, frame, view in paths:
+            directory, _, filename = path.rpartition(sep)
+            if directory != last_directory:
+                last_directory = directory
+                directory_id = self._get_directory_id(directory or sep)
+            if view != last_view:
+                last_view = view
+                view_id = self._get_view_id(view)
+            frames.append(frame)
+            view_ids.append(view_id)
+            directory_ids.append(directory_id)
+            filenames.append(filename)
+
+        count = len(frames) - count
+        self._node_ids.extend(array.array("l", [node_id]) * count)
+        self._statuses.extend(bytes(count))
+        self._row_index = None
+        self._directory_rows = None
+
+    def get_node(self, row):
+        return self.nodes[self._node_ids[row]]
+
+    def get_node_id(self, row):
+        return self._node_ids[row]
+
+    def get_node_name(self, row):
+        return self.node_names[self._node_ids[row]]
+
+    def get_node_label(self, row):
+        return self.node_labels[self._node_ids[row]]
+
+    def get_frame(self, row):
+        return self._frames[row]
+
+    def get_view(self, row):
+        return self.views[self._view_ids[row]]
+
+    def get_directory(self, row):
+        return self.directories[self._directory_ids[row]]
+
+    def get_directory_id(self, row):
+        return self._directory_ids[row]
+
+    def get_filename(self, row):
+        return self._filenames[row]
+
+    def get_path(self, row):
+        return os.path.join(
+            self.directories[self._directory_ids[row]], self._filenames[row]
+        )
+
+    def get_status(self, row):
+        return self._statuses[row]
+
+    def set_status(self, row, status):
+        """
+        Returns:
+            bool: True if the status changed.
+        """
+        if self._statuses[row] == status:
+            return False
+        self._statuses[row] = status
+        return True
+
+    def find_row(self, node_name, frame, view):
+        """
+        Args:
+            node_name(str):
+            frame(int):
+            view(str):
+
+        Returns:
+            int or None: the row for the given context, None if not in the plan.
+        """
+        if self._row_index is None:
+            self._row_index = {
+                (self.node_names[node_id], frame_, self.views[view_id]): row
+                for row, (node_id, frame_, view_id) in enumerate(
+                    zip(self._node_ids, self._frames, self._view_ids)
+                )
+            }
+        return self._row_index.get((node_name, frame, view))
+
+    def find_written_row(self, node_name, frame, view):
+        """
+        Same as :meth:`find_row` but for a path written by nuke: paths without a
+        view token are only planned for the first view, but nuke reports them
+        for each view.
+
+        Returns:
+            int or None: the row for the given context, None if not in the plan.
+        """
+        row = self.find_row(node_name, frame, view)
+        if row is not None:
+            return row
+        for other_view in self.views:
+            row = self.find_row(node_name, frame, other_view)
+            if row is not None:
+                return row
+        return None
+
+    def get_directory_rows(self, directory):
+        """
+        Args:
+            directory(str): one of :attr:`directories`
+
+        Returns:
+            collections.Sequence[int]: rows whose path is in the given directory.
+        """
+        directory_id = self._directory_index.get(directory)
+        if directory_id is None:
+            return ()
+        if self._directory_rows is None:
+            self._directory_rows = {}
+            for row, directory_id_ in enumerate(self._directory_ids):
+                rows = self._directory_rows.get(directory_id_)
+                if rows is None:
+                    rows = self._directory_rows[directory_id_] = array.array("l")
+                rows.append(row)
+        return self._directory_rows.get(directory_id, ())
+
+    def update_statuses(self, get_entries, directories=None):
+        """
+        Update the existence status of rows from their directory content.
+
+        Rows being copied, or whose copy failed, keep their status until their
+        file exists. Rows whose file is corrupt keep their status until it is removed.
+
+        Args:
+            get_entries(callable): return the collection of file names of the given
+                directory, or None if unknown.
+            directories(collections.Iterable[str] or None):
+                only update the rows of those directories. Default to all rows.
+
+        Returns:
+            list[int]: rows whose status changed.
+        """
+        if directories is None:
+            rows = range(len(self))
+            directories = self.directories
+        else:
+            directories = list(directories)
+            rows = sorted(
+                row
+                for directory in directories
+                for row in self.get_directory_rows(directory)
+            )
+        entries_by_directory = {
+            self._directory_index[directory]: get_entries(directory)
+            for directory in directories
+            if directory in self._directory_index
+        }
+        statuses = self._statuses
+        directory_ids = self._directory_ids
+        filenames = self._filenames
+        copy_statuses = (STATUS_COPYING, STATUS_COPY_FAILED)
+        changed = []
+        for row in rows:
+            entries = entries_by_directory[directory_ids[row]]
+            if entries is None:
+                status = STATUS_UNKNOWN
+            elif filenames[row] in entries:
+                if statuses[row] == STATUS_CORRUPT:
+                    continue
+                status = STATUS_EXISTS
+            elif statuses[row] in copy_statuses:
+                continue
+            else:
+                status = STATUS_MISSING
+            if statuses[row] != status:
+                statuses[row] = status
+                changed.append(row)
+        return changed
+
+    def get_sort_order(self, column, descending=False):
+        """
+        Args:
+            column(str): one of "frame", "node", "path", "status", "view".
+            descending(bool):
+
+        Returns:
+            list[int]: the rows in sorted order
+        """
+        if column == "frame":
+            key = self._frames.__getitem__
+        elif column == "node":
+            labels = self.node_labels
+            node_ids = self._node_ids
+            key = lambda row: labels[node_ids[row]]
+        elif column == "path":
+            key = self.get_path
+        elif column == "status":
+            key = self._statuses.__getitem__
+        elif column == "view":
+            views = self.views
+            view_ids = self._view_ids
+            key = lambda row: views[view_ids[row]]
+        else:
+            raise ValueError("Unsupported column '{}'".format(column))
+
+        return sorted(range(len(self)), key=key, reverse=descending)
+
+
+def build_render_plan(plan_nodes, frames, cancel_event=None, batch_size=8192):
+    """
+    Create a new plan with all the paths of the given nodes.
+
+    Args:
+        plan_nodes(list[PlanNode]):
+        frames(collections.Iterable[int]): frames in ascending order
+        cancel_event(threading.Event or None): set it to stop building the plan.
+        batch_size(int): number of paths added between each check of the cancel event.
+
+    Raises:
+        PlanCancelled: if the cancel event was set.
+
+    Returns:
+        RenderPlan:
+    """
+    render_plan = RenderPlan()
+    for plan_node in plan_nodes:
+        node_id = render_plan.add_node(plan_node.node, plan_node.name, plan_node.label)
+        if plan_node.template is None:
+            continue
+
+        paths = iter(plan_node.template.expand(frames, plan_node.views))
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PlanCancelled()
+            batch = list(itertools.islice(paths, batch_size))
+            if not batch:
+                break
+            render_plan.add_paths(node_id, batch)
+
+    return render_plan
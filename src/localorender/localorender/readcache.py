@@ -0,0 +1,537 @@
+"""
+Copy the files read upstream of the rendered Write nodes to a local disk cache
+before rendering, so a render bound by reading plates from a file server reads
+each of them once, in parallel, instead of frame by frame.
+
+The cache mirrors the source paths: ``/mnt/show/plate.1001.exr`` is cached as
+``<cache_root>/mnt/show/plate.1001.exr``, so a Read node can be pointed to its
+cached copies by only changing the start of its path. The least recently used
+files are removed when the cache is bigger than its size limit.
+
+The files read by a Read node are only found from the rendered frames, clamped
+to its frame-range, when nothing changes the time between the Write node and the
+Read node: default frame mode, no loop or bounce before and after its range, its
+first frame not moved from the first file and no time node (TimeOffset, Retime,
+FrameHold, ...) downstream of it. Otherwise all the files of its frame-range are
+cached. A Read node is only pointed to the cache if all those files are cached.
+"""
+import collections
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import nuke
+
+from . import template
+
+LOGGER = logging.getLogger("LocaloRender.readcache")
+
+CACHE_DIR_ENV = "LOCALORENDER_READ_CACHE"
+CACHE_SIZE_ENV = "LOCALORENDER_READ_CACHE_SIZE"
+"""
+Size limit of the cache in gigabytes.
+"""
+
+DEFAULT_MAX_SIZE = 50 * 1024**3
+
+TIME_NODE_CLASSES = frozenset(
+    [
+        "AppendClip",
+        "FrameBlend",
+        "FrameHold",
+        "FrameRange",
+        "Kronos",
+        "OFlow",
+        "OFlow2",
+        "Retime",
+        "TimeBlur",
+        "TimeClip",
+        "TimeEcho",
+        "TimeOffset",
+        "TimeWarp",
+    ]
+)
+"""
+Classes of the nodes that can read their input at other frames than the rendered
+ones.
+"""
+
+UpstreamRead = collections.namedtuple("UpstreamRead", ["template", "retimed"])
+"""
+Files read upstream of the rendered Write nodes by a node: its path template, and
+if a time node is between them.
+"""
+
+PrefetchResult = collections.namedtuple(
+    "PrefetchResult", ["cached_nodes", "copied", "hits", "failed", "copied_size"]
+)
+"""
+Summary of :meth:`ReadCache.prefetch`.
+
+``cached_nodes`` are the Read nodes whose files at the rendered frames are all cached.
+"""
+
+
+def get_default_cache_root():
+    """
+    Returns:
+        str: directory of the cache
+    """
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        tempfile.gettempdir(), "LocaloRender-readcache"
+    )
+
+
+def get_default_max_size():
+    """
+    Returns:
+        int: size limit of the cache in bytes
+    """
+    try:
+        return int(float(os.environ[CACHE_SIZE_ENV]) * 1024**3)
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_SIZE
+
+
+def _iter_upstream_nodes(node):
+    """
+    Like :func:`fingerprint.iter_upstream_nodes`, also telling if a time node is
+    between the given node and each upstream node. The content of a group is
+    considered after a time node if the group contains one.
+
+    Returns:
+        collections.Iterable[tuple[nuke.Node, bool]]:
+    """
+    dependency_flags = nuke.INPUTS | nuke.HIDDEN_INPUTS | nuke.EXPRESSIONS
+    seen = set()
+    stack = [(node, False)]
+    while stack:
+        node, retimed = stack.pop()
+        key = (node.fullName(), retimed)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield node, retimed
+        retimed = retimed or node.Class() in TIME_NODE_CLASSES
+        stack.extend(
+            (dependency, retimed) for dependency in node.dependencies(dependency_flags)
+        )
+        if isinstance(node, nuke.Group):
+            children = node.nodes()
+            retimed = retimed or any(
+                child.Class() in TIME_NODE_CLASSES for child in children
+            )
+            stack.extend((child, retimed) for child in children)
+
+
+def get_upstream_reads(write_nodes, use_proxy=False):
+    """
+    Args:
+        write_nodes(list[nuke.Node]):
+        use_proxy(bool): if the render will happen in proxy mode.
+
+    Returns:
+        dict[nuke.Node, UpstreamRead]: files read by each node reading files
+            upstream of the given Write nodes.
+    """
+    reads = {}
+    read_nodes = {}  # type: dict[str, nuke.Node]
+    for write_node in write_nodes:
+        for node, retimed in _iter_upstream_nodes(write_node):
+            name = node.fullName()
+            if name in read_nodes:
+                if retimed:
+                    node = read_nodes[name]
+                    reads[node] = reads[node]._replace(retimed=True)
+                continue
+            if node.Class() == "Write" or not node.knob("file"):
+                continue
+            if use_proxy and node.knob("proxy") and node["proxy"].value():
+                continue
+            read_path = nuke.filename(node)
+            if read_path:
+                read_nodes[name] = node
+                reads[node] = UpstreamRead(template.PathTemplate(read_path), retimed)
+    return reads
+
+
+def _get_knob_value(node, knob_name, default=None):
+    knob = node.knob(knob_name)
+    return default if knob is None else knob.value()
+
+
+def _reads_rendered_frames(node):
+    """
+    Returns:
+        bool: True if the node reads the file of the rendered frame, or of the
+            closest frame of its range: nothing moves its frames in time.
+    """
+    if _get_knob_value(node, "frame_mode", "expression") not in ("", "expression"):
+        return False
+    if str(_get_knob_value(node, "frame", "")).strip():
+        return False
+    for knob_name in ("before", "after"):
+        if _get_knob_value(node, knob_name, "hold") not in ("hold", "black"):
+            return False
+    origfirst = _get_knob_value(node, "origfirst")
+    return origfirst is None or int(origfirst) == int(node["first"].value())
+
+
+def get_read_frames(node, frames, retimed=False):
+    """
+    Args:
+        node(nuke.Node): node reading files
+        frames(list[int]): rendered frames, in ascending order
+        retimed(bool): True if a time node is between the rendered Write nodes and
+            the node.
+
+    Returns:
+        list[int] or None: frames of the files read by the node, all the files of
+            its frame-range if they cannot be found from the rendered frames.
+            None if unknown.
+    """
+    if node.knob("first") is None or node.knob("last") is None:
+        return None if retimed else frames
+    first = int(node["first"].value())
+    last = int(node["last"].value())
+    if retimed or not _reads_rendered_frames(node):
+        return list(range(first, last + 1))
+    return sorted(set(min(max(frame, first), last) for frame in frames))
+
+
+def get_read_paths(reads, frames, views):
+    """
+    Args:
+        reads(dict[nuke.Node, UpstreamRead]): as returned by :func:`get_upstream_reads`
+        frames(list[int]): rendered frames, in ascending order
+        views(list[str]): rendered views
+
+    Returns:
+        dict[nuke.Node, list[str]]: unique paths read by each node, empty if they
+            are unknown.
+    """
+    paths_by_node = {}
+    for node, read in reads.items():
+        read_frames = frames
+        if read.template.has_frame:
+            read_frames = get_read_frames(node, frames, retimed=read.retimed)
+        if read_frames is None:
+            LOGGER.debug(
+                "read cache: frames read by '{}' are unknown".format(node.fullName())
+            )
+            paths_by_node[node] = []
+            continue
+        paths_by_node[node] = [
+            path for path, _, _ in read.template.expand(read_frames, views)
+        ]
+    return paths_by_node
+
+
+def get_render_read_paths(render_plan, rows, use_proxy=False):
+    """
+    Find the files read upstream of the Write nodes of the given rows.
+
+    Uses nuke, so must be called from the main thread.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows of the plan that will be rendered
+        use_proxy(bool): if the render will happen in proxy mode.
+
+    Returns:
+        dict[nuke.Node, list[str]]: see :func:`get_read_paths`
+    """
+    node_ids = set()
+    frames = set()
+    views = set()
+    for row in rows:
+        node_ids.add(render_plan.get_node_id(row))
+        frames.add(render_plan.get_frame(row))
+        views.add(render_plan.get_view(row))
+
+    write_nodes = [render_plan.nodes[node_id] for node_id in sorted(node_ids)]
+    reads = get_upstream_reads(write_nodes, use_proxy=use_proxy)
+    return get_read_paths(reads, sorted(frames), sorted(views))
+
+
+def prefetch_read_paths(read_cache, paths_by_node, progress_callback=None):
+    """
+    Copy in the cache the given files, and log the result.
+
+    Doesn't use nuke, so can be called from any thread.
+
+    Args:
+        read_cache(ReadCache):
+        paths_by_node(dict[nuke.Node, list[str]]): as returned by
+            :func:`get_render_read_paths`
+        progress_callback(callable or None): see :meth:`ReadCache.prefetch`
+
+    Returns:
+        PrefetchResult:
+    """
+    result = read_cache.prefetch(paths_by_node, progress_callback=progress_callback)
+    LOGGER.info(
+        "read cache: {} files copied ({:.1f} MB), {} already cached, {} failed; "
+        "{}/{} read nodes using the cache".format(
+            result.copied,
+            result.copied_size / 1024**2,
+            result.hits,
+            result.failed,
+            len(result.cached_nodes),
+            len(paths_by_node),
+        )
+    )
+    return result
+
+
+def prefetch_render_reads(
+    read_cache, render_plan, rows, use_proxy=False, progress_callback=None
+):
+    """
+    Copy in the cache the files read upstream of the Write nodes of the given rows.
+
+    Args:
+        read_cache(ReadCache):
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows of the plan that will be rendered
+        use_proxy(bool): if the render will happen in proxy mode.
+        progress_callback(callable or None): see :meth:`ReadCache.prefetch`
+
+    Returns:
+        PrefetchResult:
+    """
+    paths_by_node = get_render_read_paths(render_plan, rows, use_proxy=use_proxy)
+    return prefetch_read_paths(
+        read_cache, paths_by_node, progress_callback=progress_callback
+    )
+
+
+class ReadCache(object):
+    """
+    Local disk cache of read files, with a least-recently-used size limit.
+
+    Args:
+        cache_root(str or None): directory of the cache, created if necessary.
+            Default to :func:`get_default_cache_root`.
+        max_size(int or None): size limit in bytes. Default to :func:`get_default_max_size`.
+    """
+
+    def __init__(self, cache_root=None, max_size=None):
+        self.cache_root = cache_root or get_default_cache_root()
+        self.max_size = get_default_max_size() if max_size is None else max_size
+        # cached path: size, ordered from the least recently used
+        self._entries = collections.OrderedDict()  # type: dict[str, int]
+        self._size = 0
+        self._pinned = set()  # type: set[str]
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._load_entries()
+
+    @property
+    def size(self):
+        """
+        Current size of the cache in bytes.
+        """
+        return self._size
+
+    def _load_entries(self):
+        entries = []
+        for dir_path, _, filenames in os.walk(self.cache_root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._entries[path] = size
+            self._size += size
+
+    def get_cache_path(self, path):
+        """
+        Args:
+            path(str): absolute path of a source file, that can contain frame and view tokens.
+
+        Returns:
+            str: path of its copy in the cache.
+        """
+        path = os.path.splitdrive(os.path.normpath(path))[1].lstrip("\\/")
+        return os.path.join(self.cache_root, path)
+
+    def _reserve(self, cache_path, size):
+        """
+        Make room for a new file by removing the least recently used ones that are
+        not used by the current prefetch.
+
+        Returns:
+            bool: False if the file cannot fit in the cache.
+        """
+        with self._lock:
+            self._forget(cache_path)
+            for old_path in list(self._entries):
+                if self._size + size <= self.max_size:
+                    break
+                if old_path in self._pinned:
+                    continue
+                self._forget(old_path)
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+            if self._size + size > self.max_size:
+                return False
+            self._entries[cache_path] = size
+            self._size += size
+            self._pinned.add(cache_path)
+            return True
+
+    def _forget(self, cache_path):
+        size = self._entries.pop(cache_path, None)
+        if size is not None:
+            self._size -= size
+
+    def _fetch(self, path):
+        """
+        Returns:
+            str or bool or None: True if copied, False if already cached, None if
+                the source doesn't exist, else the error message.
+        """
+        if self._cancel_event.is_set():
+            return "cancelled"
+        cache_path = self.get_cache_path(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        try:
+            cached_stat = os.stat(cache_path)
+        except OSError:
+            cached_stat = None
+        if (
+            cached_stat is not None
+            and cached_stat.st_size == stat.st_size
+            and cached_stat.st_mtime == stat.st_mtime
+        ):
+            with self._lock:
+                self._pinned.add(cache_path)
+                if cache_path in self._entries:
+                    self._entries.move_to_end(cache_path)
+            self._touch(cache_path, stat.st_mtime)
+            return False
+
+        if not self._reserve(cache_path, stat.st_size):
+            return "cache size limit reached"
+        tmp_path = cache_path + ".localorender-tmp"
+        try:
+            directory = os.path.dirname(cache_path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+            # copy2 keeps the modification time, compared to the source on next use
+            shutil.copy2(path, tmp_path)
+            if os.stat(tmp_path).st_size != stat.st_size:
+                raise OSError("size mismatch after copy")
+            os.replace(tmp_path, cache_path)
+            self._touch(cache_path, stat.st_mtime)
+        except OSError as error:
+            with self._lock:
+                self._forget(cache_path)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return str(error)
+        return True
+
+    @staticmethod
+    def _touch(cache_path, mtime):
+        # the access time sorts the entries when the cache is loaded again
+        try:
+            os.utime(cache_path, (time.time(), mtime))
+        except OSError:
+            pass
+
+    def prefetch(self, paths_by_node, max_workers=8, progress_callback=None):
+        """
+        Copy the given files in the cache, in parallel.
+
+        Args:
+            paths_by_node(dict[nuke.Node, list[str]]): as returned by :func:`get_read_paths`
+            max_workers(int): maximum number of files copied at the same time.
+            progress_callback(callable or None): called with the number of files
+                processed and the total, from the calling thread.
+
+        Returns:
+            PrefetchResult:
+        """
+        self._cancel_event.clear()
+        unique_paths = set()
+        for paths in paths_by_node.values():
+            unique_paths.update(paths)
+        unique_paths = sorted(unique_paths)
+        total = len(unique_paths)
+
+        results = {}
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="LocaloRender-readcache"
+        ) as executor:
+            futures = executor.map(self._fetch, unique_paths)
+            for index, (path, result) in enumerate(zip(unique_paths, futures)):
+                results[path] = result
+                if isinstance(result, str) and not self._cancel_event.is_set():
+                    LOGGER.warning("cannot cache '{}': {}".format(path, result))
+                if progress_callback:
+                    progress_callback(index + 1, total)
+
+        cached_nodes = [
+            node
+            for node, paths in paths_by_node.items()
+            if paths and all(results[path] in (True, False) for path in paths)
+        ]
+        copied = [path for path, result in results.items() if result is True]
+        copied_size = 0
+        for path in copied:
+            copied_size += self._entries.get(self.get_cache_path(path), 0)
+        return PrefetchResult(
+            cached_nodes=cached_nodes,
+            copied=len(copied),
+            hits=sum(1 for result in results.values() if result is False),
+            failed=sum(1 for result in results.values() if isinstance(result, str)),
+            copied_size=copied_size,
+        )
+
+    def cancel(self):
+        """
+        Stop the current prefetch from any thread: the files not copied yet are
+        reported as failed.
+        """
+        self._cancel_event.set()
+
+    def release(self):
+        """
+        Allow the files used by the last prefetch to be removed from the cache.
+        """
+        with self._lock:
+            self._pinned.clear()
+
+    def redirect(self, nodes):
+        """
+        Point the given nodes to their cached files.
+
+        Args:
+            nodes(list[nuke.Node]): nodes whose files are all cached
+
+        Returns:
+            dict[nuke.Node, str]: original value of the file knob of the modified
+                nodes, see :func:`render.restore_file_knobs`
+        """
+        original_values = {}
+        for node in nodes:
+            source_path = nuke.filename(node)
+            original_values[node] = node["file"].value()
+            node["file"].setValue(self.get_cache_path(source_path).replace("\\", "/"))
+        return original_values
@@ -0,0 +1,932 @@
+"""
+Plan and execute renders of Write nodes, without any GUI.
+
+This is shared by the dialog and the command line interface. It requires nuke
+but must never import Qt.
+"""
+import collections
+import logging
+import os
+import shutil
+
+import nuke
+
+from . import autoscale
+from . import engine
+from . import frameset
+from . import manifest
+from . import nodeindex
+from . import plan
+from . import schedule
+from . import template
+from . import verify
+from . import watchdog
+from . import worker
+
+LOGGER = logging.getLogger("LocaloRender.render")
+
+RenderPass = collections.namedtuple("RenderPass", ["nodes", "frames", "views", "rows"])
+"""
+A single ``nuke.executeMultiple`` call: all the ``nodes`` are rendered for all the
+``frames`` and ``views``.
+"""
+
+
+def parse_frames(framerange):
+    """
+    Args:
+        framerange(str): nuke frame-range syntax like "1-10x2 20", ranges can also
+            be separated by commas.
+
+    Raises:
+        ValueError: if the frame-range doesn't contain any frame.
+
+    Returns:
+        frameset.FrameSet:
+    """
+    frames = frameset.FrameSet.from_string(framerange)
+    if not frames:
+        raise ValueError("Unsupported frame range '{}'".format(framerange))
+    return frames
+
+
+def get_write_nodes(names=None):
+    """
+    Args:
+        names(list[str] or None): full names of the nodes to get, None for all the
+            Write nodes of the script, including the ones in groups.
+
+    Raises:
+        ValueError: if one of the given name is not a Write node.
+
+    Returns:
+        list[nuke.Node]:
+    """
+    if names is None:
+        return nodeindex.get_index().get_write_nodes()
+
+    write_nodes = []
+    for name in names:
+        node = nuke.toNode(name)
+        if node is None or node.Class() != "Write":
+            raise ValueError("'{}' is not a Write node".format(name))
+        write_nodes.append(node)
+    return write_nodes
+
+
+def get_write_node_template(write_node, views):
+    """
+    Get what is needed to find the paths of the given write node.
+
+    Args:
+        write_node(nuke.Node):
+        views(list[str]): views requested for rendering
+
+    Returns:
+        tuple[template.PathTemplate | None, list[str]]:
+            template of the node paths, None if the node has no path, and the
+            requested views that the node can render.
+    """
+    original_views = write_node.knob("views").value().split(" ")  # type: list[str]
+    # we cannot render more views than defined on the Write node
+    views = [view for view in views if view in original_views]
+
+    # this resolve tcl but leave view and frame tokens
+    src_path = nodeindex.get_index().get_filename(write_node)
+    if not src_path:
+        return None, views
+    return template.PathTemplate(src_path), views
+
+
+def iter_write_node_paths(write_node, frames, views):
+    """
+    Iterate through all the paths the write node will create for the given frames and views.
+
+    Args:
+        write_node(nuke.Node):
+        frames(collections.Iterable[int]): frames in ascending order
+        views(list[str]):
+
+    Returns:
+        collections.Iterable[tuple[str, int, str]]: (path, frame, view)
+    """
+    path_template, views = get_write_node_template(write_node, views)
+    if path_template is None:
+        return
+
+    for path, frame, view in path_template.expand(frames, views):
+        yield path, frame, view
+
+
+def get_write_node_paths_by_frame(write_node, frames, views):
+    """
+    Get all the paths the write node will create for the given frames and views.
+
+    Args:
+        write_node(nuke.Node):
+        frames(list[int]):
+        views(list[str]):
+
+    Returns:
+        dict[str, tuple[int, str]]:
+    """
+    return {
+        path: (frame, view)
+        for path, frame, view in iter_write_node_paths(write_node, frames, views)
+    }
+
+
+def save_script_copy(path):
+    """
+    Save the current script to the given path without changing the current script name.
+
+    Args:
+        path(str): filesystem path to a .nk file
+    """
+    if hasattr(nuke, "scriptSaveToTemp"):
+        nuke.scriptSaveToTemp(path)
+        return
+
+    root_name = nuke.root()["name"].value()
+    modified = nuke.root().modified()
+    nuke.scriptSaveAs(path, overwrite=1)
+    nuke.root()["name"].setValue(root_name)
+    nuke.root().setModified(modified)
+
+
+def rmtree(dir_path):
+    """
+    Recursiverly remove the given directory content.
+
+    Ensure it can handle permission issues.
+
+    Copied from ``tempfile.TemporaryDirectory._rmtree.``
+
+    Args:
+        dir_path: filesystem path to an existing directory
+    """
+
+    def onerror(func, path, exc_info):
+        if issubclass(exc_info[0], PermissionError):
+
+            def resetperms(path):
+                try:
+                    os.chflags(path, 0)
+                except AttributeError:
+                    pass
+                os.chmod(path, 0o700)
+
+            try:
+                if path != dir_path:
+                    resetperms(os.path.dirname(path))
+                resetperms(path)
+
+                try:
+                    os.unlink(path)
+                # PermissionError is raised on FreeBSD for directories
+                except (IsADirectoryError, PermissionError):
+                    rmtree(path)
+            except FileNotFoundError:
+                pass
+        elif issubclass(exc_info[0], FileNotFoundError):
+            pass
+        else:
+            raise
+
+    shutil.rmtree(dir_path, onerror=onerror)
+
+
+def get_plan_nodes(write_nodes, views):
+    """
+    Args:
+        write_nodes(list[nuke.Node]):
+        views(list[str]): views requested for rendering
+
+    Returns:
+        list[plan.PlanNode]:
+    """
+    plan_nodes = []
+    for write_node in write_nodes:
+        path_template, node_views = get_write_node_template(write_node, views)
+        if path_template is None:
+            LOGGER.warning(
+                "No paths found for node '{}'. The node path knob may be empty."
+                "".format(write_node.name())
+            )
+        plan_nodes.append(
+            plan.PlanNode(
+                node=write_node,
+                name=write_node.fullName(),
+                label=write_node.name(),
+                template=path_template,
+                views=node_views,
+            )
+        )
+    return plan_nodes
+
+
+def build_plan(write_nodes, frames, views):
+    """
+    Args:
+        write_nodes(list[nuke.Node]):
+        frames(frameset.FrameSet or list[int]): frames in ascending order
+        views(list[str]):
+
+    Returns:
+        plan.RenderPlan:
+    """
+    return plan.build_render_plan(get_plan_nodes(write_nodes, views), frames)
+
+
+def get_rows_to_render(render_plan, skip_existing=False, resume=False, stale_rows=None):
+    """
+    Args:
+        render_plan(plan.RenderPlan): with up-to-date statuses if skip_existing is True.
+        skip_existing(bool):
+            True to exclude the paths already on disk, unless their manifest says
+            their render was interrupted or failed, or they are marked as corrupt
+            (see :func:`verify_existing_rows`).
+        resume(bool):
+            True to only keep the paths not recorded as finished in the manifests,
+            without checking the disk.
+        stale_rows(set[int] or None):
+            with skip_existing, rows to render again even if they exist on disk,
+            because they are outdated (see :mod:`localorender.fingerprint`).
+
+    Returns:
+        list[int]: rows of the plan to render
+    """
+    rows = list(range(len(render_plan)))
+    if resume:
+        states = manifest.get_states(render_plan)
+        rows = [row for row in rows if states[row] != manifest.STATE_FINISHED]
+        LOGGER.info(
+            "resuming: skipping {} finished frames".format(len(render_plan) - len(rows))
+        )
+        return rows
+
+    if not skip_existing:
+        return rows
+
+    states = manifest.get_states(render_plan)
+    incomplete = (manifest.STATE_STARTED, manifest.STATE_FAILED)
+    stale_rows = stale_rows or ()
+    rows = [
+        row
+        for row in rows
+        if render_plan.get_status(row) != plan.STATUS_EXISTS
+        or states[row] in incomplete
+        or row in stale_rows
+    ]
+    LOGGER.info(
+        "skipping {} existing {}frames".format(
+            len(render_plan) - len(rows), "up-to-date " if stale_rows else ""
+        )
+    )
+    return rows
+
+
+def get_finished_rows(manifest_writer, render_plan, rows):
+    """
+    Returns:
+        list[int]: rows recorded as finished by the given manifest writer.
+    """
+    return [
+        row
+        for row in rows
+        if manifest_writer.get_state(render_plan.get_path(row))
+        == manifest.STATE_FINISHED
+    ]
+
+
+def get_rendered_sizes(manifest_writer, render_plan, rows):
+    """
+    Args:
+        manifest_writer(manifest.ManifestWriter): of the render
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows that were rendered
+
+    Returns:
+        dict[tuple[str, int, str], int]: size in bytes of the file written for
+            each (node, frame, view) that finished rendering.
+    """
+    sizes = {}
+    for row in get_finished_rows(manifest_writer, render_plan, rows):
+        try:
+            size = os.stat(render_plan.get_path(row)).st_size
+        except OSError:
+            continue
+        key = (
+            render_plan.get_node_name(row),
+            render_plan.get_frame(row),
+            render_plan.get_view(row),
+        )
+        sizes[key] = size
+    return sizes
+
+
+def get_frame_counts(render_plan, rows):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(collections.Iterable[int]):
+
+    Returns:
+        dict[str, int]: number of rows of each Write node full name.
+    """
+    counts = collections.Counter(render_plan.get_node_id(row) for row in rows)
+    return {render_plan.node_names[node_id]: count for node_id, count in counts.items()}
+
+
+def get_existing_rows(render_plan):
+    """
+    Args:
+        render_plan(plan.RenderPlan): with up-to-date statuses
+
+    Returns:
+        list[int]: rows whose file exists on disk, corrupt or not.
+    """
+    return [
+        row
+        for row in range(len(render_plan))
+        if render_plan.get_status(row) in (plan.STATUS_EXISTS, plan.STATUS_CORRUPT)
+    ]
+
+
+def set_verified_statuses(render_plan, rows, corrupt_rows):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows whose existing file was verified
+        corrupt_rows(dict[int, str]): result of :func:`verify.verify_rows`
+    """
+    for row in rows:
+        render_plan.set_status(
+            row, plan.STATUS_CORRUPT if row in corrupt_rows else plan.STATUS_EXISTS
+        )
+
+
+def verify_existing_rows(render_plan, progress_callback=None):
+    """
+    Check the files of the plan existing on disk and mark the corrupt ones, so
+    they are rendered again even when skipping existing frames.
+
+    Args:
+        render_plan(plan.RenderPlan): with up-to-date statuses
+        progress_callback(callable or None): see :func:`verify.verify_files`
+
+    Returns:
+        dict[int, str]: error of each row whose file is corrupt.
+    """
+    rows = get_existing_rows(render_plan)
+    corrupt_rows = verify.verify_rows(
+        render_plan, rows, progress_callback=progress_callback
+    )
+    set_verified_statuses(render_plan, rows, corrupt_rows)
+    return corrupt_rows
+
+
+def verify_finished_rows(manifest_writer, render_plan, rows, progress_callback=None):
+    """
+    Check the files just rendered and record the corrupt ones as failed, so they
+    are reported and retried like the frames that failed to render.
+
+    Args:
+        manifest_writer(manifest.ManifestWriter): of the render
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows that were rendered
+        progress_callback(callable or None): see :func:`verify.verify_files`
+
+    Returns:
+        dict[int, str]: error of each row whose file is corrupt.
+    """
+    rows = get_finished_rows(manifest_writer, render_plan, rows)
+    corrupt_rows = verify.verify_rows(
+        render_plan, rows, progress_callback=progress_callback
+    )
+    record_corrupt_rows(manifest_writer, render_plan, corrupt_rows)
+    return corrupt_rows
+
+
+def record_corrupt_rows(manifest_writer, render_plan, corrupt_rows):
+    """
+    Mark the given rendered rows as corrupt, and record them as failed.
+
+    Args:
+        manifest_writer(manifest.ManifestWriter): of the render
+        render_plan(plan.RenderPlan):
+        corrupt_rows(dict[int, str]): result of :func:`verify.verify_rows`
+    """
+    for row, error in corrupt_rows.items():
+        render_plan.set_status(row, plan.STATUS_CORRUPT)
+        path, node, frame, view = _get_manifest_entry(render_plan, row)
+        manifest_writer.record(
+            path, manifest.STATE_FAILED, node, frame, view, error="corrupt: " + error
+        )
+
+
+def get_failed_items(manifest_writer, render_plan, rows):
+    """
+    Args:
+        manifest_writer(manifest.ManifestWriter): writer used for the render
+        render_plan(plan.RenderPlan):
+        rows(collections.Iterable[int]): rows that were planned
+
+    Returns:
+        dict[tuple[str, int, str], str]: error of each (node, frame, view) recorded
+            as failed by the writer.
+    """
+    failed = {}
+    for row in rows:
+        path = render_plan.get_path(row)
+        if manifest_writer.get_state(path) != manifest.STATE_FAILED:
+            continue
+        key = (
+            render_plan.get_node_name(row),
+            render_plan.get_frame(row),
+            render_plan.get_view(row),
+        )
+        failed[key] = manifest_writer.get_error(path)
+    return failed
+
+
+def get_item_rows(render_plan, items):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        items(collections.Iterable[tuple[str, int, str]]): (node, frame, view)
+
+    Returns:
+        list[int]: rows of the plan for the items, ignoring those not in the plan.
+    """
+    rows = set()
+    for node_name, frame, view in items:
+        row = render_plan.find_row(node_name, frame, view)
+        if row is not None:
+            rows.add(row)
+    return sorted(rows)
+
+
+def get_retry_delay(attempt, backoff):
+    """
+    Args:
+        attempt(int): 1 for the first retry
+        backoff(float): delay before the first retry in seconds, doubled on each retry.
+
+    Returns:
+        float: seconds to wait before the given retry.
+    """
+    return backoff * 2 ** max(0, attempt - 1)
+
+
+def _get_manifest_entry(render_plan, row):
+    return (
+        render_plan.get_path(row),
+        render_plan.get_node_name(row),
+        render_plan.get_frame(row),
+        render_plan.get_view(row),
+    )
+
+
+def record_planned(manifest_writer, render_plan, rows):
+    """
+    Args:
+        manifest_writer(manifest.ManifestWriter):
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows of the plan that will be rendered
+    """
+    entries = [_get_manifest_entry(render_plan, row) for row in rows]
+    manifest_writer.record_many(entries, manifest.STATE_PLANNED)
+
+
+def record_render_event(manifest_writer, render_plan, event, write_behind=None):
+    """
+    Update the manifest from an event of a parallel render.
+
+    Args:
+        manifest_writer(manifest.ManifestWriter):
+        render_plan(plan.RenderPlan):
+        event(engine.RenderEvent):
+        write_behind(scratch.WriteBehindQueue or None):
+            if the render happens in a scratch directory, rendered files are
+            submitted to it and are only recorded as finished once copied
+            (see :func:`record_transfers`).
+    """
+    if event.kind == engine.EVENT_HUNG:
+        # the unit is queued again, or followed by a failed event
+        return
+    if event.kind == engine.EVENT_FRAME_RENDERED:
+        items = [event.item]
+    else:
+        items = list(event.unit.iter_items())
+
+    entries = []
+    for item in items:
+        row = render_plan.find_written_row(item.node, item.frame, item.view)
+        if row is not None:
+            entries.append(_get_manifest_entry(render_plan, row))
+
+    if event.kind == engine.EVENT_STARTED:
+        manifest_writer.record_many(entries, manifest.STATE_STARTED)
+    elif write_behind and event.kind != engine.EVENT_FAILED:
+        for entry in entries:
+            write_behind.submit(entry[0], entry)
+    elif event.kind == engine.EVENT_FRAME_RENDERED:
+        for entry in entries:
+            manifest_writer.finish(*entry)
+    elif event.kind == engine.EVENT_FINISHED:
+        # frames not reported individually (like when the callbacks failed)
+        for entry in entries:
+            if manifest_writer.get_state(entry[0]) != manifest.STATE_FINISHED:
+                manifest_writer.finish(*entry)
+    elif event.kind == engine.EVENT_FAILED:
+        entries = [
+            entry
+            for entry in entries
+            if manifest_writer.get_state(entry[0]) != manifest.STATE_FINISHED
+        ]
+        manifest_writer.record_many(entries, manifest.STATE_FAILED, error=event.error)
+
+
+def record_transfers(manifest_writer, transfer_results):
+    """
+    Record the files copied from the scratch directory as finished.
+
+    Args:
+        manifest_writer(manifest.ManifestWriter):
+        transfer_results(list[scratch.TransferResult]):
+            with the manifest entry as data, as submitted by this module.
+    """
+    for result in transfer_results:
+        if result.error is None:
+            manifest_writer.finish(*result.data)
+        else:
+            path, node, frame, view = result.data
+            manifest_writer.record(
+                path, manifest.STATE_FAILED, node, frame, view, error=result.error
+            )
+
+
+def redirect_to_scratch(render_plan, rows, write_behind):
+    """
+    Make the Write nodes of the given rows render in the scratch directory.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]):
+        write_behind(scratch.WriteBehindQueue):
+
+    Returns:
+        dict[nuke.Node, str]: original value of the file knob of the modified nodes,
+            to give to :func:`restore_file_knobs` once the render is done.
+    """
+    original_values = {}
+    node_ids = set()
+    directories = set()
+    for row in rows:
+        node_ids.add(render_plan.get_node_id(row))
+        directories.add(render_plan.get_directory(row))
+
+    for node_id in node_ids:
+        node = render_plan.nodes[node_id]
+        src_path = nuke.filename(node)
+        if not src_path:
+            continue
+        original_values[node] = node["file"].value()
+        src_path = os.path.normpath(os.path.abspath(src_path))
+        node["file"].setValue(
+            write_behind.get_scratch_path(src_path).replace("\\", "/")
+        )
+
+    for directory in directories:
+        scratch_directory = write_behind.get_scratch_path(directory)
+        if not os.path.isdir(scratch_directory):
+            os.makedirs(scratch_directory, exist_ok=True)
+
+    return original_values
+
+
+def restore_file_knobs(original_values):
+    """
+    Args:
+        original_values(dict[nuke.Node, str]): as returned by :func:`redirect_to_scratch`
+    """
+    for node, value in original_values.items():
+        node["file"].setValue(value)
+
+
+def format_render_error(nodes, views, frames, error):
+    """
+    Returns:
+        str: a single line describing what failed to render.
+    """
+    return "Error while rendering node={};views={};framerange={}: {}".format(
+        nodes, views, frames, error
+    )
+
+
+def get_render_passes(render_plan, rows, coalesce=True):
+    """
+    Group the rows to render by the nuke call that will render them.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows of the plan to render
+        coalesce(bool):
+            True to render the nodes with the exact same frames and views in a single
+            pass, so nuke evaluates their shared upstream graph only once per frame.
+            Else there is one pass per node.
+
+    Returns:
+        list[RenderPass]:
+    """
+    frames_by_node = collections.OrderedDict()  # type: dict[int, set[int]]
+    views_by_node = {}  # type: dict[int, list[str]]
+    rows_by_node = {}  # type: dict[int, list[int]]
+    for row in rows:
+        node_id = render_plan.get_node_id(row)
+        rows_by_node.setdefault(node_id, []).append(row)
+        frames_by_node.setdefault(node_id, set()).add(render_plan.get_frame(row))
+        views = views_by_node.setdefault(node_id, [])
+        view = render_plan.get_view(row)
+        if view not in views:
+            views.append(view)
+
+    frames_by_node = collections.OrderedDict(
+        (node_id, frameset.FrameSet.from_frames(frames))
+        for node_id, frames in frames_by_node.items()
+    )  # type: dict[int, frameset.FrameSet]
+
+    node_ids_by_key = collections.OrderedDict()  # type: dict[tuple, list[int]]
+    for node_id, frames in frames_by_node.items():
+        if coalesce:
+            key = (frames.runs, tuple(sorted(views_by_node[node_id])))
+        else:
+            key = (node_id,)
+        node_ids_by_key.setdefault(key, []).append(node_id)
+
+    render_passes = [
+        RenderPass(
+            nodes=[render_plan.nodes[node_id] for node_id in node_ids],
+            frames=frames_by_node[node_ids[0]],
+            views=views_by_node[node_ids[0]],
+            rows=[row for node_id in node_ids for row in rows_by_node[node_id]],
+        )
+        for node_ids in node_ids_by_key.values()
+    ]
+    saved = len(frames_by_node) - len(render_passes)
+    if saved:
+        LOGGER.info(
+            "rendering {} nodes in {} passes: {} passes saved by rendering nodes "
+            "with the same frames and views together"
+            "".format(len(frames_by_node), len(render_passes), saved)
+        )
+    return render_passes
+
+
+def render_in_session(
+    render_plan,
+    rows,
+    use_proxy=False,
+    continue_on_error=False,
+    before_frame=None,
+    after_frame=None,
+    manifest_writer=None,
+    write_behind=None,
+    frame_order=schedule.ORDER_ASCENDING,
+    stride=schedule.DEFAULT_STRIDE,
+):
+    """
+    Render the given rows in the current nuke session, one executeMultiple call
+    per render pass (see :func:`get_render_passes`).
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows of the plan to render
+        use_proxy(bool):
+        continue_on_error(bool):
+        before_frame(callable or None): nuke callback called before each frame
+        after_frame(callable or None): nuke callback called after each frame
+        manifest_writer(manifest.ManifestWriter or None):
+            record the state of each rendered file in it. Not closed by this function.
+        write_behind(scratch.WriteBehindQueue or None):
+            render in its scratch directory and submit each rendered file to it,
+            see :func:`record_transfers` to record them once copied.
+        frame_order(str): order in which frames are rendered, see :mod:`schedule`
+        stride(int): see :func:`schedule.order_frames`
+
+    Returns:
+        list[str]: errors that happened during the render.
+    """
+    render_passes = get_render_passes(render_plan, rows)
+
+    def _get_current_entry():
+        row = render_plan.find_written_row(
+            nuke.thisNode().fullName(), nuke.frame(), nuke.thisView()
+        )
+        return None if row is None else _get_manifest_entry(render_plan, row)
+
+    def _before_frame():
+        entry = _get_current_entry()
+        if entry and manifest_writer:
+            path, node, frame, view = entry
+            manifest_writer.record(path, manifest.STATE_STARTED, node, frame, view)
+        if before_frame:
+            before_frame()
+
+    def _after_frame():
+        entry = _get_current_entry()
+        if entry and write_behind:
+            write_behind.submit(entry[0], entry)
+        elif entry and manifest_writer:
+            manifest_writer.finish(*entry)
+        if after_frame:
+            after_frame()
+
+    if manifest_writer:
+        record_planned(manifest_writer, render_plan, rows)
+    if manifest_writer or write_behind:
+        before_frame_callback = _before_frame
+        after_frame_callback = _after_frame
+    else:
+        before_frame_callback = before_frame
+        after_frame_callback = after_frame
+
+    proxy_backup = nuke.root().proxy()
+    nuke.Undo().disable()
+    nuke.root().setProxy(use_proxy)
+    original_paths = {}
+    if write_behind:
+        original_paths = redirect_to_scratch(render_plan, rows, write_behind)
+    if before_frame_callback:
+        nuke.addBeforeFrameRender(before_frame_callback)
+    if after_frame_callback:
+        nuke.addAfterFrameRender(after_frame_callback)
+
+    def _record_pass_failures(render_pass, error):
+        # frames of the pass that were never reported as rendered
+        if not manifest_writer:
+            return
+        entries = []
+        for row in render_pass.rows:
+            entry = _get_manifest_entry(render_plan, row)
+            if manifest_writer.get_state(entry[0]) == manifest.STATE_FINISHED:
+                continue
+            if write_behind and write_behind.is_submitted(entry[0]):
+                continue
+            entries.append(entry)
+        manifest_writer.record_many(
+            entries, manifest.STATE_FAILED, error=error or "file not written"
+        )
+
+    errors = []
+    try:
+        for render_pass in render_passes:
+            if frame_order == schedule.ORDER_ASCENDING:
+                framerange_str = render_pass.frames.to_string()
+            else:
+                framerange_str = " ".join(
+                    map(
+                        str,
+                        schedule.order_frames(render_pass.frames, frame_order, stride),
+                    )
+                )
+            framerange = nuke.FrameRanges(framerange_str)
+            views_str = ",".join(render_pass.views)
+            nodes_str = ",".join(node.name() for node in render_pass.nodes)
+            LOGGER.info(
+                "executing nodes '{}' with frames '{}' and views '{}'"
+                "".format(nodes_str, framerange_str, views_str)
+            )
+            try:
+                nuke.executeMultiple(
+                    render_pass.nodes,
+                    framerange,
+                    views=render_pass.views,
+                    continueOnError=continue_on_error,
+                )
+            except Exception as error:
+                errors.append(
+                    format_render_error(nodes_str, views_str, framerange_str, error)
+                )
+                _record_pass_failures(render_pass, str(error))
+            else:
+                _record_pass_failures(render_pass, None)
+
+    finally:
+        restore_file_knobs(original_paths)
+        nuke.Undo().enable()
+        nuke.root().setProxy(proxy_backup)
+        if before_frame_callback:
+            nuke.removeBeforeFrameRender(before_frame_callback)
+        if after_frame_callback:
+            nuke.removeAfterFrameRender(after_frame_callback)
+
+    return errors
+
+
+def build_render_units(
+    render_plan,
+    rows,
+    frame_order=schedule.ORDER_ASCENDING,
+    stride=schedule.DEFAULT_STRIDE,
+):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]): rows of the plan to render
+        frame_order(str): order in which frames are submitted, see :mod:`schedule`
+        stride(int): see :func:`schedule.order_frames`
+
+    Returns:
+        list[engine.RenderUnit]:
+    """
+    if frame_order != schedule.ORDER_ASCENDING:
+        ordered_frames = schedule.order_frames(
+            (render_plan.get_frame(row) for row in rows), frame_order, stride
+        )
+        frame_ranks = {frame: rank for rank, frame in enumerate(ordered_frames)}
+        rows = sorted(rows, key=lambda row: frame_ranks[render_plan.get_frame(row)])
+
+    items = [
+        engine.RenderItem(
+            render_plan.get_node_name(row),
+            render_plan.get_frame(row),
+            render_plan.get_view(row),
+        )
+        for row in rows
+    ]
+    units = engine.build_units(items)
+    # without grouping there would be one unit per node and frame
+    saved = sum(len(unit.nodes) for unit in units) - len(units)
+    if saved:
+        LOGGER.info(
+            "{} renders saved by rendering nodes with the same frames and views together"
+            "".format(saved)
+        )
+    return units
+
+
+def create_render_pool(
+    script_path,
+    max_workers,
+    root_name=None,
+    use_proxy=False,
+    continue_on_error=False,
+    autoscale_workers=False,
+    hang_timeout_factor=None,
+):
+    """
+    Args:
+        script_path(str): path of the nuke script the workers must open.
+        max_workers(int):
+        root_name(str or None): name to set on the root of the script once opened,
+            when the script is a copy of another one.
+        use_proxy(bool):
+        continue_on_error(bool):
+        autoscale_workers(bool):
+            True to adjust the number of processes, up to ``max_workers``, and their
+            threads from the memory used by the first frames of each node.
+        hang_timeout_factor(float or None): kill and render again the frames taking
+            more than this many times the median frame time, see
+            :class:`watchdog.FrameWatchdog`. None to never kill a frame.
+
+    Returns:
+        engine.RenderPool: pool of nuke processes, with nothing submitted yet.
+    """
+    autoscaler = None
+    if autoscale_workers:
+        autoscaler = autoscale.WorkerAutoscaler(max_workers)
+    frame_watchdog = None
+    if hang_timeout_factor:
+        frame_watchdog = watchdog.FrameWatchdog(timeout_factor=hang_timeout_factor)
+    return engine.RenderPool(
+        command=[nuke.EXE_PATH, "-t", worker.__file__],
+        job_options={
+            "script": script_path,
+            "root_name": root_name,
+            "proxy": use_proxy,
+            "continue_on_error": continue_on_error,
+        },
+        max_workers=max_workers,
+        autoscaler=autoscaler,
+        # nuke's option to limit the number of threads
+        threads_option="-m",
+        watchdog=frame_watchdog,
+    )
+
+
+def get_event_error(event):
+    """
+    Args:
+        event(engine.RenderEvent): a failed event
+
+    Returns:
+        str:
+    """
+    return format_render_error(
+        ",".join(event.unit.nodes),
+        ",".join(event.unit.views),
+        event.unit.frame,
+        event.error,
+    )
@@ -0,0 +1,226 @@
+"""
+Batched and cached checks of which files exist on disk.
+
+Instead of calling ``os.path.exists`` for each path, the paths are grouped by
+directory and each directory is listed with a single ``os.scandir`` call. The
+listing is kept until the directory modification time changes.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LOGGER = logging.getLogger("LocaloRender.scanning")
+
+MTIME_GRANULARITY = 2.0
+"""
+Seconds during which a directory modification time cannot be trusted to have changed.
+
+Some filesystems (FAT, some network shares) only store times with a 2 seconds
+precision so a file created right after the scan would not change the mtime.
+"""
+
+
+class _DirectoryScan(object):
+    """
+    The listing of a directory at a given time.
+
+    Args:
+        mtime(float or None): modification time of the directory, None if it doesn't exist.
+        scan_time(float): when the listing was made.
+        entries(dict[str, os.DirEntry | os.stat_result]): file name mapped to its entry.
+    """
+
+    __slots__ = ("mtime", "scan_time", "entries")
+
+    def __init__(self, mtime, scan_time, entries):
+        self.mtime = mtime
+        self.scan_time = scan_time
+        self.entries = entries
+
+    def is_valid(self, mtime):
+        """
+        Args:
+            mtime(float or None): current modification time of the directory.
+        """
+        if mtime != self.mtime:
+            return False
+        if mtime is None:
+            return True
+        return self.scan_time - mtime > MTIME_GRANULARITY
+
+
+class DirectoryScanCache(object):
+    """
+    Cache the content of directories to answer which file exists with as little
+    filesystem calls as possible.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self):
+        self._scans = {}  # type: dict[str, _DirectoryScan]
+        self._lock = threading.Lock()
+
+    def _scan(self, directory, mtime):
+        scan_time = time.time()
+        entries = {}
+        if mtime is not None:
+            try:
+                with os.scandir(directory) as iterator:
+                    for entry in iterator:
+                        entries[entry.name] = entry
+            except OSError as error:
+                LOGGER.debug("cannot scan '{}': {}".format(directory, error))
+                mtime = None
+        return _DirectoryScan(mtime, scan_time, entries)
+
+    def get_entries(self, directory):
+        """
+        Get the content of the given directory, from the cache if it didn't change.
+
+        Args:
+            directory(str): absolute normalized path to a directory, that may not exist.
+
+        Returns:
+            dict[str, os.DirEntry | os.stat_result]: file name mapped to its entry
+        """
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            scan = self._scans.get(directory)
+        if scan is not None and scan.is_valid(mtime):
+            return scan.entries
+
+        scan = self._scan(directory, mtime)
+        with self._lock:
+            self._scans[directory] = scan
+        return scan.entries
+
+    def get_cached_entries(self, directory):
+        """
+        Get the content of the given directory only from the cache, without any disk access.
+
+        Returns:
+            dict[str, os.DirEntry | os.stat_result] or None: None if never scanned.
+        """
+        with self._lock:
+            scan = self._scans.get(directory)
+        return None if scan is None else scan.entries
+
+    def scan(self, directories, max_workers=8):
+        """
+        Ensure the given directories are up-to-date in the cache, scanning them in parallel.
+
+        Args:
+            directories(collections.Iterable[str]):
+            max_workers(int): maximum number of directories scanned at the same time.
+
+        Returns:
+            dict[str, dict[str, os.DirEntry | os.stat_result]]: entries by directory
+        """
+        directories = list(set(directories))
+        if len(directories) <= 1 or max_workers <= 1:
+            return {directory: self.get_entries(directory) for directory in directories}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(directories, executor.map(self.get_entries, directories)))
+
+    def exists_batch(self, paths, max_workers=8):
+        """
+        Same as :meth:`exists` for multiple paths, with only one check per directory.
+
+        Args:
+            paths(list[str]): absolute normalized file paths
+            max_workers(int): maximum number of directories scanned at the same time.
+
+        Returns:
+            list[bool]: for each path, True if it exists on disk.
+        """
+        splitted = [os.path.split(path) for path in paths]
+        entries = self.scan([directory for directory, _ in splitted], max_workers)
+        return [name in entries[directory] for directory, name in splitted]
+
+    def exists(self, path):
+        """
+        Args:
+            path(str): absolute normalized file path
+
+        Returns:
+            bool: True if the file exists on disk.
+        """
+        directory, name = os.path.split(path)
+        return name in self.get_entries(directory)
+
+    def cached_exists(self, path):
+        """
+        Same as :meth:`exists` but without disk access.
+
+        Returns:
+            bool or None: None if the directory was never scanned.
+        """
+        directory, name = os.path.split(path)
+        entries = self.get_cached_entries(directory)
+        if entries is None:
+            return None
+        return name in entries
+
+    def get_stat(self, path):
+        """
+        Args:
+            path(str): absolute normalized file path
+
+        Returns:
+            os.stat_result or None: None if the file doesn't exist.
+        """
+        directory, name = os.path.split(path)
+        entry = self.get_entries(directory).get(name)
+        if entry is None:
+            return None
+        if isinstance(entry, os.stat_result):
+            return entry
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+
+    def refresh_path(self, path):
+        """
+        Update the cache for a single file that was just written or removed, without
+        scanning its whole directory again.
+
+        Args:
+            path(str): absolute normalized file path
+
+        Returns:
+            bool: True if the file exists on disk.
+        """
+        directory, name = os.path.split(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+
+        with self._lock:
+            scan = self._scans.get(directory)
+            if scan is None:
+                return stat is not None
+            if stat is None:
+                scan.entries.pop(name, None)
+            else:
+                scan.entries[name] = stat
+        return stat is not None
+
+    def invalidate(self, directory=None):
+        """
+        Forget the content of the given directory, or of all directories if None.
+        """
+        with self._lock:
+            if directory is None:
+                self._scans.clear()
+            else:
+                self._scans.pop(directory, None)
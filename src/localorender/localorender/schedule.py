@@ -0,0 +1,102 @@
+"""
+Order in which the frames of a render are executed.
+
+Rendering frames in ascending order only shows the end of a shot at the end of the
+render. The progressive orders render a coarse preview of the whole shot first,
+then fill the frames in between, each frame being still rendered once.
+"""
+import collections
+
+ORDER_ASCENDING = "ascending"
+ORDER_SUBDIVISION = "subdivision"
+ORDER_STRIDE = "stride"
+
+FRAME_ORDERS = collections.OrderedDict(
+    [
+        (ORDER_ASCENDING, "Ascending"),
+        (ORDER_SUBDIVISION, "Preview First (first, last, middle, ...)"),
+        (ORDER_STRIDE, "Every Nth Frame First"),
+    ]
+)
+"""
+Label of each frame order, in the order they are presented to the user.
+"""
+
+DEFAULT_STRIDE = 10
+
+
+def iter_subdivision_indices(count):
+    """
+    Iterate through ``range(count)`` by binary subdivision: first, last, middle,
+    then the middle of each half, and so on.
+
+    Args:
+        count(int):
+
+    Returns:
+        collections.Iterable[int]: each index exactly once.
+    """
+    if count <= 0:
+        return
+    yield 0
+    if count == 1:
+        return
+    yield count - 1
+
+    intervals = collections.deque([(0, count - 1)])
+    while intervals:
+        start, end = intervals.popleft()
+        if end - start < 2:
+            continue
+        middle = (start + end) // 2
+        yield middle
+        intervals.append((start, middle))
+        intervals.append((middle, end))
+
+
+def iter_stride_indices(count, stride=DEFAULT_STRIDE):
+    """
+    Iterate through ``range(count)`` with every ``stride`` index first, then
+    the remaining ones in ascending order.
+
+    Args:
+        count(int):
+        stride(int):
+
+    Returns:
+        collections.Iterable[int]: each index exactly once.
+    """
+    stride = max(1, stride)
+    for index in range(0, count, stride):
+        yield index
+    for index in range(count):
+        if index % stride:
+            yield index
+
+
+def order_frames(frames, order=ORDER_ASCENDING, stride=DEFAULT_STRIDE):
+    """
+    Args:
+        frames(collections.Iterable[int]):
+        order(str): one of the ``ORDER_`` constants
+        stride(int): interval between the first frames rendered by ``ORDER_STRIDE``
+
+    Returns:
+        list[int]: unique frames in the order they must be rendered.
+
+    Raises:
+        ValueError: if the order is unknown.
+    """
+    frames = sorted(set(frames))
+    if order == ORDER_ASCENDING:
+        return frames
+    if order == ORDER_SUBDIVISION:
+        indices = iter_subdivision_indices(len(frames))
+    elif order == ORDER_STRIDE:
+        indices = iter_stride_indices(len(frames), stride)
+    else:
+        raise ValueError(
+            "Unsupported frame order '{}', expected one of {}"
+            "".format(order, list(FRAME_ORDERS))
+        )
+    return [frames[index] for index in indices]
@@ -0,0 +1,197 @@
+"""
+Render to a local scratch directory, then copy the rendered files to their final
+path in background, so nuke doesn't wait on a slow file server for each frame.
+
+Files are first copied next to their final path under a temporary name, their size
+is verified, and they are then renamed to their final name so a partially copied
+file is never visible at the final path.
+"""
+import collections
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+LOGGER = logging.getLogger("LocaloRender.scratch")
+
+SCRATCH_DIR_ENV = "LOCALORENDER_SCRATCH"
+
+TransferResult = collections.namedtuple("TransferResult", ["path", "error", "data"])
+"""
+A finished copy of a rendered file to its final ``path``. ``error`` is None on
+success and ``data`` is what was given when submitting the file.
+"""
+
+
+def get_default_scratch_root():
+    """
+    Returns:
+        str: directory containing the scratch directories of each render.
+    """
+    return os.environ.get(SCRATCH_DIR_ENV) or os.path.join(
+        tempfile.gettempdir(), "LocaloRender-scratch"
+    )
+
+
+def transfer_file(source, destination):
+    """
+    Move the source file to the destination, as atomically as possible.
+
+    Args:
+        source(str): path of an existing file
+        destination(str): final path, its directory is created if necessary.
+
+    Raises:
+        OSError: if the transfer failed, the destination is then left untouched.
+    """
+    size = os.stat(source).st_size
+    directory = os.path.dirname(destination)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    if os.stat(directory).st_dev == os.stat(source).st_dev:
+        os.replace(source, destination)
+        return
+
+    tmp_path = destination + ".localorender-tmp"
+    try:
+        shutil.copyfile(source, tmp_path)
+        copied_size = os.stat(tmp_path).st_size
+        if copied_size != size:
+            raise OSError(
+                "size mismatch after copy: {} bytes instead of {}".format(
+                    copied_size, size
+                )
+            )
+        os.replace(tmp_path, destination)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
+
+
+class WriteBehindQueue(object):
+    """
+    Copy files rendered in a scratch directory to their final path, in background
+    threads.
+
+    The scratch directory mirrors the final paths: ``/mnt/show/a.exr`` is rendered
+    to ``<scratch_dir>/mnt/show/a.exr``. The drive or network share of Windows
+    paths is kept as a directory: ``C:/show/a.exr`` is rendered to
+    ``<scratch_dir>/C/show/a.exr``.
+
+    Args:
+        scratch_root(str or None): directory where a new scratch directory is
+            created for the render. Default to :func:`get_default_scratch_root`.
+        max_workers(int): maximum number of files copied at the same time.
+    """
+
+    def __init__(self, scratch_root=None, max_workers=4):
+        scratch_root = scratch_root or get_default_scratch_root()
+        if not os.path.isdir(scratch_root):
+            os.makedirs(scratch_root, exist_ok=True)
+        self.scratch_dir = tempfile.mkdtemp(prefix="render-", dir=scratch_root)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="LocaloRender-writebehind"
+        )
+        self._results = queue.Queue()
+        self._pending = set()  # type: set[str]
+        self._submitted = set()  # type: set[str]
+        self._lock = threading.Lock()
+
+    def get_scratch_path(self, path):
+        """
+        Args:
+            path(str): final absolute path, that can contain frame and view tokens.
+
+        Returns:
+            str: where the path must be rendered in the scratch directory.
+        """
+        drive, path = os.path.splitdrive(path)
+        # keep the drive letter or share, so files of different ones don't collide
+        drive = drive.replace(":", "").strip("\\/")
+        return os.path.join(self.scratch_dir, drive, path.lstrip("\\/"))
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def is_drained(self):
+        """
+        True if all the submitted files were copied and their result collected.
+        """
+        return not self.pending_count and self._results.empty()
+
+    def is_pending(self, path):
+        with self._lock:
+            return path in self._pending
+
+    def is_submitted(self, path):
+        """
+        True if the path was submitted, even if its copy is finished.
+        """
+        with self._lock:
+            return path in self._submitted
+
+    def submit(self, path, data=None):
+        """
+        Copy the scratch file of the given final path, in background.
+
+        Args:
+            path(str): final absolute path of a rendered file.
+            data(object): anything to retrieve with the result of the copy.
+
+        Returns:
+            bool: False if the path was already submitted.
+        """
+        with self._lock:
+            if path in self._submitted:
+                return False
+            self._submitted.add(path)
+            self._pending.add(path)
+        self._executor.submit(self._transfer, path, data)
+        return True
+
+    def _transfer(self, path, data):
+        error = None
+        try:
+            transfer_file(self.get_scratch_path(path), path)
+        except Exception as exception:
+            error = str(exception)
+            LOGGER.error("cannot copy '{}' from scratch: {}".format(path, error))
+        # queued before being discarded so is_drained can't be True in between
+        self._results.put(TransferResult(path, error, data))
+        with self._lock:
+            self._pending.discard(path)
+
+    def poll(self):
+        """
+        Returns:
+            list[TransferResult]: copies finished since the last call.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self, wait=True):
+        """
+        Stop accepting new files and remove the scratch directory.
+
+        Args:
+            wait(bool): True to wait for the copies in progress. Else the files that
+                were not copied yet are lost.
+        """
+        self._executor.shutdown(wait=wait)
+        if os.path.isdir(self.scratch_dir):
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
@@ -0,0 +1,282 @@
+"""
+Timing of each rendered frame, to follow the progress of a render and find which
+Write nodes are the slowest.
+"""
+import collections
+import csv
+import json
+import os
+import time
+
+CSV_COLUMNS = ["node", "frame", "view", "start", "end", "duration"]
+
+
+class FrameTiming(
+    collections.namedtuple("FrameTiming", ["node", "frame", "view", "start", "end"])
+):
+    """
+    Wall time spent rendering a single frame of a node, for one view.
+
+    Args:
+        node(str): full name of the Write node
+        frame(int):
+        view(str):
+        start(float): timestamp in seconds
+        end(float): timestamp in seconds
+    """
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def to_json(self):
+        return {
+            "node": self.node,
+            "frame": self.frame,
+            "view": self.view,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+        }
+
+
+class NodeTimings(object):
+    """
+    Running aggregates of the frame timings of a node, updated in constant time
+    for each frame so the statistics don't get slower as the render goes on.
+    """
+
+    __slots__ = ("count", "total_time", "max_time", "first_start", "last_end")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.first_start = None  # type: float | None
+        self.last_end = None  # type: float | None
+
+    def add(self, timing):
+        """
+        Args:
+            timing(FrameTiming):
+        """
+        duration = timing.duration
+        self.count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        if self.first_start is None or timing.start < self.first_start:
+            self.first_start = timing.start
+        if self.last_end is None or timing.end > self.last_end:
+            self.last_end = timing.end
+
+    @property
+    def elapsed(self):
+        """
+        Seconds between the start of the first frame and the end of the last one.
+        """
+        if self.first_start is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+
+def format_duration(seconds):
+    """
+    Args:
+        seconds(float):
+
+    Returns:
+        str: short human-readable duration like "1h02m", "3m05s" or "12.4s"
+    """
+    if seconds < 60:
+        return "{:.1f}s".format(seconds)
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    if minutes < 60:
+        return "{}m{:02d}s".format(minutes, seconds)
+    hours, minutes = divmod(minutes, 60)
+    return "{}h{:02d}m".format(hours, minutes)
+
+
+def get_report_paths(script_path):
+    """
+    Args:
+        script_path(str): path of the nuke script that was rendered
+
+    Returns:
+        tuple[str, str]: path of the json report and of the csv report.
+    """
+    base = os.path.splitext(script_path)[0] + ".localorender"
+    return base + ".json", base + ".csv"
+
+
+class RenderStats(object):
+    """
+    Collect the timing of the frames rendered, to deduce throughput and ETA.
+
+    Frames can be reported with :meth:`frame_started`/:meth:`frame_finished` (like
+    from nuke before/after frame render callbacks), or directly with :meth:`add_timing`.
+
+    Args:
+        total(int): number of frames expected to be rendered
+    """
+
+    def __init__(self, total=0):
+        self.total = total
+        self.timings = []  # type: list[FrameTiming]
+        self.start_time = None  # type: float | None
+        self.end_time = None  # type: float | None
+        self._started = {}  # type: dict[tuple[str, str], tuple[int, float]]
+        self._node_timings = collections.OrderedDict()  # type: dict[str, NodeTimings]
+
+    def __len__(self):
+        return len(self.timings)
+
+    def start(self, now=None):
+        self.start_time = time.time() if now is None else now
+        self.end_time = None
+
+    def stop(self, now=None):
+        self.end_time = time.time() if now is None else now
+        self._started.clear()
+
+    @property
+    def elapsed(self):
+        """
+        Seconds since the render started, or the duration of the whole render once stopped.
+        """
+        if self.start_time is None:
+            return 0.0
+        end = time.time() if self.end_time is None else self.end_time
+        return max(end - self.start_time, 0.0)
+
+    def frame_started(self, node, frame, view, now=None):
+        self._started[(node, view)] = (frame, time.time() if now is None else now)
+
+    def frame_finished(self, node, frame, view, now=None):
+        """
+        Returns:
+            FrameTiming or None: None if the start of the frame was not reported.
+        """
+        started = self._started.pop((node, view), None)
+        if started is None or started[0] != frame:
+            return None
+        timing = FrameTiming(
+            node, frame, view, started[1], time.time() if now is None else now
+        )
+        self.add_timing(timing)
+        return timing
+
+    def add_timing(self, timing):
+        """
+        Args:
+            timing(FrameTiming):
+        """
+        if self.start_time is None:
+            self.start_time = timing.start
+        self.timings.append(timing)
+        node_timings = self._node_timings.get(timing.node)
+        if node_timings is None:
+            node_timings = self._node_timings[timing.node] = NodeTimings()
+        node_timings.add(timing)
+
+    def get_throughput(self, node=None):
+        """
+        Args:
+            node(str or None): only consider the frames of this node.
+
+        Returns:
+            float: frames rendered per minute
+        """
+        if node is None:
+            elapsed = self.elapsed
+            count = len(self.timings)
+        else:
+            node_timings = self._node_timings.get(node)
+            if node_timings is None:
+                return 0.0
+            count = node_timings.count
+            elapsed = node_timings.elapsed
+
+        if elapsed <= 0:
+            return 0.0
+        return count / elapsed * 60.0
+
+    def get_eta(self):
+        """
+        Returns:
+            float or None: estimated seconds before the render ends, None if unknown.
+        """
+        throughput = self.get_throughput()
+        if not throughput:
+            return None
+        remaining = max(self.total - len(self.timings), 0)
+        return remaining / throughput * 60.0
+
+    def get_node_summary(self):
+        """
+        Returns:
+            list[dict]: statistics for each node, slowest first.
+        """
+        summary = []
+        for node, node_timings in self._node_timings.items():
+            summary.append(
+                {
+                    "node": node,
+                    "frames": node_timings.count,
+                    "total_time": node_timings.total_time,
+                    "mean_time": node_timings.total_time / node_timings.count,
+                    "max_time": node_timings.max_time,
+                    "frames_per_minute": self.get_throughput(node),
+                }
+            )
+        summary.sort(key=lambda node_summary: node_summary["total_time"], reverse=True)
+        return summary
+
+    def to_json(self):
+        return {
+            "start": self.start_time,
+            "end": self.end_time,
+            "elapsed": self.elapsed,
+            "total_frames": self.total,
+            "rendered_frames": len(self.timings),
+            "frames_per_minute": self.get_throughput(),
+            "nodes": self.get_node_summary(),
+            "frames": [timing.to_json() for timing in self.timings],
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as report_file:
+            json.dump(self.to_json(), report_file, indent=4)
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as report_file:
+            writer = csv.writer(report_file)
+            writer.writerow(CSV_COLUMNS)
+            for timing in self.timings:
+                writer.writerow(
+                    [
+                        timing.node,
+                        timing.frame,
+                        timing.view,
+                        "{:.3f}".format(timing.start),
+                        "{:.3f}".format(timing.end),
+                        "{:.3f}".format(timing.duration),
+                    ]
+                )
+
+    def get_progress_text(self):
+        """
+        Returns:
+            str: single line summary like "12/60 frames - 24.0 frames/min - ETA 2m00s"
+        """
+        text = "{}/{} frames".format(len(self.timings), self.total)
+        throughput = self.get_throughput()
+        if throughput:
+            text += " - {:.1f} frames/min".format(throughput)
+        eta = self.get_eta()
+        if self.end_time is not None:
+            text += " - done in {}".format(format_duration(self.elapsed))
+        elif eta is not None:
+            text += " - ETA {}".format(format_duration(eta))
+        return text
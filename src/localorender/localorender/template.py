@@ -0,0 +1,259 @@
+"""
+Expand a Write node file path template to the paths of each frame and view.
+
+The template is the path returned by ``nuke.filename``: tcl is resolved but the
+frame (``####``, ``%04d``) and view (``%V``, ``%v``) tokens are kept.
+"""
+import os
+import re
+
+_TOKEN_REGEX = re.compile(r"%V|%v|#+|%0?\d*d|%")
+_PLACEHOLDER = "LOCALORENDER{}TOKEN"
+_PLACEHOLDER_REGEX = re.compile(r"LOCALORENDER(\d+)TOKEN")
+
+_SLOT_VIEW = "view"
+_SLOT_VIEW_SHORT = "view-short"
+_SLOT_FRAME = "frame"
+
+
+def replace_hashes(path):
+    """
+    Convert each sequence of ``#`` to its printf equivalent, like ``nukescripts.replaceHashes``.
+
+    Args:
+        path(str):
+
+    Returns:
+        str:
+    """
+    return re.sub(r"#+", lambda match: "%0{}d".format(len(match.group(0))), path)
+
+
+def expand_path_legacy(template, frame, view):
+    """
+    Get the path of a single frame and view, by applying each substitution one
+    after the other. Slow but handle any template.
+
+    Args:
+        template(str):
+        frame(int):
+        view(str):
+
+    Returns:
+        str: absolute and normalized path
+    """
+    path = template
+    # see : https://learn.foundry.com/nuke/11.2/content/comp_environment/stereoscopic_films/rendering_stereo_images.html
+    if "%V" in path:
+        path = path.replace("%V", view)
+    if "%v" in path:
+        path = path.replace("%v", view[0])
+
+    try:
+        path = replace_hashes(path) % frame
+    except TypeError:
+        # file path probably have no frame token
+        pass
+
+    return os.path.normpath(os.path.abspath(path))
+
+
+class PathTemplate(object):
+    """
+    A file path template parsed once, to expand the path of many frames and views quickly.
+
+    The template is split in literal parts and slots (frame or view). Normalization
+    of the path is done once on the whole template.
+
+    Templates using unsupported printf syntax fallback to :func:`expand_path_legacy`
+    for each frame.
+
+    Args:
+        template(str): path with optional frame and view tokens
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self._patterns = {}  # type: dict[str, str]
+        self._segments = None  # type: list[str | tuple[str, str, str]] | None
+        try:
+            self._segments = self._compile(template)
+        except ValueError:
+            self._segments = None
+
+        slots = [
+            segment[0] for segment in self._segments or [] if isinstance(segment, tuple)
+        ]
+        frame_count = slots.count(_SLOT_FRAME)
+        if frame_count > 1:
+            # like the legacy expansion: the frame formatting fails so the tokens are kept
+            self._segments = [
+                segment[2]
+                if isinstance(segment, tuple) and segment[0] == _SLOT_FRAME
+                else segment
+                for segment in self._segments
+            ]
+            frame_count = 0
+
+        self.has_frame = frame_count == 1 if self.is_compiled else True
+        self.has_view = _SLOT_VIEW in slots if self.is_compiled else "%V" in template
+        self.has_short_view = (
+            _SLOT_VIEW_SHORT in slots if self.is_compiled else "%v" in template
+        )
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.template)
+
+    @property
+    def is_compiled(self):
+        """
+        False if the template is not supported and is expanded frame by frame.
+        """
+        return self._segments is not None
+
+    @staticmethod
+    def _compile(template):
+        """
+        Returns:
+            list[str | tuple[str, str, str]]:
+                literal strings and (slot type, printf format, original token) tuples.
+
+        Raises:
+            ValueError: if the template is not supported.
+        """
+        slots = []  # type: list[tuple[str, str, str]]
+
+        def _to_placeholder(match):
+            token = match.group(0)
+            if token == "%V":
+                slot = (_SLOT_VIEW, "%s", token)
+            elif token == "%v":
+                slot = (_SLOT_VIEW_SHORT, "%s", token)
+            elif token.startswith("#"):
+                slot = (_SLOT_FRAME, "%0{}d".format(len(token)), token)
+            elif token != "%":
+                slot = (_SLOT_FRAME, token, token)
+            else:
+                raise ValueError("Unsupported printf token in '{}'".format(template))
+            slots.append(slot)
+            return _PLACEHOLDER.format(len(slots) - 1)
+
+        if _PLACEHOLDER_REGEX.search(template):
+            raise ValueError("Template already contains placeholders")
+
+        skeleton = _TOKEN_REGEX.sub(_to_placeholder, template)
+        skeleton = os.path.normpath(os.path.abspath(skeleton))
+
+        segments = []  # type: list[str | tuple[str, str, str]]
+        found = []
+        position = 0
+        for match in _PLACEHOLDER_REGEX.finditer(skeleton):
+            if match.start() > position:
+                segments.append(skeleton[position : match.start()])
+            index = int(match.group(1))
+            found.append(index)
+            segments.append(slots[index])
+            position = match.end()
+        if position < len(skeleton):
+            segments.append(skeleton[position:])
+
+        # normalization may have removed some tokens (like "%V/..")
+        if found != list(range(len(slots))):
+            raise ValueError("Cannot normalize template '{}'".format(template))
+        return segments
+
+    def _get_view_pattern(self, view):
+        """
+        Returns:
+            str: printf pattern expecting a single frame number, or no argument if
+            the template has no frame token.
+        """
+        pattern = self._patterns.get(view)
+        if pattern is not None:
+            return pattern
+
+        pattern = []
+        for segment in self._segments:
+            if not isinstance(segment, tuple):
+                pattern.append(segment.replace("%", "%%"))
+            elif segment[0] == _SLOT_VIEW:
+                pattern.append(view.replace("%", "%%"))
+            elif segment[0] == _SLOT_VIEW_SHORT:
+                pattern.append(view[0].replace("%", "%%"))
+            else:
+                pattern.append(segment[1])
+        pattern = self._patterns[view] = "".join(pattern)
+        return pattern
+
+    def format(self, frame, view):
+        """
+        Args:
+            frame(int):
+            view(str):
+
+        Returns:
+            str: absolute and normalized path for the given frame and view
+        """
+        if not self.is_compiled:
+            return expand_path_legacy(self.template, frame, view)
+
+        pattern = self._get_view_pattern(view)
+        if self.has_frame:
+            return pattern % frame
+        return pattern % ()
+
+    def expand(self, frames, views):
+        """
+        Iterate through the unique paths for the given frames and views.
+
+        When multiple frame/view combinations resolve to the same path, only the
+        first one is yielded, iterating over views first then frames.
+
+        Args:
+            frames(collections.Iterable[int]): frames in ascending order
+            views(list[str]):
+
+        Returns:
+            collections.Iterable[tuple[str, int, str]]: (path, frame, view)
+        """
+        if not self.is_compiled:
+            for path, frame, view in self._expand_legacy(frames, views):
+                yield path, frame, view
+            return
+
+        if not self.has_view and not self.has_short_view:
+            views = views[:1]
+        elif not self.has_view:
+            # only keep the first view of those with the same initial
+            initials = set()
+            unique_views = []
+            for view in views:
+                if view[0] not in initials:
+                    initials.add(view[0])
+                    unique_views.append(view)
+            views = unique_views
+
+        for view in views:
+            pattern = self._get_view_pattern(view)
+            if not self.has_frame:
+                for frame in frames:
+                    yield pattern % (), frame, view
+                    break
+                continue
+
+            previous = None
+            for frame in frames:
+                if frame == previous:
+                    continue
+                previous = frame
+                yield pattern % frame, frame, view
+
+    def _expand_legacy(self, frames, views):
+        frames = list(frames)
+        seen = set()
+        for view in views:
+            for frame in frames:
+                path = expand_path_legacy(self.template, frame, view)
+                if path not in seen:
+                    seen.add(path)
+                    yield path, frame, view
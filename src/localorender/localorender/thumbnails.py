@@ -0,0 +1,377 @@
+"""
+Decode small thumbnails of rendered frames in background threads, and keep them
+in a memory bounded cache.
+
+Images are decoded with Pillow or OpenImageIO when one of them can be imported,
+reading a downsampled version of the image when the format allows it. Without
+them no thumbnail is produced, other decoders (like Qt's) can be given to the loader.
+
+This module doesn't depend on nuke or Qt.
+"""
+import collections
+import logging
+import os
+import threading
+
+LOGGER = logging.getLogger("LocaloRender.thumbnails")
+
+DEFAULT_MAX_CACHE_SIZE = 64 * 1024**2
+"""
+Default size limit of the thumbnails kept in memory, in bytes.
+"""
+
+DEFAULT_MAX_WORKERS = 4
+
+_EMPTY_SIZE = 256
+"""
+Approximate size of a cache entry without thumbnail, so they are limited too.
+"""
+
+Thumbnail = collections.namedtuple("Thumbnail", ["width", "height", "data"])
+"""
+A decoded thumbnail, ``data`` being its 8 bits RGB pixels, row by row without padding.
+"""
+
+
+def get_fitted_size(width, height, max_width, max_height):
+    """
+    Args:
+        width(int):
+        height(int):
+        max_width(int):
+        max_height(int):
+
+    Returns:
+        tuple[int, int]: the size scaled down to fit in the maximum size, keeping
+            its aspect ratio.
+    """
+    scale = min(max_width / float(width), max_height / float(height), 1.0)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def decode_with_pillow(path, max_width, max_height):
+    """
+    Args:
+        path(str):
+        max_width(int):
+        max_height(int):
+
+    Returns:
+        Thumbnail or None: None if the format is not supported.
+    """
+    from PIL import Image
+
+    try:
+        image = Image.open(path)
+    except Image.UnidentifiedImageError:
+        return None
+    with image:
+        # let JPEG decode at a reduced size directly
+        image.draft("RGB", (max_width, max_height))
+        image = image.convert("RGB")
+        image.thumbnail((max_width, max_height))
+        return Thumbnail(image.width, image.height, image.tobytes())
+
+
+def decode_with_oiio(path, max_width, max_height):
+    """
+    Args:
+        path(str):
+        max_width(int):
+        max_height(int):
+
+    Returns:
+        Thumbnail or None: None if the format is not supported.
+    """
+    import OpenImageIO as oiio
+
+    source = oiio.ImageBuf(path)
+    if source.has_error:
+        return None
+    spec = source.spec()
+    # the smallest mipmap level still bigger than the thumbnail, if any
+    for level in range(1, source.nmiplevels):
+        level_source = oiio.ImageBuf(path, 0, level)
+        level_spec = level_source.spec()
+        if level_spec.width < max_width and level_spec.height < max_height:
+            break
+        source, spec = level_source, level_spec
+
+    width, height = get_fitted_size(spec.width, spec.height, max_width, max_height)
+    channels = (0, 1, 2) if spec.nchannels >= 3 else (0, 0, 0)
+    image = oiio.ImageBufAlgo.channels(source, channels)
+    roi = oiio.ROI(0, width, 0, height, 0, 1, 0, 3)
+    image = oiio.ImageBufAlgo.resample(image, roi=roi)
+    if spec.format.basetype in (oiio.HALF, oiio.FLOAT, oiio.DOUBLE):
+        # scene-linear renders look too dark displayed as is
+        converted = oiio.ImageBufAlgo.colorconvert(image, "linear", "sRGB")
+        if not converted.has_error:
+            image = converted
+    pixels = image.get_pixels(oiio.UINT8)
+    return Thumbnail(width, height, pixels.tobytes())
+
+
+def decode_stub(path, max_width, max_height):
+    """
+    Used when no image library is available.
+
+    Returns:
+        None: never decode anything.
+    """
+    return None
+
+
+def get_decoders():
+    """
+    Returns:
+        list[callable]: the decoders of the image libraries that can be imported,
+            in order of preference, or :func:`decode_stub`.
+    """
+    decoders = []
+    try:
+        import PIL.Image  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        decoders.append(decode_with_pillow)
+    try:
+        import OpenImageIO  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        decoders.append(decode_with_oiio)
+    if not decoders:
+        LOGGER.debug("neither Pillow nor OpenImageIO found to decode thumbnails")
+        decoders.append(decode_stub)
+    return decoders
+
+
+class ThumbnailCache(object):
+    """
+    Least recently used thumbnails, keyed by path and modification time so a frame
+    rendered again is never displayed with its previous content.
+
+    Thread-safe.
+
+    Args:
+        max_size(int): maximum sum of the thumbnail sizes, in bytes.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items = collections.OrderedDict()  # type: dict[tuple[str, float], tuple]
+        # modification time of the last thumbnail of each path
+        self._mtimes = {}  # type: dict[str, float]
+        self._size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, path, mtime):
+        """
+        Args:
+            path(str):
+            mtime(float):
+
+        Returns:
+            tuple[bool, object]: if the thumbnail is cached, and its value.
+        """
+        with self._lock:
+            item = self._items.get((path, mtime))
+            if item is None:
+                return False, None
+            self._items.move_to_end((path, mtime))
+            return True, item[0]
+
+    def get_latest(self, path):
+        """
+        Same as :meth:`get` with the modification time of the last thumbnail of
+        the path, so without touching the disk.
+        """
+        mtime = self._mtimes.get(path)
+        if mtime is None:
+            return False, None
+        return self.get(path, mtime)
+
+    def add(self, path, mtime, value, size):
+        """
+        Args:
+            path(str):
+            mtime(float):
+            value(object): None for a file that cannot be decoded.
+            size(int): in bytes, used to respect the size limit.
+        """
+        with self._lock:
+            previous = self._mtimes.get(path)
+            if previous is not None:
+                self._remove((path, previous))
+            self._items[(path, mtime)] = (value, size)
+            self._mtimes[path] = mtime
+            self._size += size
+            while self._size > self.max_size and len(self._items) > 1:
+                self._remove(next(iter(self._items)))
+
+    def discard(self, path):
+        """
+        Forget the thumbnail of the given path, like when it is being rendered again.
+        """
+        with self._lock:
+            mtime = self._mtimes.get(path)
+            if mtime is not None:
+                self._remove((path, mtime))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._mtimes.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        _, size = self._items.pop(key)
+        self._size -= size
+        if self._mtimes.get(key[0]) == key[1]:
+            del self._mtimes[key[0]]
+
+
+class ThumbnailLoader(object):
+    """
+    Decode thumbnails in a pool of background threads.
+
+    The most recent requests are decoded first, as they are the ones currently
+    displayed, and the requests no longer needed can be dropped with :meth:`retain`.
+
+    Args:
+        cache(ThumbnailCache):
+        max_width(int):
+        max_height(int):
+        decoders(list[callable] or None): called with the path and maximum size,
+            returning a Thumbnail or None, default to :func:`get_decoders`.
+        convert(callable or None): called in the background threads with each
+            decoded Thumbnail, its result is what's stored in the cache.
+        callback(callable or None): called from the background threads with the
+            path of each thumbnail added to the cache.
+        max_workers(int):
+    """
+
+    def __init__(
+        self,
+        cache,
+        max_width,
+        max_height,
+        decoders=None,
+        convert=None,
+        callback=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        self.cache = cache
+        self.max_width = max_width
+        self.max_height = max_height
+        self.decoders = list(decoders) if decoders is not None else get_decoders()
+        self._convert = convert
+        self._callback = callback
+        self._max_workers = max_workers
+
+        self._condition = threading.Condition()
+        self._queue = []  # type: list[str]
+        self._queued = set()  # type: set[str]
+        self._threads = []  # type: list[threading.Thread]
+        self._stopped = False
+
+    @property
+    def pending_count(self):
+        return len(self._queue)
+
+    def request(self, path):
+        """
+        Queue the decoding of the given path, if not already queued.
+        """
+        with self._condition:
+            if path in self._queued:
+                # move it on top of the stack
+                self._queue.remove(path)
+            self._queue.append(path)
+            self._queued.add(path)
+            self._stopped = False
+            if len(self._threads) < min(self._max_workers, len(self._queue)):
+                self._start_thread()
+            self._condition.notify()
+
+    def retain(self, paths):
+        """
+        Drop the queued requests of paths not in the given ones.
+
+        Args:
+            paths(collections.Iterable[str]):
+        """
+        paths = set(paths)
+        with self._condition:
+            self._queue = [path for path in self._queue if path in paths]
+            self._queued = set(self._queue)
+
+    def stop(self):
+        """
+        Drop all the queued requests and let the threads exit.
+        """
+        with self._condition:
+            self._queue = []
+            self._queued = set()
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _start_thread(self):
+        thread = threading.Thread(
+            target=self._run,
+            name="localorender-thumbnails-{}".format(len(self._threads) + 1),
+        )
+        thread.daemon = True
+        self._threads.append(thread)
+        thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                with self._condition:
+                    while not self._queue and not self._stopped:
+                        self._condition.wait()
+                    if self._stopped:
+                        return
+                    path = self._queue.pop()
+                    self._queued.discard(path)
+                self._load(path)
+        finally:
+            with self._condition:
+                self._threads.remove(threading.current_thread())
+
+    def _load(self, path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        found, _ = self.cache.get(path, mtime)
+        if not found:
+            thumbnail = self._decode(path)
+            value = thumbnail
+            if thumbnail is not None and self._convert is not None:
+                value = self._convert(thumbnail)
+            size = len(thumbnail.data) if thumbnail is not None else _EMPTY_SIZE
+            self.cache.add(path, mtime, value, size)
+        if self._callback is not None:
+            self._callback(path)
+
+    def _decode(self, path):
+        for decoder in self.decoders:
+            try:
+                thumbnail = decoder(path, self.max_width, self.max_height)
+            except Exception as error:
+                LOGGER.debug(
+                    "{} cannot decode '{}': {}".format(decoder.__name__, path, error)
+                )
+                continue
+            if thumbnail is not None:
+                return thumbnail
+        return None
@@ -0,0 +1,484 @@
+"""
+Check that rendered files are complete, by reading their header only.
+
+A file existing on disk can still be truncated or corrupt after a crash or a
+full disk. For the formats listed in :data:`CHECKS`, the header is parsed and
+compared to the size of the file: for EXR every chunk of the offset table must
+point inside the file, for DPX the file size stored in the header must match,
+and PNG and JPEG files must end with their end marker. The size recorded in the
+render manifest, if any, must also match.
+
+Only a few kilobytes are read per file, in parallel, so thousands of frames on a
+file server can be verified in seconds.
+"""
+import logging
+import math
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from . import manifest
+
+LOGGER = logging.getLogger("LocaloRender.verify")
+
+HEADER_READ_SIZE = 64 * 1024
+"""
+Bytes read at the start of a file to parse its header.
+"""
+
+DEFAULT_MAX_WORKERS = 16
+
+
+class CorruptFileError(Exception):
+    """
+    Raised when a file doesn't match what its header describes.
+    """
+
+    pass
+
+
+def _read_at(file_object, offset, size):
+    file_object.seek(offset)
+    return file_object.read(size)
+
+
+"""_____________________________________________________________________________________
+EXR
+"""
+
+_EXR_MAGIC = b"\x76\x2f\x31\x01"
+_EXR_TILED_FLAG = 0x200
+_EXR_DEEP_FLAG = 0x800
+_EXR_MULTIPART_FLAG = 0x1000
+
+# scanlines stored in each chunk, by compression
+_EXR_LINES_PER_CHUNK = {
+    0: 1,  # NO_COMPRESSION
+    1: 1,  # RLE
+    2: 1,  # ZIPS
+    3: 16,  # ZIP
+    4: 32,  # PIZ
+    5: 16,  # PXR24
+    6: 32,  # B44
+    7: 32,  # B44A
+    8: 32,  # DWAA
+    9: 256,  # DWAB
+}
+
+_EXR_ONE_LEVEL = 0
+_EXR_MIPMAP_LEVELS = 1
+_EXR_RIPMAP_LEVELS = 2
+_EXR_ROUND_UP = 1
+
+
+class _ByteReader(object):
+    """
+    Read the header of a file from a buffer, reading more of the file when needed.
+    """
+
+    def __init__(self, file_object, buffer):
+        self._file = file_object
+        self._buffer = buffer
+        self.position = 0
+
+    def _ensure(self, size):
+        missing = self.position + size - len(self._buffer)
+        if missing <= 0:
+            return
+        data = _read_at(self._file, len(self._buffer), max(missing, HEADER_READ_SIZE))
+        self._buffer += data
+        if self.position + size > len(self._buffer):
+            raise CorruptFileError("truncated header")
+
+    def read(self, size):
+        self._ensure(size)
+        data = self._buffer[self.position : self.position + size]
+        self.position += size
+        return data
+
+    def read_string(self, max_size=256):
+        while True:
+            end = self._buffer.find(b"\x00", self.position)
+            if end >= 0:
+                break
+            if len(self._buffer) - self.position > max_size:
+                raise CorruptFileError("invalid header")
+            self._ensure(len(self._buffer) - self.position + 1)
+        data = self._buffer[self.position : end]
+        self.position = end + 1
+        return data
+
+
+def _read_exr_header(reader):
+    """
+    Returns:
+        dict[bytes, tuple[bytes, bytes]] or None: (type, value) of each attribute,
+            None if this is the empty header ending a multi-part file.
+    """
+    attributes = {}
+    while True:
+        name = reader.read_string()
+        if not name:
+            return attributes or None
+        attribute_type = reader.read_string()
+        (size,) = struct.unpack("<i", reader.read(4))
+        if size < 0:
+            raise CorruptFileError("invalid header attribute '{}'".format(name))
+        attributes[name] = (attribute_type, reader.read(size))
+
+
+def _get_level_count(size, level_mode, rounding):
+    if level_mode == _EXR_ONE_LEVEL:
+        return 1
+    log = math.log(size, 2) if size > 0 else 0
+    return int(math.ceil(log) if rounding == _EXR_ROUND_UP else math.floor(log)) + 1
+
+
+def _get_level_size(size, level, rounding):
+    divisor = 2**level
+    if rounding == _EXR_ROUND_UP:
+        return max(1, (size + divisor - 1) // divisor)
+    return max(1, size // divisor)
+
+
+def _get_exr_tile_count(width, height, tile_description):
+    tile_width, tile_height, mode = struct.unpack("<IIB", tile_description)
+    if not tile_width or not tile_height:
+        raise CorruptFileError("invalid tile size")
+    level_mode = mode & 0x0F
+    rounding = mode >> 4
+
+    def _tiles(size, tile_size, levels):
+        return [
+            -(-_get_level_size(size, level, rounding) // tile_size)
+            for level in range(levels)
+        ]
+
+    if level_mode == _EXR_RIPMAP_LEVELS:
+        x_tiles = _tiles(
+            width, tile_width, _get_level_count(width, level_mode, rounding)
+        )
+        y_tiles = _tiles(
+            height, tile_height, _get_level_count(height, level_mode, rounding)
+        )
+        return sum(x_tiles) * sum(y_tiles)
+    levels = _get_level_count(max(width, height), level_mode, rounding)
+    x_tiles = _tiles(width, tile_width, levels)
+    y_tiles = _tiles(height, tile_height, levels)
+    return sum(x * y for x, y in zip(x_tiles, y_tiles))
+
+
+def _get_exr_chunk_count(attributes, tiled):
+    """
+    Returns:
+        int or None: number of chunks of the part, None if it cannot be computed.
+    """
+    if b"chunkCount" in attributes:
+        return struct.unpack("<i", attributes[b"chunkCount"][1][:4])[0]
+    if b"dataWindow" not in attributes:
+        raise CorruptFileError("missing dataWindow attribute")
+    x_min, y_min, x_max, y_max = struct.unpack(
+        "<iiii", attributes[b"dataWindow"][1][:16]
+    )
+    width = x_max - x_min + 1
+    height = y_max - y_min + 1
+    if width <= 0 or height <= 0:
+        raise CorruptFileError("invalid dataWindow")
+    if tiled:
+        if b"tiles" not in attributes:
+            raise CorruptFileError("missing tiles attribute")
+        return _get_exr_tile_count(width, height, attributes[b"tiles"][1][:9])
+    compression = attributes.get(b"compression", (None, b"\x00"))[1][:1]
+    lines = _EXR_LINES_PER_CHUNK.get(ord(compression))
+    if lines is None:
+        return None
+    return -(-height // lines)
+
+
+def check_exr(file_object, file_size, header):
+    """
+    Verify that all the chunks of the offset table of an OpenEXR file point
+    inside the file, and that the last chunk is complete.
+
+    Raises:
+        CorruptFileError:
+    """
+    if header[:4] != _EXR_MAGIC:
+        raise CorruptFileError("not an OpenEXR file")
+    reader = _ByteReader(file_object, header)
+    reader.read(4)
+    (version,) = struct.unpack("<i", reader.read(4))
+    multipart = bool(version & _EXR_MULTIPART_FLAG)
+    deep = bool(version & _EXR_DEEP_FLAG)
+
+    parts = []
+    while True:
+        attributes = _read_exr_header(reader)
+        if attributes is None:
+            break
+        parts.append(attributes)
+        if not multipart:
+            break
+    if not parts:
+        raise CorruptFileError("no header")
+
+    chunk_counts = []
+    for attributes in parts:
+        part_type = attributes.get(b"type", (None, b""))[1].rstrip(b"\x00")
+        tiled = part_type in (b"tiledimage", b"deeptile") or (
+            not multipart and bool(version & _EXR_TILED_FLAG)
+        )
+        deep = deep or part_type.startswith(b"deep")
+        chunk_count = _get_exr_chunk_count(attributes, tiled)
+        if chunk_count is None:
+            # unknown compression: only the header can be verified
+            return
+        chunk_counts.append((chunk_count, tiled))
+
+    offsets = []
+    for chunk_count, _ in chunk_counts:
+        offsets.extend(
+            struct.unpack("<{}Q".format(chunk_count), reader.read(8 * chunk_count))
+        )
+    tables_end = reader.position
+    if tables_end > file_size:
+        raise CorruptFileError("truncated offset table")
+    for offset in offsets:
+        if offset == 0:
+            raise CorruptFileError("incomplete offset table, the file was not closed")
+        if offset < tables_end or offset >= file_size:
+            raise CorruptFileError(
+                "chunk offset {} outside of the file ({} bytes)".format(
+                    offset, file_size
+                )
+            )
+    if deep or not offsets:
+        return
+
+    # the last chunk in the file must hold all its data
+    last_offset = max(offsets)
+    last_part = 0
+    index = offsets.index(last_offset)
+    for chunk_count, tiled in chunk_counts:
+        if index < chunk_count:
+            break
+        index -= chunk_count
+        last_part += 1
+    tiled = chunk_counts[min(last_part, len(chunk_counts) - 1)][1]
+    # part number, then y or tile coordinates, then the data size
+    prefix_size = (4 if multipart else 0) + (16 if tiled else 4)
+    data = _read_at(file_object, last_offset + prefix_size, 4)
+    if len(data) < 4:
+        raise CorruptFileError("truncated last chunk")
+    (data_size,) = struct.unpack("<i", data)
+    chunk_end = last_offset + prefix_size + 4 + data_size
+    if data_size < 0 or chunk_end > file_size:
+        raise CorruptFileError(
+            "truncated: last chunk ends at byte {}, file has {} bytes".format(
+                chunk_end, file_size
+            )
+        )
+
+
+"""_____________________________________________________________________________________
+Other formats
+"""
+
+
+def check_dpx(file_object, file_size, header):
+    """
+    Verify that a DPX file has the size stored in its header.
+
+    Raises:
+        CorruptFileError:
+    """
+    magic = header[:4]
+    if magic == b"SDPX":
+        byte_order = ">"
+    elif magic == b"XPDS":
+        byte_order = "<"
+    else:
+        raise CorruptFileError("not a DPX file")
+    if len(header) < 20:
+        raise CorruptFileError("truncated header")
+    (image_offset,) = struct.unpack(byte_order + "I", header[4:8])
+    (expected_size,) = struct.unpack(byte_order + "I", header[16:20])
+    if image_offset > file_size:
+        raise CorruptFileError("image data outside of the file")
+    if file_size < expected_size:
+        raise CorruptFileError(
+            "truncated: {} bytes instead of {}".format(file_size, expected_size)
+        )
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_END = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+
+def check_png(file_object, file_size, header):
+    """
+    Verify that a PNG file starts with its header chunk and ends with its end chunk.
+
+    Raises:
+        CorruptFileError:
+    """
+    if header[:8] != _PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise CorruptFileError("not a PNG file")
+    tail = _read_at(file_object, max(0, file_size - len(_PNG_END)), len(_PNG_END))
+    if tail != _PNG_END:
+        raise CorruptFileError("truncated: missing end chunk")
+
+
+def check_jpeg(file_object, file_size, header):
+    """
+    Verify that a JPEG file ends with its end of image marker.
+
+    Raises:
+        CorruptFileError:
+    """
+    if header[:3] != b"\xff\xd8\xff":
+        raise CorruptFileError("not a JPEG file")
+    # some writers pad the file after the end marker
+    tail = _read_at(file_object, max(0, file_size - 64), 64).rstrip(b"\x00")
+    if not tail.endswith(b"\xff\xd9"):
+        raise CorruptFileError("truncated: missing end of image marker")
+
+
+CHECKS = {
+    ".exr": check_exr,
+    ".sxr": check_exr,
+    ".dpx": check_dpx,
+    ".png": check_png,
+    ".jpg": check_jpeg,
+    ".jpeg": check_jpeg,
+}
+"""
+Function checking the content of a file, by lowercase extension. They are called
+with the opened file, its size and its first bytes.
+"""
+
+
+def check_file(path, expected_size=None):
+    """
+    Args:
+        path(str): path of an existing file
+        expected_size(int or None): size the file must have, if known.
+
+    Returns:
+        str or None: why the file is corrupt, None if it looks complete.
+    """
+    try:
+        file_size = os.stat(path).st_size
+    except OSError as error:
+        return "cannot read file: {}".format(error)
+    if not file_size:
+        return "empty file"
+    if expected_size is not None and file_size != expected_size:
+        return "size is {} bytes instead of the {} recorded when rendered".format(
+            file_size, expected_size
+        )
+
+    check = CHECKS.get(os.path.splitext(path)[1].lower())
+    if check is None:
+        return None
+    try:
+        with open(path, "rb") as file_object:
+            header = file_object.read(HEADER_READ_SIZE)
+            check(file_object, file_size, header)
+    except CorruptFileError as error:
+        return str(error)
+    except (OSError, struct.error, ValueError, OverflowError) as error:
+        return "cannot read file: {}".format(error)
+    return None
+
+
+def verify_files(
+    paths, expected_sizes=None, max_workers=DEFAULT_MAX_WORKERS, progress_callback=None
+):
+    """
+    Check the given files in parallel.
+
+    Args:
+        paths(list[str]): paths of existing files
+        expected_sizes(dict[str, int] or None): size each path must have, if known.
+        max_workers(int): maximum number of files read at the same time.
+        progress_callback(callable or None): called with the number of files
+            checked and the total, from the calling thread.
+
+    Returns:
+        dict[str, str]: error of each corrupt file.
+    """
+    expected_sizes = expected_sizes or {}
+    total = len(paths)
+    errors = {}
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="LocaloRender-verify"
+    ) as executor:
+        results = executor.map(
+            lambda path: check_file(path, expected_sizes.get(path)), paths
+        )
+        for index, (path, error) in enumerate(zip(paths, results)):
+            if error:
+                errors[path] = error
+            if progress_callback:
+                progress_callback(index + 1, total)
+    return errors
+
+
+def get_recorded_sizes(render_plan, rows):
+    """
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]):
+
+    Returns:
+        dict[str, int]: size recorded in the manifests for the rows finished rendering.
+    """
+    records_by_directory = {}
+    sizes = {}
+    for row in rows:
+        directory = render_plan.get_directory(row)
+        records = records_by_directory.get(directory)
+        if records is None:
+            records = records_by_directory[directory] = manifest.read_manifest(
+                directory
+            )
+        record = records.get(render_plan.get_filename(row))
+        if (
+            record is not None
+            and record.get("state") == manifest.STATE_FINISHED
+            and record.get("size") is not None
+        ):
+            sizes[render_plan.get_path(row)] = record["size"]
+    return sizes
+
+
+def verify_rows(
+    render_plan, rows, max_workers=DEFAULT_MAX_WORKERS, progress_callback=None
+):
+    """
+    Check the files of the given rows, which must exist on disk.
+
+    Args:
+        render_plan(plan.RenderPlan):
+        rows(list[int]):
+        max_workers(int): see :func:`verify_files`
+        progress_callback(callable or None): see :func:`verify_files`
+
+    Returns:
+        dict[int, str]: error of each row whose file is corrupt.
+    """
+    paths = [render_plan.get_path(row) for row in rows]
+    errors = verify_files(
+        paths,
+        expected_sizes=get_recorded_sizes(render_plan, rows),
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+    )
+    corrupt_rows = {
+        row: errors[path] for row, path in zip(rows, paths) if path in errors
+    }
+    LOGGER.info("verified {} files: {} corrupt".format(len(rows), len(corrupt_rows)))
+    for row, error in sorted(corrupt_rows.items()):
+        LOGGER.warning("corrupt file '{}': {}".format(render_plan.get_path(row), error))
+    return corrupt_rows
@@ -0,0 +1,106 @@
+"""
+Detect frames stuck in a worker, like on a stalled network read or a deadlocked
+plugin, which would otherwise block ``nuke.executeMultiple`` forever.
+
+The timeout is derived from the median time of the frames already rendered in
+the run, so it adapts to heavy and light scripts without any setting.
+
+This module doesn't depend on nuke or Qt.
+"""
+import collections
+import logging
+import statistics
+
+LOGGER = logging.getLogger("LocaloRender.watchdog")
+
+DEFAULT_TIMEOUT_FACTOR = 10.0
+"""
+A frame is hung when it takes this many times the median frame time.
+"""
+
+DEFAULT_MIN_TIMEOUT = 60.0
+"""
+Minimum timeout in seconds, so quick renders don't kill frames that are only slow.
+"""
+
+DEFAULT_MIN_SAMPLES = 3
+"""
+Number of frames that must be rendered before a timeout is applied.
+"""
+
+DEFAULT_MAX_REQUEUES = 1
+"""
+Number of times a hung frame is rendered again before it is reported as failed.
+"""
+
+_MAX_SAMPLES = 500
+
+
+class FrameWatchdog(object):
+    """
+    Track the time taken by the frames of a render to find the ones hanging.
+
+    Args:
+        timeout_factor(float): multiplier of the median frame time.
+        min_timeout(float): in seconds
+        min_samples(int): frames to measure before any frame can be hung.
+        max_requeues(int): times a hung frame is rendered again.
+    """
+
+    def __init__(
+        self,
+        timeout_factor=DEFAULT_TIMEOUT_FACTOR,
+        min_timeout=DEFAULT_MIN_TIMEOUT,
+        min_samples=DEFAULT_MIN_SAMPLES,
+        max_requeues=DEFAULT_MAX_REQUEUES,
+    ):
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.min_samples = max(1, min_samples)
+        self.max_requeues = max_requeues
+        # only the most recent frames, so the timeout follows the heavy parts of a shot
+        self._durations = collections.deque(maxlen=_MAX_SAMPLES)
+        self._hang_counts = collections.Counter()
+
+    @property
+    def timeout(self):
+        """
+        Returns:
+            float or None: seconds after which a frame is hung, None while there
+                isn't enough frames rendered to know.
+        """
+        if len(self._durations) < self.min_samples:
+            return None
+        median = statistics.median(self._durations)
+        return max(self.min_timeout, median * self.timeout_factor)
+
+    def add_duration(self, duration):
+        """
+        Args:
+            duration(float): time in seconds taken to render a frame.
+        """
+        if duration >= 0:
+            self._durations.append(duration)
+
+    def is_hung(self, elapsed):
+        """
+        Args:
+            elapsed(float): time in seconds since the frame started rendering.
+
+        Returns:
+            bool:
+        """
+        timeout = self.timeout
+        return timeout is not None and elapsed > timeout
+
+    def add_hang(self, key):
+        """
+        Args:
+            key(collections.Hashable): identifies the frame that hung.
+
+        Returns:
+            bool: True if the frame should be rendered again, False if it hung too
+                many times already.
+        """
+        self._hang_counts[key] += 1
+        return self._hang_counts[key] <= self.max_requeues
@@ -0,0 +1,207 @@
+"""
+Render a chunk of frames from a nuke script, in a background nuke process.
+
+Usage::
+
+    nuke -t worker.py /path/to/job.json
+
+The job file is written by :class:`localorender.engine.RenderPool`. Progress is
+reported on stdout, one message per line, so the parent process can follow
+each frame while the worker is running.
+
+This file is executed as a script by nuke so it must not import the rest of
+the package, and must only import nuke inside functions.
+"""
+import json
+import sys
+import time
+import traceback
+
+MESSAGE_PREFIX = "[localorender-worker]"
+
+EVENT_STARTED = "started"
+EVENT_FINISHED = "finished"
+EVENT_FAILED = "failed"
+EVENT_FRAME_RENDERED = "frame-rendered"
+
+
+def encode_message(event, unit, **kwargs):
+    """
+    Args:
+        event(str): one of the ``EVENT_`` constants
+        unit(int): index of the unit in the job
+        **kwargs: additional json-serializable data
+
+    Returns:
+        str: a single line of text (without line return)
+    """
+    message = {"event": event, "unit": unit, "time": time.time()}
+    message.update(kwargs)
+    return MESSAGE_PREFIX + json.dumps(message)
+
+
+def decode_message(line):
+    """
+    Args:
+        line(str): a line of the worker output
+
+    Returns:
+        dict or None: None if the line is not a worker message.
+    """
+    line = line.strip()
+    if not line.startswith(MESSAGE_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(MESSAGE_PREFIX) :])
+    except ValueError:
+        return None
+
+
+def send_message(event, unit, **kwargs):
+    sys.stdout.write(encode_message(event, unit, **kwargs) + "\n")
+    sys.stdout.flush()
+
+
+def get_peak_memory():
+    """
+    Returns:
+        int or None: peak resident memory of this process in bytes, None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        return _get_windows_peak_memory()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _get_windows_peak_memory():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(
+            process, ctypes.byref(counters), counters.cb
+        ):
+            return None
+    except (AttributeError, OSError):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def render_job(job):
+    """
+    Open the job's script and render each of its units, in order.
+
+    Args:
+        job(dict): deserialized job file content
+
+    Returns:
+        int: number of units that failed to render
+    """
+    import nuke
+
+    nuke.scriptOpen(job["script"])
+    # the script is a temporary copy: restore the original name so tcl expressions
+    # depending on it (output paths, project directory, ...) resolve the same.
+    if job.get("root_name"):
+        nuke.root()["name"].setValue(job["root_name"])
+    nuke.root().setProxy(job.get("proxy", False))
+
+    continue_on_error = job.get("continue_on_error", False)
+    failures = 0
+
+    # report the time spent on each node and view of a unit
+    current = {"unit": None}
+    frame_starts = {}
+
+    def _on_before_frame_render():
+        key = (nuke.thisNode().fullName(), nuke.thisView())
+        frame_starts[key] = time.time()
+
+    def _on_after_frame_render():
+        node = nuke.thisNode().fullName()
+        view = nuke.thisView()
+        start = frame_starts.pop((node, view), None)
+        if start is None or current["unit"] is None:
+            return
+        send_message(
+            EVENT_FRAME_RENDERED,
+            current["unit"],
+            node=node,
+            frame=nuke.frame(),
+            view=view,
+            start=start,
+            peak_memory=get_peak_memory(),
+        )
+
+    nuke.addBeforeFrameRender(_on_before_frame_render)
+    nuke.addAfterFrameRender(_on_after_frame_render)
+
+    for index, unit in enumerate(job["units"]):
+        current["unit"] = index
+        if failures and not continue_on_error:
+            send_message(EVENT_FAILED, index, error="skipped after previous error")
+            failures += 1
+            continue
+
+        send_message(EVENT_STARTED, index)
+        nodes = [nuke.toNode(name) for name in unit["nodes"]]
+        missing = [name for name, node in zip(unit["nodes"], nodes) if node is None]
+        if missing:
+            error = "node(s) not found in script: {}".format(", ".join(missing))
+            send_message(EVENT_FAILED, index, error=error)
+            failures += 1
+            continue
+
+        frame = unit["frame"]
+        try:
+            nuke.executeMultiple(
+                nodes,
+                ((frame, frame, 1),),
+                views=unit["views"],
+                continueOnError=continue_on_error,
+            )
+        except Exception as error:
+            traceback.print_exc()
+            send_message(EVENT_FAILED, index, error=str(error))
+            failures += 1
+        else:
+            send_message(EVENT_FINISHED, index)
+
+    return failures
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        sys.stderr.write("usage: nuke -t worker.py <job.json>\n")
+        return 2
+
+    with open(argv[0], "r") as job_file:
+        job = json.load(job_file)
+
+    failures = render_job(job)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Run :class:`localorender.engine.RenderPool` against a stand-in worker script that
+speaks the same json-lines protocol as :mod:`localorender.worker`, without nuke.
+"""
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+THISDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THISDIR))
+
+from localorender import engine
+from localorender import worker
+
+FAKE_WORKER = textwrap.dedent(
+    """
+    import json
+    import sys
+    import time
+
+    PREFIX = {prefix!r}
+
+
+    def send(event, unit, **kwargs):
+        message = {{"event": event, "unit": unit, "time": time.time()}}
+        message.update(kwargs)
+        sys.stdout.write(PREFIX + json.dumps(message) + "\\n")
+        sys.stdout.flush()
+
+
+    with open(sys.argv[-1]) as job_file:
+        job = json.load(job_file)
+
+    for index, unit in enumerate(job["units"]):
+        send("started", index)
+        time.sleep(job.get("sleep", 0))
+        if unit["frame"] in job.get("fail_frames", []):
+            send("failed", index, error="fake error")
+            continue
+        for node in unit["nodes"]:
+            for view in unit["views"]:
+                send(
+                    "frame-rendered",
+                    index,
+                    node=node,
+                    frame=unit["frame"],
+                    view=view,
+                    start=time.time(),
+                )
+        send("finished", index)
+    """
+).format(prefix=worker.MESSAGE_PREFIX)
+
+
+@pytest.fixture
+def worker_command(tmp_path):
+    script_path = tmp_path / "fake_worker.py"
+    script_path.write_text(FAKE_WORKER)
+    return [sys.executable, str(script_path)]
+
+
+def get_units(frames, nodes=("Write1",), views=("main",)):
+    items = [
+        engine.RenderItem(node, frame, view)
+        for node in nodes
+        for frame in frames
+        for view in views
+    ]
+    return engine.build_units(items)
+
+
+def get_kinds(events, kind):
+    return [event for event in events if event.kind == kind]
+
+
+def test_build_units_coalesce():
+    items = [
+        engine.RenderItem(node, frame, view)
+        for node in ("Write1", "Write2")
+        for frame in (1, 2)
+        for view in ("left", "right")
+    ]
+    items.append(engine.RenderItem("Write3", 1, "main"))
+    units = engine.build_units(items)
+    assert units == [
+        engine.RenderUnit(("Write1", "Write2"), 1, ("left", "right")),
+        engine.RenderUnit(("Write1", "Write2"), 2, ("left", "right")),
+        engine.RenderUnit(("Write3",), 1, ("main",)),
+    ]
+    assert len(engine.build_units(items, coalesce=False)) == 5
+
+
+def test_split_in_chunks():
+    units = get_units(range(1, 6), nodes=("Write1",)) + get_units(
+        range(1, 3), nodes=("Write2",), views=("left",)
+    )
+    chunks = engine.split_in_chunks(units, 2)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1, 2]
+    for chunk in chunks:
+        assert len(set(unit.nodes for unit in chunk)) == 1
+
+
+def test_render_pool_success(worker_command):
+    units = get_units(range(1, 11), views=("left", "right"))
+    pool = engine.RenderPool(worker_command, max_workers=3)
+    pool.submit(units)
+    events = pool.wait(interval=0.05)
+
+    assert pool.is_done
+    finished = get_kinds(events, engine.EVENT_FINISHED)
+    assert sorted(event.unit for event in finished) == sorted(units)
+    rendered = get_kinds(events, engine.EVENT_FRAME_RENDERED)
+    assert len(rendered) == 20
+    assert set(event.item.view for event in rendered) == {"left", "right"}
+    assert not get_kinds(events, engine.EVENT_FAILED)
+    assert len(set(event.worker for event in events)) > 1
+
+
+def test_render_pool_failed_unit(worker_command):
+    units = get_units(range(1, 6))
+    pool = engine.RenderPool(
+        worker_command, job_options={"fail_frames": [3]}, max_workers=2
+    )
+    pool.submit(units)
+    events = pool.wait(interval=0.05)
+
+    failed = get_kinds(events, engine.EVENT_FAILED)
+    assert [event.unit.frame for event in failed] == [3]
+    assert failed[0].error == "fake error"
+    assert len(get_kinds(events, engine.EVENT_FINISHED)) == 4
+
+
+def test_render_pool_worker_crash(tmp_path):
+    crash_path = tmp_path / "crash.py"
+    crash_path.write_text("import sys\nsys.exit(3)\n")
+    units = get_units(range(1, 3))
+    pool = engine.RenderPool([sys.executable, str(crash_path)], max_workers=1)
+    pool.submit(units)
+    events = pool.wait(interval=0.05)
+
+    failed = get_kinds(events, engine.EVENT_FAILED)
+    assert sorted(event.unit for event in failed) == sorted(units)
+    assert "code 3" in failed[0].error
+
+
+def test_render_pool_cancel(worker_command):
+    units = get_units(range(1, 21))
+    pool = engine.RenderPool(worker_command, job_options={"sleep": 0.2}, max_workers=2)
+    pool.submit(units, chunk_size=5)
+    pool.start()
+    processes = [process.process for process in pool._running]
+    assert len(processes) == 2
+    time.sleep(0.3)
+    pool.poll()
+    pool.cancel()
+
+    assert pool.is_done
+    assert pool.pending_count == 0
+    assert all(process.poll() is not None for process in processes)
+    assert pool.poll() == []